@@ -3,7 +3,7 @@ import requests
 import pandas as pd
 from datetime import datetime
 import plotly.graph_objects as go
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
 from plotly.subplots import make_subplots
 
 from data_collection import FinancialDataCollector
@@ -36,16 +36,16 @@ class FinancialDashboardApp:
         data = self.collector.get_stock_data(symbol, period)
         return data
 
-    def fetch_analysis(self, symbol: str, period: str) -> Dict[str, Any]:
-        """Fetch stock analysis from FinancialAnalyzer"""
-        data = self.collector.get_stock_data(symbol, period)
+    def fetch_analysis(
+        self, symbol: str, period: str
+    ) -> Tuple[Optional[pd.DataFrame], Optional[Dict[str, Any]]]:
+        """Fetch stock data and analyze it with FinancialAnalyzer in one pass"""
+        data = self.fetch_stock_data(symbol, period)
         if data is not None:
-            data = self.analyzer.calculate_technical_indicators(data)
-            insights = self.analyzer.generate_insights(symbol, period)
-            return insights
+            return self.analyzer.analyze(data)
         else:
             st.error(f"No data found for symbol {symbol}")
-            return None
+            return None, None
 
     def process_query(self, query: str, symbol: str, period: str) -> str:
         """Process natural language query"""
@@ -116,17 +116,11 @@ class FinancialDashboardApp:
 
         # Fetch data and analysis
         with st.spinner("Fetching data..."):
-            data = self.fetch_stock_data(
-                st.session_state.current_symbol, st.session_state.current_period
-            )
-            insights = self.fetch_analysis(
+            data, insights = self.fetch_analysis(
                 st.session_state.current_symbol, st.session_state.current_period
             )
 
         if data is not None and insights is not None:
-            # Calculate technical indicators
-            data = self.analyzer.calculate_technical_indicators(data)
-
             # Display main price chart
             self._plot_price_chart(data, st.session_state.current_symbol)
 
@@ -320,8 +314,7 @@ class FinancialDashboardApp:
     def send_email_report(self, email: str, symbol: str, period: str) -> bool:
         """Send email report with PDF attachment"""
         try:
-            data = self.fetch_stock_data(symbol, period)
-            insights = self.fetch_analysis(symbol, period)
+            data, insights = self.fetch_analysis(symbol, period)
             if data is not None and insights is not None:
                 html_content = self.email_service.create_market_summary(
                     {"symbol": symbol, "data": data}, insights
@@ -0,0 +1,181 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from cross_asset import candle_timeframe
+from data_collection import FinancialDataCollector
+from single_flight import AsyncSingleFlight
+
+
+class AsyncFinancialDataCollector:
+    """
+    asyncio front end to FinancialDataCollector for use inside FastAPI endpoints.
+
+    Gemini REST calls are made natively through the provider's async client
+    (httpx for the live provider). yfinance has no async API, so stock
+    downloads run on a bounded thread pool and never block the event loop.
+    """
+
+    def __init__(
+        self,
+        collector: Optional[FinancialDataCollector] = None,
+        max_workers: int = 8,
+    ):
+        """
+        Args:
+            collector: Synchronous collector that does the yfinance work
+            max_workers: Size of the thread pool used for blocking calls
+        """
+        self.collector = collector if collector is not None else FinancialDataCollector()
+        self.provider = self.collector.provider
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="collector")
+
+        # Coalesce identical requests before they take up an executor thread
+        self.single_flight = AsyncSingleFlight()
+
+    async def run_blocking(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking call on the bounded executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(func, *args, **kwargs))
+
+    async def get_stock_data(
+        self,
+        symbol: str,
+        period: str = "6mo",
+        interval: str = "1d",
+        compact: bool = False,
+    ) -> Optional[pd.DataFrame]:
+        """Async equivalent of FinancialDataCollector.get_stock_data"""
+        key = (symbol.upper(), period, interval, compact)
+        df, _ = await self.single_flight.do(
+            key, self.run_blocking, self.collector.get_stock_data, symbol, period, interval, compact
+        )
+        # As in the collector, every caller gets its own copy of the shared frame
+        return df.copy() if df is not None else None
+
+    async def get_stock_data_multi(
+        self, symbol: str, intervals: List[str], period: str = "6mo"
+    ) -> Dict[str, Optional[pd.DataFrame]]:
+        """Async equivalent of FinancialDataCollector.get_stock_data_multi"""
+        return await self.run_blocking(self.collector.get_stock_data_multi, symbol, intervals, period)
+
+    async def get_stock_data_batch(
+        self,
+        symbols: List[str],
+        period: str = "6mo",
+        interval: str = "1d",
+        compact: bool = False,
+    ) -> Dict[str, Any]:
+        """Async equivalent of FinancialDataCollector.get_stock_data_batch"""
+        return await self.run_blocking(
+            self.collector.get_stock_data_batch, symbols, period, interval, compact
+        )
+
+    async def get_crypto_data(self, symbol: str = "btcusd") -> Optional[Dict[str, Any]]:
+        """
+        Fetch cryptocurrency data from Gemini API
+
+        Args:
+            symbol: Cryptocurrency symbol (e.g., 'btcusd', 'ethusd')
+
+        Returns:
+            Dictionary containing current crypto data
+        """
+        if self.collector.stream is not None:
+            snapshot = self.collector.stream.snapshot(symbol)
+            if snapshot is not None:
+                return snapshot
+
+        try:
+            ticker_data, trades_data = await self.collector.gemini_breaker.acall(
+                self._fetch_ticker_and_trades, symbol
+            )
+            return self.collector._crypto_result(symbol, ticker_data, trades_data)
+
+        except Exception as e:
+            return self.collector._crypto_fallback(symbol, e)
+
+    async def _fetch_ticker_and_trades(self, symbol: str):
+        return await asyncio.gather(
+            self.provider.aget_json(f"/v1/pubticker/{symbol}"),
+            self._fetch_trades(symbol),
+        )
+
+    async def _fetch_trades(self, symbol: str):
+        """Async equivalent of FinancialDataCollector._fetch_trades"""
+        params = self.collector._trades_params(symbol)
+        trades = []
+        while params is not None:
+            page = await self.provider.aget_json(f"/v1/trades/{symbol}", params)
+            trades.extend(page)
+            params = self.collector._next_trades_params(params, page, trades)
+        return trades
+
+    async def get_crypto_candles(
+        self, symbol: str = "btcusd", time_frame: str = "1day"
+    ) -> Optional[pd.DataFrame]:
+        """Async equivalent of FinancialDataCollector.get_crypto_candles"""
+        try:
+            rows = await self.collector.gemini_breaker.acall(
+                self.provider.aget_json, f"/v2/candles/{symbol}/{time_frame}"
+            )
+            return self.collector._candles_result(symbol, time_frame, rows)
+        except Exception as e:
+            return self.collector._candles_fallback(symbol, time_frame, e)
+
+    async def get_combined_data(
+        self,
+        stock_symbol: str,
+        crypto_symbol: str,
+        period: str = "6mo",
+        interval: str = "1d",
+    ) -> Dict[str, Any]:
+        """
+        Fetch both stock and crypto data concurrently
+
+        Args:
+            stock_symbol: Stock ticker symbol
+            crypto_symbol: Cryptocurrency symbol
+            period: Time period for the stock data
+            interval: Stock data interval
+
+        Returns:
+            Dictionary containing the stock data, the current crypto data,
+            the crypto candles and the aligned frame
+        """
+        time_frame = candle_timeframe(interval)
+        stock_data, crypto_data, crypto_candles = await asyncio.gather(
+            self.get_stock_data(stock_symbol, period, interval),
+            self.get_crypto_data(crypto_symbol),
+            self.get_crypto_candles(crypto_symbol, time_frame),
+        )
+        return {
+            "stock_data": stock_data,
+            "crypto_data": crypto_data,
+            "crypto_candles": crypto_candles,
+            "aligned": self.collector.align_combined(
+                stock_data, crypto_candles, crypto_symbol, interval, time_frame
+            ),
+        }
+
+    async def aclose(self) -> None:
+        """Close the provider's async resources and shut down the executor"""
+        await self.provider.aclose()
+        self.executor.shutdown(wait=False)
+
+
+# Example usage
+if __name__ == "__main__":
+
+    async def main():
+        collector = AsyncFinancialDataCollector()
+        combined = await collector.get_combined_data("TSLA", "btcusd")
+        if combined["aligned"] is not None:
+            print(combined["aligned"][["Close", "BTCUSD_Close"]].tail())
+        print(combined["crypto_data"])
+        await collector.aclose()
+
+    asyncio.run(main())
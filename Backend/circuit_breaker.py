@@ -0,0 +1,154 @@
+import threading
+import time
+from typing import Any, Callable, Dict
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit is open"""
+
+
+def is_upstream_failure(error: BaseException) -> bool:
+    """
+    Whether an error says the upstream is unhealthy
+
+    Client errors such as an unknown symbol (HTTP 4xx other than 429) say
+    nothing about the upstream's health and do not count.
+    """
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    return not (status is not None and 400 <= status < 500 and status != 429)
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker around one upstream.
+
+    After failure_threshold consecutive failures the circuit opens and calls
+    fail immediately with CircuitOpenError instead of waiting on a network
+    timeout. Once reset_timeout has passed a single probe call is let
+    through (half-open); if it succeeds the circuit closes, otherwise it
+    opens again for another reset_timeout.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        is_failure: Callable[[BaseException], bool] = is_upstream_failure,
+    ):
+        """
+        Args:
+            name: Upstream name used in errors and stats
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds the circuit stays open before a probe
+            is_failure: Decides which exceptions count as upstream failures
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.is_failure = is_failure
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self.opens = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def _before_call(self) -> None:
+        with self._lock:
+            if self._state == CLOSED:
+                return
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._state = HALF_OPEN
+            if self._state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+            self.rejected += 1
+            raise CircuitOpenError(f"{self.name} circuit is open")
+
+    def _on_success(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def _on_error(self, error: BaseException) -> None:
+        with self._lock:
+            self._probing = False
+            if not isinstance(error, Exception):
+                # Cancelled or interrupted; says nothing about the upstream
+                return
+            if not self.is_failure(error):
+                # The upstream answered, so a probe still proves it is back
+                if self._state == HALF_OPEN:
+                    self._state = CLOSED
+                    self._failures = 0
+                return
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self.opens += 1
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+
+    def call(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Call func through the breaker, raising CircuitOpenError while open"""
+        self._before_call()
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            self._on_error(e)
+            raise
+        self._on_success()
+        return result
+
+    async def acall(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Async equivalent of call for coroutine functions"""
+        self._before_call()
+        try:
+            result = await func(*args, **kwargs)
+        except BaseException as e:
+            self._on_error(e)
+            raise
+        self._on_success()
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Current state and counters"""
+        with self._lock:
+            return {
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                "opens": self.opens,
+                "rejected": self.rejected,
+                "open_for": time.monotonic() - self._opened_at if self._state != CLOSED else None,
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(upstream: str, **kwargs) -> CircuitBreaker:
+    """Process-wide circuit breaker for an upstream, created on first use"""
+    with _breakers_lock:
+        if upstream not in _breakers:
+            _breakers[upstream] = CircuitBreaker(upstream, **kwargs)
+        return _breakers[upstream]
+
+
+def breaker_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats of every circuit breaker created in this process"""
+    with _breakers_lock:
+        breakers = dict(_breakers)
+    return {upstream: breaker.stats() for upstream, breaker in breakers.items()}
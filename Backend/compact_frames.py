@@ -0,0 +1,83 @@
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+
+# yfinance corporate action columns, almost always zero for daily bars
+ACTION_COLUMNS = ["Dividends", "Stock Splits", "Capital Gains"]
+
+
+def compact_frame(df: pd.DataFrame, keep_actions: bool = False) -> pd.DataFrame:
+    """
+    Shrink a collected DataFrame for holding many symbols in memory
+
+    Prices and indicators become float32, volume becomes the smallest unsigned
+    integer type that holds it, corporate action columns are dropped (or kept
+    as categoricals) and the DatetimeIndex becomes int64 epoch nanoseconds.
+    The original timezone is kept in df.attrs["tz"] so expand_index can
+    restore it.
+
+    Args:
+        df: DataFrame from FinancialDataCollector.get_stock_data
+        keep_actions: Keep corporate action columns as categoricals instead of dropping them
+
+    Returns:
+        Compact copy of the DataFrame
+    """
+    compact = {}
+    for column in df.columns:
+        series = df[column]
+        if column in ACTION_COLUMNS:
+            if keep_actions:
+                compact[column] = series.astype("category")
+        elif column == "Volume":
+            volume = series.fillna(0)
+            dtype = np.uint32 if volume.max() < np.iinfo(np.uint32).max else np.int64
+            compact[column] = volume.astype(dtype)
+        elif pd.api.types.is_float_dtype(series):
+            compact[column] = series.astype(np.float32)
+        else:
+            compact[column] = series
+
+    result = pd.DataFrame(compact, index=df.index)
+    result.attrs.update(df.attrs)
+    if isinstance(df.index, pd.DatetimeIndex):
+        result.attrs["tz"] = str(df.index.tz) if df.index.tz is not None else None
+        result.index = pd.Index(df.index.as_unit("ns").asi8, name="epoch_ns")
+    return result
+
+
+def expand_index(df: pd.DataFrame) -> pd.DataFrame:
+    """Restore the DatetimeIndex of a compact frame, leaving column dtypes as they are"""
+    if df.index.name != "epoch_ns":
+        return df
+    index = pd.to_datetime(df.index.to_numpy(), unit="ns", utc=True)
+    tz = df.attrs.get("tz")
+    index = index.tz_convert(tz) if tz else index.tz_localize(None)
+    result = df.copy()
+    result.index = index.rename("Date")
+    return result
+
+
+def frame_memory_report(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Measured memory usage of a DataFrame
+
+    Returns:
+        Dictionary with total bytes, bytes per row and per column (including
+        the index) and each column's dtype
+    """
+    usage = df.memory_usage(index=True, deep=True)
+    total = int(usage.sum())
+    return {
+        "rows": len(df),
+        "total_bytes": total,
+        "bytes_per_row": total / len(df) if len(df) else 0.0,
+        "columns": {
+            str(column): {
+                "bytes": int(usage[column]),
+                "dtype": "index" if column == "Index" else str(df[column].dtype),
+            }
+            for column in usage.index
+        },
+    }
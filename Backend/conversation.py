@@ -1,5 +1,6 @@
 import os
-from typing import Dict, Any, List
+import re
+from typing import Dict, Any, List, Optional
 from datetime import datetime
 
 # from langchain.llms import GoogleGenerativeAI
@@ -17,14 +18,44 @@ from dotenv import load_dotenv
 
 from data_collection import FinancialDataCollector
 from data_analysis import FinancialAnalyzer
+from correlation_engine import CorrelationEngine
+from screener import load_universe
 
 load_dotenv()
 
+# Words in a query that ask about a cryptocurrency, and the Gemini symbol for it
+CRYPTO_KEYWORDS = {
+    "bitcoin": "btcusd",
+    "btc": "btcusd",
+    "ethereum": "ethusd",
+    "eth": "ethusd",
+}
+
+# Company names a query may use instead of the ticker
+STOCK_KEYWORDS = {
+    "tesla": "TSLA",
+    "apple": "AAPL",
+    "amazon": "AMZN",
+    "microsoft": "MSFT",
+    "google": "GOOGL",
+    "alphabet": "GOOGL",
+    "nvidia": "NVDA",
+    "meta": "META",
+    "netflix": "NFLX",
+}
+
+# Words in a query that ask for correlations or beta
+CORRELATION_KEYWORDS = {"correlation", "correlated", "correlate", "beta", "covariance"}
+
+# Benchmark for beta
+BETA_BENCHMARK = "SPY"
+
 
 class FinancialChatbot:
     def __init__(self):
         self.collector = FinancialDataCollector()
         self.analyzer = FinancialAnalyzer()
+        self.correlations = CorrelationEngine(self.collector)
         self.llm = ChatGroq(temperature=0.7, model_name="mixtral-8x7b-32768",groq_api_key=os.getenv("GROK_API_KEY"))
         self.chat_history = ChatMessageHistory()
         self._setup_chains()
@@ -111,8 +142,87 @@ class FinancialChatbot:
         if "key_levels" in insights:
             levels = insights["key_levels"]
             formatted.append("\nKey Price Levels:")
-            formatted.append(f"- Support: ${levels['support'][0]:.2f}")
-            formatted.append(f"- Resistance: ${levels['resistance'][0]:.2f}")
+            # Levels are ranked strongest first
+            formatted.append(
+                "- Support: " + ", ".join(f"${level:.2f}" for level in levels["support"][:3])
+            )
+            formatted.append(
+                "- Resistance: " + ", ".join(f"${level:.2f}" for level in levels["resistance"][:3])
+            )
+
+        return "\n".join(formatted)
+
+    def _detect_crypto(self, query: str) -> Optional[str]:
+        """Gemini symbol of the cryptocurrency a query mentions, if any"""
+        words = re.findall(r"[a-z]+", query.lower())
+        return next((CRYPTO_KEYWORDS[word] for word in words if word in CRYPTO_KEYWORDS), None)
+
+    def _format_cross_asset(
+        self, symbol: str, crypto_symbol: str, period: str
+    ) -> str:
+        """Format a stock vs cryptocurrency comparison for the prompt"""
+        combined = self.collector.get_combined_data(symbol, crypto_symbol, period)
+        aligned = combined["aligned"]
+        crypto_close = f"{crypto_symbol.upper()}_Close"
+        if aligned is None:
+            return f"\nNo comparison data available for {crypto_symbol.upper()}"
+
+        closes = aligned[["Close", crypto_close]].dropna()
+        if len(closes) < 2:
+            return f"\nNo comparison data available for {crypto_symbol.upper()}"
+        returns = closes.pct_change().dropna()
+        total_returns = closes.iloc[-1] / closes.iloc[0] - 1
+
+        formatted = [f"\nComparison with {crypto_symbol.upper()} ({period}, aligned at each close):"]
+        formatted.append(f"- {crypto_symbol.upper()} Price: ${closes[crypto_close].iloc[-1]:.2f}")
+        formatted.append(
+            f"- Return: {symbol}={total_returns['Close']:.2%}, "
+            f"{crypto_symbol.upper()}={total_returns[crypto_close]:.2%}"
+        )
+        formatted.append(
+            f"- Correlation of returns: {returns['Close'].corr(returns[crypto_close]):.4f}"
+        )
+        return "\n".join(formatted)
+
+    def _detect_stocks(self, query: str) -> List[str]:
+        """
+        Tickers a query mentions by company name, as $TICKER or as a known upper-case ticker
+
+        Bare upper-case words such as "CEO" or "EPS" are only taken as
+        tickers if they are known (see _is_known_ticker), so they do not
+        trigger downloads of nonsense symbols.
+        """
+        named = [STOCK_KEYWORDS[word] for word in re.findall(r"[a-z]+", query.lower()) if word in STOCK_KEYWORDS]
+        dollar = [word.upper() for word in re.findall(r"\$([A-Za-z]{1,5})\b", query)]
+        bare = [word for word in re.findall(r"(?<!\$)\b[A-Z]{2,5}\b", query) if self._is_known_ticker(word)]
+        return list(dict.fromkeys(named + dollar + bare))
+
+    def _is_known_ticker(self, word: str) -> bool:
+        """Whether a word is a company ticker, the benchmark, in the screener universe or already fetched"""
+        if word in STOCK_KEYWORDS.values() or word == BETA_BENCHMARK or word in load_universe():
+            return True
+        collector = self.collector
+        return collector.cache.contains(word, "1d") or (
+            collector.store is not None and collector.store.coverage_start(word, "1d") is not None
+        )
+
+    def _format_correlations(self, symbol: str, query: str, period: str) -> str:
+        """Format return correlations and betas for the symbols in a query"""
+        symbols = list(dict.fromkeys([symbol.upper()] + self._detect_stocks(query)))
+        formatted = []
+
+        correlation = self.correlations.correlation(symbols, period) if len(symbols) > 1 else None
+        if correlation is not None and len(correlation) > 1:
+            formatted.append(f"\nCorrelation of daily returns ({period}):")
+            for i, first in enumerate(correlation.index):
+                for second in correlation.columns[i + 1:]:
+                    formatted.append(f"- {first} vs {second}: {correlation.loc[first, second]:.4f}")
+
+        betas = self.correlations.beta(symbols, BETA_BENCHMARK, period)
+        if betas is not None and not betas.empty:
+            formatted.append(f"\nBeta against {BETA_BENCHMARK} ({period}):")
+            for name, value in betas.items():
+                formatted.append(f"- {name}: {value:.4f}")
 
         return "\n".join(formatted)
 
@@ -133,6 +243,12 @@ class FinancialChatbot:
         try:
             insights = self.analyzer.generate_insights(symbol, period)
             financial_data = self._format_data(insights)
+
+            crypto_symbol = self._detect_crypto(query)
+            if crypto_symbol is not None:
+                financial_data += self._format_cross_asset(symbol, crypto_symbol, period)
+            if CORRELATION_KEYWORDS.intersection(re.findall(r"[a-z]+", query.lower())):
+                financial_data += self._format_correlations(symbol, query, period)
             analysis_results = self._format_analysis(insights)
 
             # Add user message to history
@@ -175,6 +291,7 @@ if __name__ == "__main__":
         "what is the beta for Tesla stock?",
         "what is the correlation between Tesla and Apple stock?",
         "what is the correlation between Tesla and Amazon stock?",
+        "how does Tesla compare with bitcoin?",
     ]
 
     for query in test_queries:
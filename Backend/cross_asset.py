@@ -0,0 +1,126 @@
+from typing import Any, List, Optional
+
+import pandas as pd
+
+from market_calendar import EXCHANGE_TZ, MARKET_CLOSE
+from resampling import INTRADAY_MINUTES
+
+# Gemini candle time frame used for each yfinance interval
+CANDLE_TIMEFRAMES = {
+    "1m": "1m",
+    "5m": "5m",
+    "15m": "15m",
+    "30m": "30m",
+    "60m": "1hr",
+    "1h": "1hr",
+}
+DEFAULT_CANDLE_TIMEFRAME = "1day"
+
+CANDLE_WIDTHS = {
+    "1m": pd.Timedelta(minutes=1),
+    "5m": pd.Timedelta(minutes=5),
+    "15m": pd.Timedelta(minutes=15),
+    "30m": pd.Timedelta(minutes=30),
+    "1hr": pd.Timedelta(hours=1),
+    "6hr": pd.Timedelta(hours=6),
+    "1day": pd.Timedelta(days=1),
+}
+
+CANDLE_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+def candle_timeframe(interval: str) -> str:
+    """Gemini candle time frame that best matches a yfinance interval"""
+    return CANDLE_TIMEFRAMES.get(interval, DEFAULT_CANDLE_TIMEFRAME)
+
+
+def candles_to_frame(rows: List[List[Any]]) -> pd.DataFrame:
+    """
+    Convert a Gemini /v2/candles response into an OHLCV DataFrame
+
+    Args:
+        rows: [timestamp ms, open, high, low, close, volume] rows, newest first
+
+    Returns:
+        DataFrame indexed by candle open time in UTC, oldest first
+    """
+    if not rows:
+        return pd.DataFrame(columns=CANDLE_COLUMNS, index=pd.DatetimeIndex([], tz="UTC", name="Date"))
+    frame = pd.DataFrame(rows, columns=["timestampms"] + CANDLE_COLUMNS)
+    frame.index = pd.to_datetime(frame.pop("timestampms"), unit="ms", utc=True).rename("Date")
+    return frame.astype(float).sort_index()
+
+
+def bar_close_times(index: pd.DatetimeIndex, interval: str) -> pd.DatetimeIndex:
+    """
+    Time at which each yfinance bar is complete, in UTC
+
+    Intraday bars close one interval after they open and daily bars at the
+    session close. Coarser bars close when the next bar opens; the last one
+    is still forming and closes now.
+    """
+    if index.tz is None:
+        index = index.tz_localize(EXCHANGE_TZ)
+
+    if interval in INTRADAY_MINUTES:
+        closes = index + pd.Timedelta(minutes=INTRADAY_MINUTES[interval])
+    elif interval == "1d":
+        local = index.tz_convert(EXCHANGE_TZ).tz_localize(None).normalize()
+        closes = (local + MARKET_CLOSE).tz_localize(EXCHANGE_TZ, nonexistent="shift_forward", ambiguous="NaT")
+    else:
+        now = pd.Timestamp.now(tz="UTC")
+        closes = pd.DatetimeIndex(list(index[1:].tz_convert("UTC")) + [now])
+    return closes.tz_convert("UTC")
+
+
+def align_asof(
+    bars: pd.DataFrame,
+    other: pd.DataFrame,
+    interval: str,
+    other_width: pd.Timedelta,
+    prefix: str,
+    tolerance: Optional[pd.Timedelta] = None,
+) -> pd.DataFrame:
+    """
+    Join another asset's candles onto bars as of each bar's close
+
+    Each bar gets the most recent candle that had fully closed by the time
+    the bar closed, so no value from the future leaks into a row. The join
+    is a single vectorized merge_asof on the bars' own index.
+
+    Args:
+        bars: Bars defining the common index (e.g. stock data)
+        other: Candles indexed by open time (e.g. from candles_to_frame)
+        interval: yfinance interval of bars
+        other_width: Length of one candle in other
+        prefix: Prefix for the joined columns, e.g. "BTCUSD"
+        tolerance: Oldest a candle may be relative to the bar close, defaults
+            to twice the longer of the two bar lengths
+
+    Returns:
+        Copy of bars with the other asset's columns added as "<prefix>_<column>"
+    """
+    closes = bar_close_times(bars.index, interval)
+    if tolerance is None:
+        bar_width = closes.to_series().diff().median() if len(closes) > 1 else other_width
+        if pd.isna(bar_width):
+            bar_width = other_width
+        tolerance = 2 * max(bar_width, other_width)
+
+    left = pd.DataFrame({"close_time": closes.as_unit("ns"), "position": range(len(bars))})
+    right = other.add_prefix(f"{prefix}_")
+    right.insert(0, "close_time", (other.index + other_width).tz_convert("UTC").as_unit("ns"))
+
+    joined = pd.merge_asof(
+        left.sort_values("close_time"),
+        right.reset_index(drop=True).sort_values("close_time"),
+        on="close_time",
+        direction="backward",
+        allow_exact_matches=True,
+        tolerance=tolerance,
+    ).sort_values("position")
+
+    aligned = bars.copy()
+    for column in right.columns.drop("close_time"):
+        aligned[column] = joined[column].to_numpy()
+    return aligned
@@ -0,0 +1,261 @@
+import asyncio
+import json
+import math
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import websockets
+
+from market_data_providers import MarketDataProvider
+from trade_buffer import TRADE_DTYPE, VWAP_TRADES, TradeRingBuffer, trades_to_records, trades_vwap
+
+GEMINI_WS_URL = "wss://api.gemini.com"
+
+
+class _SequenceGap(Exception):
+    """Raised when socket_sequence skips, meaning messages were lost"""
+
+
+class _SymbolState:
+    def __init__(self, capacity: int):
+        self.trades = TradeRingBuffer(capacity)
+        self.bid = math.nan
+        self.ask = math.nan
+        self.last_price = math.nan
+        self.volume = math.nan
+        self.event_timestampms = 0
+        self.last_message = 0.0
+        self.last_sequence: Optional[int] = None
+        self.connected = False
+        self.reconnects = 0
+
+
+class CryptoStreamIngester:
+    """
+    Background ingester for the Gemini market data websocket.
+
+    Keeps one websocket subscription per symbol on a dedicated event loop
+    thread. The latest top of book and the last N trades are held in memory,
+    so get_crypto_data can answer without a REST round-trip. When a stream
+    drops or skips a sequence number the ingester reconnects with backoff and
+    resyncs the ticker volume and any missed trades over REST.
+    """
+
+    def __init__(
+        self,
+        symbols: List[str],
+        provider: Optional[MarketDataProvider] = None,
+        ws_url: Optional[str] = None,
+        capacity: int = 1000,
+        max_age: float = 30.0,
+        reconnect_delay: float = 1.0,
+        max_reconnect_delay: float = 30.0,
+    ):
+        """
+        Args:
+            symbols: Cryptocurrency symbols (e.g., 'btcusd', 'ethusd')
+            provider: Provider used for REST resyncs, None to skip them
+            ws_url: Websocket root, defaults to GEMINI_WS_URL env or the Gemini API
+            capacity: Number of trades kept per symbol
+            max_age: Seconds without a message after which a snapshot is stale
+            reconnect_delay: Initial reconnect backoff in seconds
+            max_reconnect_delay: Maximum reconnect backoff in seconds
+        """
+        self.symbols = [symbol.lower() for symbol in symbols]
+        self.provider = provider
+        self.ws_url = ws_url or os.getenv("GEMINI_WS_URL", GEMINI_WS_URL)
+        self.max_age = max_age
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self._states = {symbol: _SymbolState(capacity) for symbol in self.symbols}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+    def start(self) -> None:
+        """Start streaming on a background thread"""
+        if self._thread is not None:
+            return
+        self._stopping = False
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name="crypto-stream", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop streaming and wait for the background thread to exit"""
+        if self._thread is None:
+            return
+        self._stopping = True
+        self._loop.call_soon_threadsafe(self._cancel_tasks)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _cancel_tasks(self) -> None:
+        for task in asyncio.all_tasks(self._loop):
+            task.cancel()
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        tasks = [self._stream_symbol(symbol) for symbol in self.symbols]
+        try:
+            self._loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        finally:
+            self._loop.close()
+
+    def snapshot(self, symbol: str, max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        In-memory crypto data for a symbol, shaped like get_crypto_data's result
+
+        Args:
+            symbol: Cryptocurrency symbol
+            max_age: Seconds after which the stream counts as stale
+
+        Returns:
+            Dictionary of current crypto data, or None if the symbol is not
+            streamed, has no data yet or is stale
+        """
+        state = self._states.get(symbol.lower())
+        max_age = self.max_age if max_age is None else max_age
+        if state is None or len(state.trades) == 0 or math.isnan(state.bid) or math.isnan(state.ask):
+            return None
+        if time.monotonic() - state.last_message > max_age:
+            return None
+
+        buffered = state.trades.latest()
+        recent = buffered[:100]
+        return {
+            "symbol": symbol,
+            "last_price": state.last_price,
+            "bid": state.bid,
+            "ask": state.ask,
+            # Volume is only known after a REST resync
+            "volume": None if math.isnan(state.volume) else state.volume,
+            "avg_price": float(recent["price"].mean()),
+            "vwap": trades_vwap(buffered[:VWAP_TRADES]),
+            # Only the polling path sees every trade since startup
+            "cumulative_vwap": None,
+            "timestamp": datetime.fromtimestamp(state.event_timestampms / 1000),
+            "recent_trades": trades_to_records(recent[:10]),
+            "stale": False,
+        }
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Connection state, buffered trades and reconnects per symbol"""
+        now = time.monotonic()
+        return {
+            symbol: {
+                "connected": state.connected,
+                "buffered_trades": len(state.trades),
+                "reconnects": state.reconnects,
+                "seconds_since_message": now - state.last_message if state.last_message else None,
+            }
+            for symbol, state in self._states.items()
+        }
+
+    async def _stream_symbol(self, symbol: str) -> None:
+        state = self._states[symbol]
+        url = f"{self.ws_url}/v1/marketdata/{symbol}?trades=true&top_of_book=true&heartbeat=true"
+        delay = self.reconnect_delay
+
+        while not self._stopping:
+            try:
+                async with websockets.connect(url) as websocket:
+                    state.connected = True
+                    state.last_sequence = None
+                    await self._resync(symbol, state)
+                    delay = self.reconnect_delay
+                    async for raw in websocket:
+                        self._handle_message(state, json.loads(raw))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Crypto stream for {symbol} dropped: {str(e)}")
+            finally:
+                state.connected = False
+
+            if self._stopping:
+                break
+            state.reconnects += 1
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    async def _resync(self, symbol: str, state: _SymbolState) -> None:
+        """Refresh ticker volume and backfill trades missed while disconnected"""
+        if self.provider is None:
+            return
+        try:
+            # Sync calls in a thread: the provider's async client belongs to the API loop
+            ticker = await asyncio.to_thread(self.provider.get_json, f"/v1/pubticker/{symbol}")
+            state.volume = float(ticker["volume"]["USD"])
+            if math.isnan(state.last_price):
+                state.last_price = float(ticker["last"])
+
+            trades = await asyncio.to_thread(self.provider.get_json, f"/v1/trades/{symbol}")
+            last_tid = state.trades.last_tid()
+            missed = [trade for trade in reversed(trades) if int(trade["tid"]) > last_tid]
+            if missed:
+                state.trades.extend(
+                    np.array(
+                        [
+                            (
+                                int(trade["tid"]),
+                                int(trade["timestampms"]),
+                                float(trade["price"]),
+                                float(trade["amount"]),
+                                1 if trade["type"] == "buy" else -1,
+                            )
+                            for trade in missed
+                        ],
+                        dtype=TRADE_DTYPE,
+                    )
+                )
+                state.last_price = float(missed[-1]["price"])
+                state.event_timestampms = max(state.event_timestampms, int(missed[-1]["timestampms"]))
+        except Exception as e:
+            print(f"Error resyncing crypto stream for {symbol}: {str(e)}")
+
+    def _handle_message(self, state: _SymbolState, message: Dict[str, Any]) -> None:
+        state.last_message = time.monotonic()
+
+        sequence = message.get("socket_sequence")
+        if sequence is not None:
+            if state.last_sequence is not None and sequence != state.last_sequence + 1:
+                raise _SequenceGap(f"expected sequence {state.last_sequence + 1}, got {sequence}")
+            state.last_sequence = sequence
+
+        if message.get("type") != "update":
+            return
+
+        timestampms = int(message.get("timestampms") or time.time() * 1000)
+        last_tid = state.trades.last_tid()
+        for event in message.get("events", []):
+            if event.get("type") == "trade":
+                tid = int(event["tid"])
+                if tid <= last_tid:
+                    continue
+                # A resting ask being hit means the taker bought
+                side = 1 if event.get("makerSide") == "ask" else -1
+                price = float(event["price"])
+                state.trades.append(tid, timestampms, price, float(event["amount"]), side)
+                state.last_price = price
+                last_tid = tid
+            elif event.get("type") == "change" and float(event.get("remaining", 0)) > 0:
+                if event.get("side") == "bid":
+                    state.bid = float(event["price"])
+                elif event.get("side") == "ask":
+                    state.ask = float(event["price"])
+        state.event_timestampms = timestampms
+
+
+# Example usage
+if __name__ == "__main__":
+    ingester = CryptoStreamIngester(["btcusd"])
+    ingester.start()
+    time.sleep(10)
+    print(ingester.snapshot("btcusd"))
+    print(ingester.stats())
+    ingester.stop()
@@ -0,0 +1,123 @@
+"""
+Local stand-in for the Gemini market data websocket.
+
+Serves /v1/marketdata/<symbol> with Gemini-shaped messages driven by a random
+walk, so CryptoStreamIngester can be run and tested offline. Connections can
+be dropped or given sequence gaps on purpose to exercise reconnect and resync.
+
+    python crypto_stream_server.py --port 8765 --drop-after 500 --gap-every 200
+    GEMINI_WS_URL=ws://localhost:8765 python crypto_stream.py
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import websockets
+
+
+class MarketDataStandIn:
+    def __init__(
+        self,
+        interval: float = 0.05,
+        drop_after: int = 0,
+        gap_every: int = 0,
+        seed: int = 0,
+    ):
+        """
+        Args:
+            interval: Seconds between updates
+            drop_after: Close each connection after this many messages (0 = never)
+            gap_every: Skip a socket_sequence number every N messages (0 = never)
+            seed: Seed for the random walk
+        """
+        self.interval = interval
+        self.drop_after = drop_after
+        self.gap_every = gap_every
+        self._random = random.Random(seed)
+        self._prices = {}
+        self._next_tid = 1
+
+    async def handler(self, websocket, path=None):
+        path = path or websocket.request.path
+        symbol = path.split("?")[0].rstrip("/").split("/")[-1]
+        price = self._prices.setdefault(symbol, 100.0 * (1 + self._random.random()))
+        sequence = 0
+
+        async def send(message):
+            nonlocal sequence
+            message["socket_sequence"] = sequence
+            sequence += 1
+            if self.gap_every and sequence % self.gap_every == 0:
+                sequence += 1
+            await websocket.send(json.dumps(message))
+
+        await send(
+            {
+                "type": "update",
+                "eventId": self._next_tid,
+                "events": self._book_events(price, "initial"),
+            }
+        )
+
+        sent = 1
+        while not self.drop_after or sent < self.drop_after:
+            await asyncio.sleep(self.interval)
+            price *= 1 + self._random.gauss(0, 0.0005)
+            self._prices[symbol] = price
+
+            if self._random.random() < 0.1:
+                await send({"type": "heartbeat"})
+            else:
+                tid = self._next_tid
+                self._next_tid += 1
+                events = [
+                    {
+                        "type": "trade",
+                        "tid": tid,
+                        "price": f"{price:.2f}",
+                        "amount": f"{self._random.expovariate(10):.6f}",
+                        "makerSide": self._random.choice(["bid", "ask"]),
+                    }
+                ]
+                events += self._book_events(price, "top-of-book")
+                await send(
+                    {
+                        "type": "update",
+                        "eventId": tid,
+                        "timestampms": int(time.time() * 1000),
+                        "events": events,
+                    }
+                )
+            sent += 1
+
+        await websocket.close()
+
+    def _book_events(self, price, reason):
+        spread = price * 0.0001
+        return [
+            {"type": "change", "side": "bid", "price": f"{price - spread:.2f}", "remaining": "1.0", "reason": reason},
+            {"type": "change", "side": "ask", "price": f"{price + spread:.2f}", "remaining": "1.0", "reason": reason},
+        ]
+
+
+async def serve(host: str, port: int, stand_in: MarketDataStandIn) -> None:
+    async with websockets.serve(stand_in.handler, host, port):
+        print(f"Market data stand-in listening on ws://{host}:{port}")
+        await asyncio.Future()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--interval", type=float, default=0.05)
+    parser.add_argument("--drop-after", type=int, default=0)
+    parser.add_argument("--gap-every", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    stand_in = MarketDataStandIn(args.interval, args.drop_after, args.gap_every, args.seed)
+    asyncio.run(serve(args.host, args.port, stand_in))
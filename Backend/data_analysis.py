@@ -1,12 +1,36 @@
+import copy
+import os
 import pandas as pd
 import numpy as np
-from typing import Dict, Any, Optional, List, Tuple
+from typing import Dict, Any, Optional, List, Mapping, Tuple
 from data_collection import FinancialDataCollector
-import pandas_ta as ta
+from indicator_engine import TECHNICAL_COLUMNS, technical_indicators
+from insights_cache import InsightsCache, fingerprint, shared_insights_cache
+from key_levels import detect_levels
+from streaming_indicators import IndicatorState
+
+# "numpy" uses the built-in kernels; "pandas_ta" is kept for validating them
+INDICATOR_BACKENDS = ("numpy", "pandas_ta")
 
 class FinancialAnalyzer:
-    def __init__(self):
+    def __init__(
+        self,
+        indicator_backend: Optional[str] = None,
+        insights_cache: Optional[InsightsCache] = None
+    ):
+        """
+        Args:
+            indicator_backend: One of INDICATOR_BACKENDS, defaults to the
+                INDICATOR_BACKEND environment variable or "numpy"
+            insights_cache: Cache of analyze results, defaults to the shared one
+        """
+        self.indicator_backend = (indicator_backend or os.getenv("INDICATOR_BACKEND", "numpy")).lower()
+        if self.indicator_backend not in INDICATOR_BACKENDS:
+            raise ValueError(f"Unknown indicator backend: {self.indicator_backend}")
+        self.insights_cache = insights_cache if insights_cache is not None else shared_insights_cache
         self.collector = FinancialDataCollector()
+        # Per-symbol streaming indicator state, see seed_stream
+        self.streams: Dict[str, IndicatorState] = {}
 
     def calculate_technical_indicators(
         self, 
@@ -22,59 +46,220 @@ class FinancialAnalyzer:
             DataFrame with additional technical indicators
         """
         try:
-            # RSI
-            df['RSI'] = ta.rsi(df['Close'], length=14)
-            
-            # MACD
-            macd = ta.macd(df['Close'])
-            df = pd.concat([df, macd], axis=1)
-            
-            # Bollinger Bands
-            bb = ta.bbands(df['Close'])
-            df = pd.concat([df, bb], axis=1)
-            
-            # Average True Range (ATR)
-            df['ATR'] = ta.atr(df['High'], df['Low'], df['Close'])
-            
-            # Volume Moving Average
-            df['Volume_MA'] = df['Volume'].rolling(window=20).mean()
-            
-            return df
+            # Compact frames keep their float32 precision for the new columns
+            float_dtype = df['Close'].dtype if df['Close'].dtype == np.float32 else np.float64
+
+            if self.indicator_backend == "pandas_ta":
+                indicators = self._pandas_ta_indicators(df)
+            else:
+                indicators = self._numpy_indicators(df)
+            indicators = indicators.astype(float_dtype)
+
+            # One concat leaves the input frame untouched; it drops attrs
+            # such as the stale flag, so carry them over
+            result = pd.concat([df, indicators], axis=1)
+            result.attrs = dict(df.attrs)
+            return result
             
         except Exception as e:
             print(f"Error calculating technical indicators: {str(e)}")
             return df
 
+    def _numpy_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Indicator columns from the NumPy kernels in indicator_engine"""
+        columns = technical_indicators(
+            *(df[column].to_numpy(dtype=float)[np.newaxis] for column in ['High', 'Low', 'Close', 'Volume'])
+        )
+        return pd.DataFrame(
+            np.column_stack([columns[name][0] for name in TECHNICAL_COLUMNS]),
+            index=df.index,
+            columns=TECHNICAL_COLUMNS,
+        )
+
+    def _pandas_ta_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Indicator columns from pandas_ta, imported only when selected"""
+        import pandas_ta as ta
+
+        return pd.concat(
+            [
+                # RSI
+                ta.rsi(df['Close'], length=14).rename('RSI'),
+                # MACD
+                ta.macd(df['Close']),
+                # Bollinger Bands
+                ta.bbands(df['Close']),
+                # Average True Range (ATR)
+                ta.atr(df['High'], df['Low'], df['Close']).rename('ATR'),
+                # Volume Moving Average
+                df['Volume'].rolling(window=20).mean().rename('Volume_MA'),
+            ],
+            axis=1,
+        )
+
+    def analyze(
+        self,
+        df: Optional[pd.DataFrame]
+    ) -> Tuple[Optional[pd.DataFrame], Dict[str, Any]]:
+        """
+        Run the full analysis on already fetched data in a single pass
+
+        Indicators are calculated once and the daily returns are computed
+        once and shared by the statistics and risk metrics. Results are
+        cached by the fingerprint of df, so unchanged data costs a lookup.
+        Callers add columns and entries to what they get back, so the cache
+        keeps its own copies and every call returns fresh ones.
+
+        Args:
+            df: DataFrame from FinancialDataCollector.get_stock_data
+
+        Returns:
+            Tuple of (DataFrame with technical indicators, insights dictionary)
+        """
+        if df is None or df.empty:
+            return df, {}
+
+        key = fingerprint(df, self.indicator_backend)
+        if key is not None:
+            cached = self.insights_cache.get(key)
+            if cached is not None:
+                cached_df, cached_insights = cached
+                return cached_df.copy(), copy.deepcopy(cached_insights)
+
+        try:
+            df = self.calculate_technical_indicators(df)
+            returns = df['Close'].pct_change()
+
+            # Identify key levels
+            support, resistance = self._identify_key_levels(df)
+
+            insights = {
+                'statistics': self.generate_statistics(df, returns),
+                'signals': self.generate_trading_signals(df),
+                'key_levels': {
+                    'support': support,
+                    'resistance': resistance
+                },
+                'trend_analysis': self.analyze_trend(df),
+                'risk_metrics': self._calculate_risk_metrics(df, returns)
+            }
+            if key is not None:
+                self.insights_cache.put(key, (df.copy(), copy.deepcopy(insights)))
+            return df, insights
+
+        except Exception as e:
+            print(f"Error generating insights: {str(e)}")
+            return df, {}
+
+    def seed_stream(
+        self,
+        symbol: str,
+        df: pd.DataFrame
+    ) -> Optional[Dict[str, float]]:
+        """
+        Start streaming indicators for a symbol from its history
+
+        After seeding, update_stream computes the indicators of each new bar
+        in constant time instead of recalculating the whole frame.
+
+        Args:
+            symbol: Trading symbol
+            df: DataFrame with OHLCV data, oldest bar first
+
+        Returns:
+            Indicator values for the last bar of df
+        """
+        try:
+            state = IndicatorState()
+            values = state.seed(df)
+            self.streams[symbol] = state
+            return values
+
+        except Exception as e:
+            print(f"Error seeding streaming indicators for {symbol}: {str(e)}")
+            return None
+
+    def update_stream(
+        self,
+        symbol: str,
+        bar: Mapping[str, Any],
+        timestamp: Any = None
+    ) -> Optional[Dict[str, float]]:
+        """
+        Add a new bar to a seeded symbol
+
+        Args:
+            symbol: Trading symbol passed to seed_stream
+            bar: Mapping with High, Low, Close and Volume
+            timestamp: Time of the bar; bars not newer than the last one are ignored
+
+        Returns:
+            Indicator values for the bar, None if it was not applied
+        """
+        state = self.streams.get(symbol)
+        if state is None:
+            print(f"No streaming indicators seeded for {symbol}")
+            return None
+
+        if (
+            timestamp is not None
+            and state.last_timestamp is not None
+            and pd.Timestamp(timestamp) <= pd.Timestamp(state.last_timestamp)
+        ):
+            return None
+
+        try:
+            return state.update(bar, timestamp)
+
+        except Exception as e:
+            print(f"Error updating streaming indicators for {symbol}: {str(e)}")
+            return None
+
+    def snapshot_streams(self) -> Dict[str, Dict[str, Any]]:
+        """JSON-serialisable state of every streaming symbol"""
+        return {symbol: state.snapshot() for symbol, state in self.streams.items()}
+
+    def restore_streams(self, snapshot: Dict[str, Dict[str, Any]]) -> None:
+        """Resume streaming from the output of snapshot_streams"""
+        self.streams.update(
+            {symbol: IndicatorState().restore(state) for symbol, state in snapshot.items()}
+        )
+
     def generate_statistics(
         self, 
-        df: pd.DataFrame
+        df: pd.DataFrame,
+        returns: Optional[pd.Series] = None
     ) -> Dict[str, Any]:
         """
         Generate statistical analysis of the financial data
         
         Args:
             df: DataFrame with financial data
+            returns: Daily returns of df['Close'], computed if not given
             
         Returns:
             Dictionary containing statistical metrics
         """
         try:
+            if returns is None:
+                returns = df['Close'].pct_change()
+            returns_std = returns.std()
+
             return {
                 'daily_returns': {
-                    'mean': df['Close'].pct_change().mean(),
-                    'std': df['Close'].pct_change().std(),
-                    'skew': df['Close'].pct_change().skew()
+                    'mean': returns.mean(),
+                    'std': returns_std,
+                    'skew': returns.skew()
                 },
-                'volatility': df['Close'].pct_change().std() * np.sqrt(252),  # Annualized volatility
+                'volatility': returns_std * np.sqrt(252),  # Annualized volatility
                 'current_price': df['Close'].iloc[-1],
                 'price_change': {
-                    '1d': self._calculate_change(df['Close'], 1),
-                    '1w': self._calculate_change(df['Close'], 5),
-                    '1m': self._calculate_change(df['Close'], 20)
+                    '1d': self.calculate_change(df['Close'], 1),
+                    '1w': self.calculate_change(df['Close'], 5),
+                    '1m': self.calculate_change(df['Close'], 20)
                 },
                 'volume_analysis': {
                     'avg_volume': df['Volume'].mean(),
-                    'volume_trend': self._calculate_change(df['Volume'], 5)
+                    'volume_trend': self.calculate_change(df['Volume'], 5)
                 }
             }
             
@@ -90,6 +275,9 @@ class FinancialAnalyzer:
         """
         Generate comprehensive insights for a financial instrument
         
+        Fetches the data and runs analyze on it. Callers that already have
+        the data should call analyze directly.
+
         Args:
             symbol: Trading symbol
             period: Time period for analysis
@@ -97,43 +285,12 @@ class FinancialAnalyzer:
         Returns:
             Dictionary containing analysis insights
         """
-        try:
-            # Fetch data
-            df = self.collector.get_stock_data(symbol, period)
-            if df is None:
-                return {}
-            
-            # Calculate indicators
-            df = self.calculate_technical_indicators(df)
-            # print("Fetching data...cripto")
-            
-            # Generate statistics
-            stats = self.generate_statistics(df)
-            
-            # Generate trading signals
-            signals = self._generate_trading_signals(df)
-            
-            # print(df, "\nstats\n",stats, "signals\n",signals)
-            # Identify key levels
-            support, resistance = self._identify_key_levels(df)
-            
-            return {
-                'statistics': stats,
-                'signals': signals,
-                'key_levels': {
-                    'support': support,
-                    'resistance': resistance
-                },
-                'trend_analysis': self._analyze_trend(df),
-                'risk_metrics': self._calculate_risk_metrics(df)
-            }
-            
-        except Exception as e:
-            print(f"Error generating insights: {str(e)}")
-            return {}
+        df = self.collector.get_stock_data(symbol, period)
+        _, insights = self.analyze(df)
+        return insights
 
-    def _calculate_change(
-        self, 
+    @staticmethod
+    def calculate_change(
         series: pd.Series, 
         periods: int
     ) -> float:
@@ -142,8 +299,8 @@ class FinancialAnalyzer:
             return 0.0
         return ((series.iloc[-1] / series.iloc[-periods-1]) - 1) * 100
 
-    def _generate_trading_signals(
-        self, 
+    @staticmethod
+    def generate_trading_signals(
         df: pd.DataFrame
     ) -> List[str]:
         """Generate trading signals based on technical indicators"""
@@ -169,21 +326,40 @@ class FinancialAnalyzer:
         self, 
         df: pd.DataFrame
     ) -> Tuple[List[float], List[float]]:
-        """Identify support and resistance levels"""
+        """
+        Identify support and resistance levels
+
+        Levels come from clustering swing pivots (see key_levels.detect_levels),
+        strongest first, and are cached by the fingerprint of df. When the
+        price is beyond every detected level on a side, the recent low or
+        high stands in for it.
+        """
         try:
-            # Simple method using recent highs and lows
+            key = fingerprint(df, "key_levels")
+            levels = self.insights_cache.get(key) if key is not None else None
+            if levels is None:
+                levels = detect_levels(df)
+                if key is not None:
+                    self.insights_cache.put(key, levels)
+
+            support = [level['price'] for level in levels['support']]
+            resistance = [level['price'] for level in levels['resistance']]
+
+            # Recent highs and lows when no pivot level is on that side
             window = 20
-            support = df['Low'].rolling(window=window).min().iloc[-1]
-            resistance = df['High'].rolling(window=window).max().iloc[-1]
+            if not support:
+                support = [df['Low'].rolling(window=window).min().iloc[-1]]
+            if not resistance:
+                resistance = [df['High'].rolling(window=window).max().iloc[-1]]
             
-            return [support], [resistance]
+            return support, resistance
             
         except Exception as e:
             print(f"Error identifying key levels: {str(e)}")
             return [], []
 
-    def _analyze_trend(
-        self, 
+    @staticmethod
+    def analyze_trend(
         df: pd.DataFrame
     ) -> Dict[str, str]:
         """Analyze current market trend"""
@@ -207,17 +383,21 @@ class FinancialAnalyzer:
 
     def _calculate_risk_metrics(
         self, 
-        df: pd.DataFrame
+        df: pd.DataFrame,
+        returns: Optional[pd.Series] = None
     ) -> Dict[str, float]:
         """Calculate risk-related metrics"""
         try:
-            returns = df['Close'].pct_change().dropna()
+            if returns is None:
+                returns = df['Close'].pct_change()
+            returns = returns.dropna()
+            returns_std = returns.std()
             
             return {
-                'volatility': returns.std() * np.sqrt(252),
+                'volatility': returns_std * np.sqrt(252),
                 'var_95': returns.quantile(0.05),
                 'max_drawdown': (df['Close'] / df['Close'].cummax() - 1).min(),
-                'sharpe_ratio': (returns.mean() / returns.std()) * np.sqrt(252)
+                'sharpe_ratio': (returns.mean() / returns_std) * np.sqrt(252)
             }
             
         except Exception as e:
@@ -229,7 +409,7 @@ if __name__ == "__main__":
     analyzer = FinancialAnalyzer()
     
     # Test analysis for Tesla stock
-    insights = analyzer.generate_insights('TSLA')
+    data, insights = analyzer.analyze(analyzer.collector.get_stock_data('TSLA'))
     
     if insights:
         print("\nTesla Analysis Insights:")
@@ -0,0 +1,184 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+import pandas as pd
+
+from market_calendar import (
+    is_intraday,
+    is_market_open,
+    next_market_open,
+    period_start,
+    slice_period,
+)
+
+
+@dataclass
+class _CacheEntry:
+    frame: pd.DataFrame
+    coverage_start: pd.Timestamp
+    expires_at: float
+    nbytes: int
+
+
+class DataFrameCache:
+    """
+    In-memory TTL + LRU cache of raw OHLCV bars keyed by (symbol, interval).
+
+    Each entry remembers how far back its bars reach, so a cached "1y" frame
+    answers "6mo", "3mo" and "1mo" requests by slicing. Entries are evicted
+    least-recently-used first once the total DataFrame size exceeds the
+    memory budget.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 256 * 1024 * 1024,
+        intraday_ttl: float = 60.0,
+        daily_ttl: float = 300.0,
+    ):
+        """
+        Args:
+            max_bytes: Memory budget for all cached frames
+            intraday_ttl: Seconds intraday bars stay valid while the market is open
+            daily_ttl: Seconds daily and longer bars stay valid while the market is open
+        """
+        self.max_bytes = max_bytes
+        self.intraday_ttl = intraday_ttl
+        self.daily_ttl = daily_ttl
+        self._entries: "OrderedDict[Tuple[str, str], _CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def ttl_for(self, interval: str, now: Optional[pd.Timestamp] = None) -> float:
+        """
+        Seconds a freshly fetched frame of the given interval stays valid
+
+        While the market is open bars keep changing, so intraday frames expire
+        after intraday_ttl and daily frames after daily_ttl. Outside the
+        regular session nothing changes until the next open.
+        """
+        now = now if now is not None else pd.Timestamp.now(tz="UTC")
+        if is_market_open(now):
+            return self.intraday_ttl if is_intraday(interval) else self.daily_ttl
+        return max((next_market_open(now) - now).total_seconds(), self.intraday_ttl)
+
+    def get(
+        self, symbol: str, period: str, interval: str, record_stats: bool = True
+    ) -> Optional[pd.DataFrame]:
+        """
+        Return cached bars for the period, sliced from a longer cached frame if needed
+
+        Args:
+            symbol: Stock ticker symbol
+            period: Time period requested
+            interval: Bar interval
+            record_stats: Count the lookup in the hit/miss counters
+
+        Returns:
+            DataFrame of raw bars, or None on a miss
+        """
+        key = (symbol.upper(), interval)
+        with self._lock:
+            entry = self._entries.get(key)
+            # Expired entries stay until evicted, as a fallback for get_stale
+            if entry is not None and entry.expires_at <= time.time():
+                entry = None
+
+            if entry is None or entry.coverage_start > period_start(period):
+                self.misses += record_stats
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += record_stats
+            return slice_period(entry.frame, period)
+
+    def get_stale(self, symbol: str, period: str, interval: str) -> Optional[pd.DataFrame]:
+        """
+        Return cached bars for the period even if they have expired
+
+        Used as the last known good data while the upstream is unavailable.
+        Lookups are not counted in the hit/miss counters.
+        """
+        with self._lock:
+            entry = self._entries.get((symbol.upper(), interval))
+            if entry is None or entry.coverage_start > period_start(period):
+                return None
+            return slice_period(entry.frame, period)
+
+    def contains(self, symbol: str, interval: str) -> bool:
+        """Whether bars for the symbol and interval are cached, expired or not"""
+        with self._lock:
+            return (symbol.upper(), interval) in self._entries
+
+    def put(
+        self,
+        symbol: str,
+        interval: str,
+        frame: pd.DataFrame,
+        coverage_start: pd.Timestamp,
+    ) -> None:
+        """
+        Cache raw bars for a symbol and interval
+
+        Args:
+            symbol: Stock ticker symbol
+            interval: Bar interval
+            frame: Raw OHLCV bars
+            coverage_start: Earliest timestamp the bars are complete from
+        """
+        key = (symbol.upper(), interval)
+        nbytes = int(frame.memory_usage(index=True, deep=True).sum())
+        entry = _CacheEntry(
+            frame=frame,
+            coverage_start=coverage_start,
+            expires_at=time.time() + self.ttl_for(interval),
+            nbytes=nbytes,
+        )
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if nbytes > self.max_bytes:
+                return
+            self._entries[key] = entry
+            self._total_bytes += nbytes
+
+            while self._total_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, symbol: str, interval: Optional[str] = None) -> None:
+        """Drop cached bars for a symbol, for one interval or all of them"""
+        with self._lock:
+            for key in list(self._entries):
+                if key[0] == symbol.upper() and (interval is None or key[1] == interval):
+                    self._remove(key)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and memory usage"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _remove(self, key: Tuple[str, str]) -> None:
+        entry = self._entries.pop(key)
+        self._total_bytes -= entry.nbytes
+
+
+# Process-wide cache shared by every FinancialDataCollector by default
+shared_cache = DataFrameCache()
@@ -1,56 +1,551 @@
-import yfinance as yf
 import pandas as pd
-import requests
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 import os
 from dotenv import load_dotenv
 
+from data_store import OHLCVStore
+from data_cache import DataFrameCache, shared_cache
+from single_flight import SingleFlight
+from circuit_breaker import get_breaker
+from market_calendar import period_start, slice_period
+from market_data_providers import MarketDataProvider, UpstreamEmptyError, is_missing_data, provider_from_env
+from crypto_stream import CryptoStreamIngester
+from trade_store import TradeStore
+from compact_frames import compact_frame, expand_index
+from cross_asset import CANDLE_WIDTHS, align_asof, candle_timeframe, candles_to_frame
+from resampling import can_resample, interval_sort_key, plan_fetches, resample_ohlcv
+
 load_dotenv()
 
+# Cached intervals that coarser bars may be resampled from
+RESAMPLE_SOURCES = ["1m", "2m", "5m", "15m", "30m", "60m", "1h", "90m", "1d", "1mo"]
+
+# Trades per /v1/trades page, and pages fetched per poll when catching up
+TRADES_PAGE = 500
+MAX_TRADE_PAGES = 10
+
+# Worker pool for issuing exchange sub-requests concurrently
+_request_executor = ThreadPoolExecutor(max_workers=20, thread_name_prefix="http")
+
 
 class FinancialDataCollector:
-    def __init__(self):
+    def __init__(
+        self,
+        store_dir: Optional[str] = None,
+        cache: Optional[DataFrameCache] = None,
+        provider: Optional[MarketDataProvider] = None,
+        stream: Optional[CryptoStreamIngester] = None,
+    ):
         self.gemini_api_key = os.getenv("GEMINI_API_KEY")
-        self.gemini_base_url = "https://api.gemini.com/v1"
+
+        # Upstream market data (yfinance and Gemini by default, see
+        # market_data_providers.provider_from_env for record/replay)
+        self.provider = provider if provider is not None else provider_from_env()
+        self.http_executor = _request_executor
+
+        # Optional websocket ingester; streamed symbols are served from memory
+        self.stream = stream
+
+        # Trade history polled incrementally from the Gemini trades endpoint
+        self.trade_store = TradeStore()
+
+        # Local OHLCV store; set OHLCV_STORE_DIR="" to disable it
+        store_dir = store_dir if store_dir is not None else os.getenv("OHLCV_STORE_DIR", "data_store")
+        self.store = OHLCVStore(store_dir) if store_dir else None
+
+        # In-memory cache of raw bars in front of the store and yfinance,
+        # shared across collectors unless one is passed in
+        self.cache = cache if cache is not None else shared_cache
+
+        # Concurrent requests for the same bars share one upstream fetch
+        self.single_flight = SingleFlight()
+
+        # Fail fast while an upstream is down and serve the last known good
+        # data instead, flagged as stale
+        self.yfinance_breaker = get_breaker("yfinance")
+        self.gemini_breaker = get_breaker("gemini")
+        self._last_tickers: Dict[str, Dict[str, Any]] = {}
+        self._last_candles: Dict[Tuple[str, str], pd.DataFrame] = {}
 
     def get_stock_data(
-        self, symbol: str, period: str = "6mo", interval: str = "1d"
+        self,
+        symbol: str,
+        period: str = "6mo",
+        interval: str = "1d",
+        compact: bool = False,
+        refresh: bool = False,
     ) -> Optional[pd.DataFrame]:
         """
-        Fetch historical stock data using yfinance
+        Fetch historical stock data from the market data provider (yfinance)
 
         Args:
             symbol: Stock ticker symbol
             period: Time period to fetch (1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y, 10y, ytd, max)
             interval: Data interval (1m, 2m, 5m, 15m, 30m, 60m, 90m, 1h, 1d, 5d, 1wk, 1mo, 3mo)
+            compact: Return a compact frame (see compact_frames.compact_frame)
+            refresh: Skip the cached bars and fetch the latest ones; the cache
+                entry is only replaced once the fetch succeeds, so it stays
+                available as the last known good data
 
         Returns:
-            DataFrame with historical stock data
+            DataFrame with historical stock data. If the upstream is unavailable
+            the last known good data is returned with df.attrs["stale"] set.
         """
+        key = (symbol.upper(), period, interval, refresh)
+        df, _ = self.single_flight.do(key, self._get_stock_data, symbol, period, interval, refresh)
+        if df is None:
+            return None
+        # The flight's frame is never handed out; every caller, the one that
+        # ran the fetch included, gets its own copy to modify
+        return compact_frame(df) if compact else df.copy()
+
+    def _get_stock_data(
+        self, symbol: str, period: str, interval: str, refresh: bool = False
+    ) -> Optional[pd.DataFrame]:
+        """Uncoalesced implementation of get_stock_data"""
         try:
-            ticker = yf.Ticker(symbol)
-            df = ticker.history(period=period, interval=interval)
+            df = self._get_raw_bars(symbol, period, interval, refresh)
 
-            if df.empty:
+            if df is None or df.empty:
                 print(f"No data found for symbol {symbol}")
                 return None
 
-            # Add basic technical indicators
-            df["SMA_20"] = df["Close"].rolling(window=20).mean()
-            df["SMA_50"] = df["Close"].rolling(window=50).mean()
+            return self._add_indicators(df, symbol, interval)
 
-            # Add Bollinger Bands
-            std_dev = df["Close"].rolling(window=20).std()
-            df["BBU_20_2.0"] = df["SMA_20"] + (std_dev * 2)
-            df["BBM_20_2.0"] = df["SMA_20"]
-            df["BBL_20_2.0"] = df["SMA_20"] - (std_dev * 2)
+        except Exception as e:
+            print(f"Error fetching stock data for {symbol}: {str(e)}")
+            return None
+
+    def _get_raw_bars(
+        self, symbol: str, period: str, interval: str, refresh: bool = False
+    ) -> Optional[pd.DataFrame]:
+        """
+        Raw OHLCV bars for the period from the cache, finer cached bars, the store
+        or the provider, in that order; refresh starts at the store
+        """
+        if not refresh:
+            df = self.cache.get(symbol, period, interval)
+            if df is not None:
+                return df
 
-            return df
+            df = self._derive_from_cache(symbol, period, interval)
+            if df is not None:
+                return df
 
+        try:
+            bars, coverage_start = self._load_history(symbol, period, interval)
         except Exception as e:
-            print(f"Error fetching stock data for {symbol}: {str(e)}")
+            fallback = self._last_known_bars(symbol, period, interval)
+            if fallback is None:
+                raise
+            print(f"Serving stale stock data for {symbol}: {str(e)}")
+            return fallback
+
+        if bars is None or bars.empty:
             return None
+        self.cache.put(symbol, interval, bars, coverage_start)
+        return slice_period(bars, period)
+
+    def _last_known_bars(
+        self, symbol: str, period: str, interval: str
+    ) -> Optional[pd.DataFrame]:
+        """Expired cached or stored bars for the period, flagged as stale"""
+        df = self.cache.get_stale(symbol, period, interval)
+        if df is None and self.store is not None:
+            stored = self.store.read(symbol, interval)
+            if stored is not None:
+                df = slice_period(stored, period)
+        if df is None or df.empty:
+            return None
+        df = df.copy()
+        df.attrs["stale"] = True
+        return df
+
+    def _derive_from_cache(
+        self, symbol: str, period: str, interval: str
+    ) -> Optional[pd.DataFrame]:
+        """
+        Build bars for the interval by resampling finer bars already cached
+
+        Derived bars are not cached themselves: the cache and the store hold
+        provider bars only, and resampling the cached source again is cheap.
+        """
+        sources = sorted(
+            (source for source in RESAMPLE_SOURCES if can_resample(source, interval)),
+            key=interval_sort_key,
+            reverse=True,
+        )
+        for source in sources:
+            fine = self.cache.get(symbol, period, source, record_stats=False)
+            if fine is None or fine.empty:
+                continue
+            return resample_ohlcv(fine, interval)
+        return None
+
+    def get_stock_data_multi(
+        self, symbol: str, intervals: List[str], period: str = "6mo"
+    ) -> Dict[str, Optional[pd.DataFrame]]:
+        """
+        Fetch stock data for several intervals with as few downloads as possible
+
+        The finest interval yfinance can serve for the period is downloaded
+        once and every coarser interval is resampled from it locally. Daily
+        and longer intervals are adjusted, so they are only derived from each
+        other, never from intraday bars (see resampling.can_resample).
+
+        Args:
+            symbol: Stock ticker symbol
+            intervals: Data intervals, e.g. ["5m", "1h", "1d", "1wk"]
+            period: Time period to fetch
+
+        Returns:
+            Dictionary mapping each interval to its DataFrame (None on failure)
+        """
+        lookback = None if period == "max" else pd.Timestamp.now(tz="UTC") - period_start(period)
+        results: Dict[str, Optional[pd.DataFrame]] = {}
+
+        for source, targets in plan_fetches(intervals, lookback).items():
+            try:
+                bars = self._get_raw_bars(symbol, period, source)
+            except Exception as e:
+                print(f"Error fetching stock data for {symbol} ({source}): {str(e)}")
+                bars = None
+
+            for target in targets:
+                if bars is None or bars.empty:
+                    results[target] = None
+                    continue
+                derived = bars if target == source else resample_ohlcv(bars, target)
+                results[target] = self._add_indicators(derived, symbol, target)
+
+        return results
+
+    def get_stock_data_batch(
+        self,
+        symbols: List[str],
+        period: str = "6mo",
+        interval: str = "1d",
+        compact: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Fetch historical stock data for many symbols in one threaded download
+
+        Symbols already in the cache are served from it; the rest are read
+        from the local store and fetched with at most two threaded download
+        calls, one topping up stored bars and one for whole periods (see
+        _batch_history). The SMA and Bollinger Band
+        columns are computed for the whole symbols panel at once.
+
+        Args:
+            symbols: Stock ticker symbols
+            period: Time period to fetch (1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y, 10y, ytd, max)
+            interval: Data interval (1m, 2m, 5m, 15m, 30m, 60m, 90m, 1h, 1d, 5d, 1wk, 1mo, 3mo)
+            compact: Return compact frames (see compact_frames.compact_frame)
+
+        Returns:
+            Dictionary with "data" mapping each symbol to its DataFrame and
+            "errors" mapping each failed symbol to an error message
+        """
+        symbols = list(dict.fromkeys(symbol.upper() for symbol in symbols))
+        frames: Dict[str, pd.DataFrame] = {}
+        errors: Dict[str, str] = {}
+
+        missing = []
+        for symbol in symbols:
+            cached = self.cache.get(symbol, period, interval)
+            if cached is not None and not cached.empty:
+                frames[symbol] = cached
+            else:
+                missing.append(symbol)
+
+        if missing:
+            fetched, fetch_errors = self._batch_history(missing, period, interval)
+            frames.update(fetched)
+            errors.update(fetch_errors)
+
+        if frames:
+            # One wide panel of closes, symbols x time, for the indicator pass
+            close = pd.concat({symbol: df["Close"] for symbol, df in frames.items()}, axis=1)
+            indicators = self._panel_indicators(close)
+            for symbol, df in frames.items():
+                df = df.copy()
+                df.attrs.update(symbol=symbol, interval=interval)
+                for name, values in indicators.items():
+                    df[name] = values[symbol].reindex(df.index)
+                frames[symbol] = compact_frame(df) if compact else df
+
+        for symbol in errors:
+            print(f"Error fetching stock data for {symbol}: {errors[symbol]}")
+
+        return {"data": frames, "errors": errors}
+
+    def _panel_indicators(self, close: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+        """
+        Compute the SMA and Bollinger Band columns for a time x symbols panel
+
+        Symbols trade on different calendars, so each column's valid closes are
+        packed to the top before rolling. The rolling windows then span each
+        symbol's own bars, as they would for a single-symbol frame.
+        """
+        values = close.to_numpy(dtype=float)
+        order = np.argsort(np.isnan(values), axis=0, kind="stable")
+        packed = pd.DataFrame(np.take_along_axis(values, order, axis=0))
+
+        def unpack(rolled: pd.DataFrame) -> pd.DataFrame:
+            result = np.empty_like(values)
+            np.put_along_axis(result, order, rolled.to_numpy(), axis=0)
+            return pd.DataFrame(result, index=close.index, columns=close.columns)
+
+        sma_20 = packed.rolling(window=20).mean()
+        sma_50 = packed.rolling(window=50).mean()
+        std_dev = packed.rolling(window=20).std()
+
+        return {
+            "SMA_20": unpack(sma_20),
+            "SMA_50": unpack(sma_50),
+            "BBU_20_2.0": unpack(sma_20 + (std_dev * 2)),
+            "BBM_20_2.0": unpack(sma_20),
+            "BBL_20_2.0": unpack(sma_20 - (std_dev * 2)),
+        }
+
+    def _batch_history(
+        self, symbols: List[str], period: str, interval: str
+    ) -> Tuple[Dict[str, pd.DataFrame], Dict[str, str]]:
+        """
+        Raw OHLCV bars for the period of many symbols, through the local store
+
+        Symbols whose stored bars cover the period are topped up with one
+        download, the rest are downloaded for the whole period with another.
+        Symbols whose stored bars a split or dividend has re-adjusted are
+        downloaded again for the whole period with a third. The results are
+        merged into the store and cached, as _load_history does for a single
+        symbol.
+
+        Returns:
+            Tuple of (bars by symbol, errors by symbol)
+        """
+        required_start = period_start(period)
+        stored: Dict[str, Tuple[Optional[pd.DataFrame], Optional[pd.Timestamp]]] = {}
+        if self.store is not None:
+            for symbol in symbols:
+                stored[symbol] = (self.store.read(symbol, interval), self.store.coverage_start(symbol, interval))
+
+        top_up = [symbol for symbol in symbols if self._covers(*stored.get(symbol, (None, None)), required_start)]
+        full = [symbol for symbol in symbols if symbol not in top_up]
+        groups = []
+        if top_up:
+            groups.append((top_up, {"start": min(self.store.top_up_start(stored[symbol][0]) for symbol in top_up)}))
+        if full:
+            groups.append((full, {"period": period}))
+
+        # Symbols we hold bars for, whose missing data means an upstream failure
+        has_stored = {symbol for symbol, (bars, _) in stored.items() if bars is not None and not bars.empty}
+        frames: Dict[str, pd.DataFrame] = {}
+        errors: Dict[str, str] = {}
+        # Grows by one group when stored bars have to be fetched again
+        for group, window in groups:
+            known = {symbol for symbol in group if symbol in has_stored or self.cache.contains(symbol, interval)}
+            try:
+                panel, download_errors, returned = self.yfinance_breaker.call(
+                    self._download_group, group, interval, window, known
+                )
+            except Exception as e:
+                print(f"Error downloading batch stock data: {str(e)}")
+                for symbol in group:
+                    fallback = self._last_known_bars(symbol, period, interval)
+                    if fallback is not None:
+                        frames[symbol] = fallback
+                    else:
+                        errors[symbol] = str(e)
+                continue
+
+            readjust = []
+            for symbol in group:
+                new_bars = pd.DataFrame()
+                if symbol in returned:
+                    new_bars = panel.xs(symbol, axis=1, level=1).dropna(how="all", subset=["Close"])
+                if "start" in window and self.store.adjustment_changed(stored[symbol][0], new_bars):
+                    # Replace rather than merge: the stored bars are adjusted differently
+                    print(f"Adjustment of stored bars for {symbol} ({interval}) changed, fetching them again")
+                    stored[symbol] = (None, None)
+                    readjust.append(symbol)
+                    continue
+                if new_bars.empty and symbol in known:
+                    # The upstream lost bars it had; serve the last known ones
+                    fallback = self._last_known_bars(symbol, period, interval)
+                    if fallback is not None:
+                        frames[symbol] = fallback
+                        continue
+                if self.store is not None:
+                    bars, coverage_start = self._merge_into_store(
+                        symbol, interval, *stored[symbol], new_bars, required_start
+                    )
+                else:
+                    bars, coverage_start = new_bars, required_start
+                if bars is None or bars.empty:
+                    errors[symbol] = download_errors.get(
+                        symbol, "No data found" if symbol in returned else "No data returned"
+                    )
+                    continue
+                self.cache.put(symbol, interval, bars, coverage_start)
+                frames[symbol] = slice_period(bars, period)
+            if readjust:
+                groups.append((readjust, {"period": period}))
+
+        return frames, errors
+
+    def _download_group(
+        self, group: List[str], interval: str, window: Dict[str, Any], known: set
+    ) -> Tuple[pd.DataFrame, Dict[str, str], set]:
+        """
+        One batched download; runs inside the yfinance circuit breaker
+
+        yf.download records failures per symbol instead of raising them, so
+        a download that returns no bars for any symbol we already hold bars
+        for is raised as an upstream failure.
+
+        Returns:
+            Tuple of (panel with (field, symbol) columns, errors by symbol,
+            symbols that came back with bars)
+        """
+        panel, download_errors = self.provider.download(group, interval=interval, **window)
+        returned = set()
+        if not panel.empty:
+            if not isinstance(panel.columns, pd.MultiIndex):
+                panel.columns = pd.MultiIndex.from_product([panel.columns, group])
+            closes = panel["Close"]
+            returned = {symbol for symbol in closes.columns if closes[symbol].notna().any()}
+        if known and not known & returned:
+            raise UpstreamEmptyError(f"yfinance returned no bars for {len(known)} known symbols")
+        return panel, download_errors, returned
+
+    @staticmethod
+    def _covers(
+        stored: Optional[pd.DataFrame], coverage: Optional[pd.Timestamp], required_start: pd.Timestamp
+    ) -> bool:
+        """Whether stored bars are complete from required_start, so only newer bars are needed"""
+        return stored is not None and not stored.empty and coverage is not None and coverage <= required_start
+
+    def _load_history(
+        self, symbol: str, period: str, interval: str
+    ) -> Tuple[Optional[pd.DataFrame], pd.Timestamp]:
+        """
+        Load raw OHLCV bars, reading from the local store where possible
+
+        Stored bars that already cover the requested period are topped up by
+        fetching only the newest bars. Otherwise, or when a split or dividend
+        has changed the adjustment of the stored bars, the whole period is
+        downloaded and merged into the store, replacing the stored bars in
+        the second case.
+
+        Returns:
+            Tuple of (all known bars, timestamp the bars are complete from)
+        """
+        required_start = period_start(period)
+        if self.store is None:
+            return self._history(symbol, interval, period=period), required_start
+
+        stored = self.store.read(symbol, interval)
+        coverage = self.store.coverage_start(symbol, interval)
+
+        if self._covers(stored, coverage, required_start):
+            new_bars = self._history(symbol, interval, start=self.store.top_up_start(stored))
+            if not self.store.adjustment_changed(stored, new_bars):
+                return self._merge_into_store(symbol, interval, stored, coverage, new_bars, required_start)
+            print(f"Adjustment of stored bars for {symbol} ({interval}) changed, fetching them again")
+            stored, coverage = None, None
+        new_bars = self._history(symbol, interval, period=period)
+        return self._merge_into_store(symbol, interval, stored, coverage, new_bars, required_start)
+
+    def _merge_into_store(
+        self,
+        symbol: str,
+        interval: str,
+        stored: Optional[pd.DataFrame],
+        coverage: Optional[pd.Timestamp],
+        new_bars: pd.DataFrame,
+        required_start: pd.Timestamp,
+    ) -> Tuple[Optional[pd.DataFrame], pd.Timestamp]:
+        """
+        Merge freshly fetched bars into the stored ones and write them back
+
+        Returns:
+            Tuple of (all known bars, timestamp the bars are complete from)
+        """
+        covered = self._covers(stored, coverage, required_start)
+        if new_bars is None or new_bars.empty:
+            return (stored, coverage) if covered else (new_bars, required_start)
+
+        if covered:
+            new_coverage = coverage
+        else:
+            new_coverage = required_start
+            # Keep the older coverage if the new download joins onto it
+            if (
+                stored is not None
+                and not stored.empty
+                and coverage is not None
+                and stored.index[-1] >= new_bars.index[0]
+            ):
+                new_coverage = min(coverage, required_start)
+
+        merged = self.store.merge(stored, new_bars)
+        try:
+            self.store.write(symbol, interval, merged, coverage_start=new_coverage)
+        except Exception as e:
+            print(f"Error storing bars for {symbol} ({interval}): {str(e)}")
+        return merged, new_coverage
+
+    def _history(self, symbol: str, interval: str, **kwargs) -> pd.DataFrame:
+        """
+        provider.history behind the yfinance circuit breaker
+
+        yfinance reports some outages as missing data, so missing data for a
+        symbol with cached or stored bars counts as an upstream failure and
+        leads to the last known good bars. For an unknown symbol it is an
+        empty result that leaves the breaker alone.
+        """
+        known = self.cache.contains(symbol, interval) or (
+            self.store is not None and self.store.coverage_start(symbol, interval) is not None
+        )
+
+        def fetch() -> pd.DataFrame:
+            try:
+                bars = self.provider.history(symbol, interval, **kwargs)
+            except Exception as e:
+                if known or not is_missing_data(e):
+                    raise
+                return pd.DataFrame()
+            if bars.empty and known:
+                raise UpstreamEmptyError(f"yfinance returned no bars for {symbol} ({interval})")
+            return bars
+
+        return self.yfinance_breaker.call(fetch)
+
+    def _add_indicators(self, df: pd.DataFrame, symbol: str, interval: str) -> pd.DataFrame:
+        """
+        Add the SMA and Bollinger Band columns to raw OHLCV bars
+
+        The symbol and interval are recorded in df.attrs, where
+        insights_cache.fingerprint looks for them.
+        """
+        df = df.copy()
+        df.attrs.update(symbol=symbol.upper(), interval=interval)
+
+        # Add basic technical indicators
+        df["SMA_20"] = df["Close"].rolling(window=20).mean()
+        df["SMA_50"] = df["Close"].rolling(window=50).mean()
+
+        # Add Bollinger Bands
+        std_dev = df["Close"].rolling(window=20).std()
+        df["BBU_20_2.0"] = df["SMA_20"] + (std_dev * 2)
+        df["BBM_20_2.0"] = df["SMA_20"]
+        df["BBL_20_2.0"] = df["SMA_20"] - (std_dev * 2)
+
+        return df
 
     def get_crypto_data(self, symbol: str = "btcusd") -> Optional[Dict[str, Any]]:
         """
@@ -60,63 +555,211 @@ class FinancialDataCollector:
             symbol: Cryptocurrency symbol (e.g., 'btcusd', 'ethusd')
 
         Returns:
-            Dictionary containing current crypto data
+            Dictionary containing current crypto data, with "stale" set when
+            the Gemini API is unavailable and the last known ticker is used
         """
+        if self.stream is not None:
+            snapshot = self.stream.snapshot(symbol)
+            if snapshot is not None:
+                return snapshot
+
         try:
-            # Get ticker information
-            ticker_url = f"{self.gemini_base_url}/pubticker/{symbol}"
-            response = requests.get(ticker_url)
-            response.raise_for_status()
-
-            # Get recent trades
-            trades_url = f"{self.gemini_base_url}/trades/{symbol}"
-            trades_response = requests.get(trades_url)
-            trades_response.raise_for_status()
-
-            ticker_data = response.json()
-            trades_data = trades_response.json()
-
-            # Calculate additional metrics
-            recent_prices = [float(trade["price"]) for trade in trades_data[:100]]
-            avg_price = sum(recent_prices) / len(recent_prices)
-
-            return {
-                "symbol": symbol,
-                "last_price": float(ticker_data["last"]),
-                "bid": float(ticker_data["bid"]),
-                "ask": float(ticker_data["ask"]),
-                "volume": float(ticker_data["volume"]["USD"]),
-                "avg_price": avg_price,
-                "timestamp": datetime.fromtimestamp(
-                    float(ticker_data["volume"]["timestamp"]) / 1000
-                ),
-                "recent_trades": trades_data[:10],
-            }
+            # One breaker call for both requests, so a half-open probe covers them
+            ticker_data, trades = self.gemini_breaker.call(self._fetch_ticker_and_trades, symbol)
+            return self._crypto_result(symbol, ticker_data, trades)
+
+        except Exception as e:
+            return self._crypto_fallback(symbol, e)
+
+    def _fetch_ticker_and_trades(self, symbol: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """Get ticker information and recent trades concurrently"""
+        ticker_future = self.http_executor.submit(
+            self.provider.get_json, f"/v1/pubticker/{symbol}"
+        )
+        trades_future = self.http_executor.submit(self._fetch_trades, symbol)
+        return ticker_future.result(), trades_future.result()
+
+    def _fetch_trades(self, symbol: str) -> List[Dict[str, Any]]:
+        """Trades newer than the last seen one, paging until a short page"""
+        params = self._trades_params(symbol)
+        trades = []
+        while params is not None:
+            page = self.provider.get_json(f"/v1/trades/{symbol}", params)
+            trades.extend(page)
+            params = self._next_trades_params(params, page, trades)
+        return trades
+
+    def _crypto_result(
+        self, symbol: str, ticker_data: Dict[str, Any], trades: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Ingest fetched trades, remember the ticker and build the crypto data"""
+        self.trade_store.ingest(symbol, trades)
+        self._last_tickers[symbol.lower()] = ticker_data
+        return self._build_crypto_data(symbol, ticker_data)
+
+    def _crypto_fallback(self, symbol: str, error: Exception) -> Optional[Dict[str, Any]]:
+        """Crypto data from the last known ticker, flagged as stale"""
+        ticker_data = self._last_tickers.get(symbol.lower())
+        if ticker_data is None:
+            print(f"Error fetching crypto data for {symbol}: {str(error)}")
+            return None
+        print(f"Serving stale crypto data for {symbol}: {str(error)}")
+        return self._build_crypto_data(symbol, ticker_data, stale=True)
+
+    def _trades_params(self, symbol: str) -> Dict[str, Any]:
+        """Query parameters that request only trades newer than the last seen one"""
+        params = {"limit_trades": TRADES_PAGE}
+        last_tid = self.trade_store.last_tid(symbol)
+        if last_tid:
+            params["since_tid"] = last_tid
+        return params
+
+    @staticmethod
+    def _next_trades_params(
+        params: Dict[str, Any], page: List[Dict[str, Any]], trades: List[Dict[str, Any]]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Query parameters of the page after a full one, None once caught up
+
+        A first poll only takes the newest page. Later polls page on from the
+        newest trade seen until a page comes back short, for at most
+        MAX_TRADE_PAGES pages; trades beyond that are skipped, not retried.
+
+        Args:
+            params: Parameters of the page just fetched
+            page: Trades of that page
+            trades: Trades of every page fetched so far
+
+        Returns:
+            Parameters of the next page, or None to stop
+        """
+        if "since_tid" not in params or len(page) < TRADES_PAGE or len(trades) >= TRADES_PAGE * MAX_TRADE_PAGES:
+            return None
+        return {**params, "since_tid": max(int(trade["tid"]) for trade in page)}
 
+    def _build_crypto_data(
+        self, symbol: str, ticker_data: Dict[str, Any], stale: bool = False
+    ) -> Dict[str, Any]:
+        """Build the crypto data dictionary from a Gemini ticker and the trade store"""
+        return {
+            "symbol": symbol,
+            "last_price": float(ticker_data["last"]),
+            "bid": float(ticker_data["bid"]),
+            "ask": float(ticker_data["ask"]),
+            "volume": float(ticker_data["volume"]["USD"]),
+            "avg_price": self.trade_store.average_price(symbol, 100),
+            "vwap": self.trade_store.vwap(symbol),
+            "cumulative_vwap": self.trade_store.cumulative_vwap(symbol),
+            "timestamp": datetime.fromtimestamp(
+                float(ticker_data["volume"]["timestamp"]) / 1000
+            ),
+            "recent_trades": self.trade_store.recent_records(symbol, 10),
+            "stale": stale,
+        }
+
+    def get_crypto_candles(
+        self, symbol: str = "btcusd", time_frame: str = "1day"
+    ) -> Optional[pd.DataFrame]:
+        """
+        Fetch historical cryptocurrency candles from Gemini API
+
+        Args:
+            symbol: Cryptocurrency symbol (e.g., 'btcusd', 'ethusd')
+            time_frame: Gemini candle time frame (1m, 5m, 15m, 30m, 1hr, 6hr, 1day)
+
+        Returns:
+            DataFrame of OHLCV candles indexed by open time in UTC
+        """
+        try:
+            rows = self.gemini_breaker.call(
+                self.provider.get_json, f"/v2/candles/{symbol}/{time_frame}"
+            )
+            return self._candles_result(symbol, time_frame, rows)
         except Exception as e:
-            print(f"Error fetching crypto data for {symbol}: {str(e)}")
+            return self._candles_fallback(symbol, time_frame, e)
+
+    def _candles_result(self, symbol: str, time_frame: str, rows: List[List[Any]]) -> pd.DataFrame:
+        candles = candles_to_frame(rows)
+        self._last_candles[(symbol.lower(), time_frame)] = candles
+        return candles
+
+    def _candles_fallback(
+        self, symbol: str, time_frame: str, error: Exception
+    ) -> Optional[pd.DataFrame]:
+        """The last fetched candles, flagged as stale"""
+        candles = self._last_candles.get((symbol.lower(), time_frame))
+        if candles is None:
+            print(f"Error fetching crypto candles for {symbol}: {str(error)}")
             return None
+        print(f"Serving stale crypto candles for {symbol}: {str(error)}")
+        candles = candles.copy()
+        candles.attrs["stale"] = True
+        return candles
 
     def get_combined_data(
-        self, stock_symbol: str, crypto_symbol: str
+        self,
+        stock_symbol: str,
+        crypto_symbol: str,
+        period: str = "6mo",
+        interval: str = "1d",
     ) -> Dict[str, Any]:
         """
         Fetch both stock and crypto data for comparison
 
+        The stock bars, crypto candles and crypto ticker are fetched
+        concurrently. The candles are then joined onto the stock bars as of
+        each bar's close, giving one frame on the stock's index.
+
         Args:
             stock_symbol: Stock ticker symbol
             crypto_symbol: Cryptocurrency symbol
+            period: Time period for the stock data
+            interval: Stock data interval
 
         Returns:
-            Dictionary containing both stock and crypto data
+            Dictionary containing the stock data, the current crypto data,
+            the crypto candles and the aligned frame
         """
-        stock_data = self.get_stock_data(stock_symbol)
-        crypto_data = self.get_crypto_data(crypto_symbol)
+        time_frame = candle_timeframe(interval)
 
+        # The crypto ticker submits its own requests to the executor, so it runs here
+        stock_future = self.http_executor.submit(
+            self.get_stock_data, stock_symbol, period, interval
+        )
+        candles_future = self.http_executor.submit(
+            self.get_crypto_candles, crypto_symbol, time_frame
+        )
+        crypto_data = self.get_crypto_data(crypto_symbol)
+        stock_data = stock_future.result()
+        crypto_candles = candles_future.result()
 
-    
+        return {
+            "stock_data": stock_data,
+            "crypto_data": crypto_data,
+            "crypto_candles": crypto_candles,
+            "aligned": self.align_combined(stock_data, crypto_candles, crypto_symbol, interval, time_frame),
+        }
 
-        return {"stock_data": stock_data, "crypto_data": crypto_data}
+    @staticmethod
+    def align_combined(
+        stock_data: Optional[pd.DataFrame],
+        crypto_candles: Optional[pd.DataFrame],
+        crypto_symbol: str,
+        interval: str,
+        time_frame: str,
+    ) -> Optional[pd.DataFrame]:
+        """Stock bars with the crypto candle columns joined as of each bar's close"""
+        if stock_data is None or crypto_candles is None or stock_data.empty:
+            return None
+        if isinstance(stock_data.index, pd.DatetimeIndex):
+            bars = stock_data
+        else:
+            bars = expand_index(stock_data)
+        aligned = align_asof(
+            bars, crypto_candles, interval, CANDLE_WIDTHS[time_frame], crypto_symbol.upper()
+        )
+        aligned.attrs["stale"] = bool(stock_data.attrs.get("stale") or crypto_candles.attrs.get("stale"))
+        return aligned
 
 
 # Example usage
@@ -137,5 +780,6 @@ if __name__ == "__main__":
 
     # Test combined data
     combined = collector.get_combined_data("TSLA", "btcusd")
-    if combined["stock_data"] is not None and combined["crypto_data"] is not None:
+    if combined["aligned"] is not None:
         print("\nCombined Data Retrieved Successfully")
+        print(combined["aligned"][["Close", "BTCUSD_Close"]].tail())
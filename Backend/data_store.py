@@ -0,0 +1,208 @@
+import json
+import os
+import re
+import tempfile
+import threading
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+
+class OHLCVStore:
+    """
+    Persistent on-disk store of OHLCV bars.
+
+    Bars are kept as one Parquet file per symbol, partitioned by interval:
+
+        <root_dir>/interval=1d/TSLA.parquet
+        <root_dir>/interval=1d/TSLA.json   (coverage metadata)
+
+    The metadata sidecar records how far back the stored bars are known to be
+    complete, so the collector can tell whether a request can be answered by
+    fetching only the bars after the last stored timestamp.
+    """
+
+    def __init__(self, root_dir: str = "data_store"):
+        self.root_dir = root_dir
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        os.makedirs(self.root_dir, exist_ok=True)
+
+    def _base_path(self, symbol: str, interval: str) -> str:
+        safe_symbol = re.sub(r"[^A-Za-z0-9._-]", "_", symbol.upper())
+        directory = os.path.join(self.root_dir, f"interval={interval}")
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, safe_symbol)
+
+    def _lock(self, symbol: str, interval: str) -> threading.Lock:
+        key = f"{interval}/{symbol.upper()}"
+        with self._locks_guard:
+            if key not in self._locks:
+                self._locks[key] = threading.Lock()
+            return self._locks[key]
+
+    def read(self, symbol: str, interval: str) -> Optional[pd.DataFrame]:
+        """
+        Read all stored bars for a symbol and interval
+
+        Args:
+            symbol: Stock ticker symbol
+            interval: Bar interval (1m, 5m, 1h, 1d, ...)
+
+        Returns:
+            DataFrame of stored bars, or None if nothing is stored
+        """
+        path = self._base_path(symbol, interval) + ".parquet"
+        with self._lock(symbol, interval):
+            if not os.path.exists(path):
+                return None
+            try:
+                return pd.read_parquet(path)
+            except Exception as e:
+                print(f"Error reading stored bars for {symbol} ({interval}): {str(e)}")
+                return None
+
+    def coverage_start(self, symbol: str, interval: str) -> Optional[pd.Timestamp]:
+        """
+        Earliest timestamp from which the stored bars are complete
+
+        Returns:
+            UTC timestamp, pd.Timestamp.min if the full history is stored,
+            or None if there is no coverage information
+        """
+        path = self._base_path(symbol, interval) + ".json"
+        with self._lock(symbol, interval):
+            if not os.path.exists(path):
+                return None
+            try:
+                with open(path, "r") as file:
+                    meta = json.load(file)
+            except Exception as e:
+                print(f"Error reading store metadata for {symbol} ({interval}): {str(e)}")
+                return None
+
+        coverage = meta.get("coverage_start")
+        if coverage is None:
+            return None
+        if coverage == "max":
+            return pd.Timestamp.min.tz_localize("UTC")
+        return pd.Timestamp(coverage)
+
+    def write(
+        self,
+        symbol: str,
+        interval: str,
+        df: pd.DataFrame,
+        coverage_start: Optional[pd.Timestamp] = None,
+    ) -> None:
+        """
+        Replace the stored bars for a symbol and interval
+
+        Args:
+            symbol: Stock ticker symbol
+            interval: Bar interval
+            df: Bars to store, indexed by timestamp
+            coverage_start: Earliest timestamp the bars are complete from
+                (pd.Timestamp.min for the full history)
+        """
+        base = self._base_path(symbol, interval)
+        with self._lock(symbol, interval):
+            self._replace(base + ".parquet", df.to_parquet)
+
+            if coverage_start is not None:
+                if coverage_start == pd.Timestamp.min.tz_localize("UTC"):
+                    coverage = "max"
+                else:
+                    coverage = pd.Timestamp(coverage_start).tz_convert("UTC").isoformat()
+
+                def write_meta(tmp_path: str) -> None:
+                    with open(tmp_path, "w") as file:
+                        json.dump({"coverage_start": coverage}, file)
+
+                self._replace(base + ".json", write_meta)
+
+    @staticmethod
+    def _replace(path: str, write) -> None:
+        """
+        Write a file through a uniquely named temporary file and rename it into place
+
+        Readers never see a partial file, and writers in other processes,
+        which the thread locks do not cover, never share a temporary file.
+        """
+        directory, name = os.path.split(path)
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=directory)
+        os.close(fd)
+        try:
+            write(tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def merge(self, stored: Optional[pd.DataFrame], new_bars: pd.DataFrame) -> pd.DataFrame:
+        """
+        Merge newly fetched bars into stored bars
+
+        Newer bars win on duplicate timestamps, since the last stored bar may
+        have been captured while still in progress.
+        """
+        if stored is None or stored.empty:
+            return new_bars.sort_index()
+        if new_bars is None or new_bars.empty:
+            return stored
+
+        new_bars = new_bars.reindex(columns=stored.columns.union(new_bars.columns, sort=False))
+        stored = stored.reindex(columns=new_bars.columns)
+        merged = pd.concat([stored, new_bars])
+        merged = merged[~merged.index.duplicated(keep="last")]
+        return merged.sort_index()
+
+    @staticmethod
+    def top_up_start(stored: pd.DataFrame) -> pd.Timestamp:
+        """
+        Timestamp to fetch newer bars from
+
+        The last stored bar may have been captured while still in progress,
+        so fetching starts one bar earlier; the bar before it is complete and
+        lets adjustment_changed compare old and new prices.
+        """
+        return stored.index[-2] if len(stored) > 1 else stored.index[-1]
+
+    @staticmethod
+    def adjustment_changed(stored: Optional[pd.DataFrame], new_bars: Optional[pd.DataFrame]) -> bool:
+        """
+        Whether newly fetched bars are adjusted differently from the stored ones
+
+        yfinance adjusts every earlier bar for each new split and dividend,
+        so after one the stored bars no longer join onto new bars and must be
+        fetched again. A change shows as a complete bar (any but the last
+        stored one) whose close differs, or as a split or dividend in the new
+        bars that the stored bars do not have.
+        """
+        if stored is None or stored.empty or new_bars is None or new_bars.empty:
+            return False
+
+        for column in ("Dividends", "Stock Splits"):
+            if column not in new_bars:
+                continue
+            actions = new_bars[column].fillna(0)
+            known = stored[column].reindex(new_bars.index).fillna(0) if column in stored else 0
+            if ((actions != 0) & (actions != known)).any():
+                return True
+
+        overlap = stored.index[:-1].intersection(new_bars.index)
+        if overlap.empty:
+            return False
+        old_close = stored.loc[overlap, "Close"].to_numpy(dtype=float)
+        new_close = new_bars.loc[overlap, "Close"].to_numpy(dtype=float)
+        return not np.allclose(old_close, new_close, rtol=1e-6, atol=0.0, equal_nan=True)
+
+    def clear(self, symbol: str, interval: str) -> None:
+        """Remove stored bars for a symbol and interval"""
+        base = self._base_path(symbol, interval)
+        with self._lock(symbol, interval):
+            for path in (base + ".parquet", base + ".json"):
+                if os.path.exists(path):
+                    os.remove(path)
@@ -145,6 +145,24 @@ class EmailReportService:
                     <p>Sharpe Ratio: {{ risk.sharpe_ratio | round(2) }}</p>
                 </div>
 
+                {% if risk_report %}
+                <div class="metric">
+                    <h4>Value at Risk</h4>
+                    <table>
+                        <tr><th>Method</th><th>Confidence</th><th>Horizon (bars)</th><th>VaR</th><th>CVaR</th></tr>
+                    {% for row in risk_report %}
+                        <tr>
+                            <td>{{ row.method | replace("_", " ") | title }}</td>
+                            <td>{{ (row.confidence * 100) | round(1) }}%</td>
+                            <td>{{ row.horizon }}</td>
+                            <td>{% if row.var is not none %}{{ (row.var * 100) | round(2) }}%{% else %}n/a{% endif %}</td>
+                            <td>{% if row.cvar is not none %}{{ (row.cvar * 100) | round(2) }}%{% else %}n/a{% endif %}</td>
+                        </tr>
+                    {% endfor %}
+                    </table>
+                </div>
+                {% endif %}
+
                 {% if alerts %}
                 <div class="metric alert">
                     <h4>⚠️ Important Alerts</h4>
@@ -190,9 +208,17 @@ class EmailReportService:
         }
 
     def create_market_summary(
-        self, data, insights: Dict[str, Any]
+        self, data, insights: Dict[str, Any], risk_report: Optional[List[Dict[str, Any]]] = None
     ) -> str:
-        """Create HTML market summary with enhanced charts"""
+        """
+        Create HTML market summary with enhanced charts
+
+        Args:
+            data: Dictionary with the "symbol" and its bar records as "data"
+            insights: FinancialAnalyzer insights
+            risk_report: Optional RiskEngine report rows (risk_engine.to_records)
+                shown as a VaR/CVaR table
+        """
         try:
             df = pd.DataFrame(data["data"])
             print("############################# start")
@@ -358,6 +384,7 @@ class EmailReportService:
                 stats=insights["statistics"],
                 signals=insights["signals"],
                 risk=insights["risk_metrics"],
+                risk_report=risk_report,
                 alerts=alerts,
                 price_chart=price_chart_html,
                 # rsi_chart=rsi_chart_html,
@@ -448,8 +475,7 @@ class EmailReportService:
         from main import collector, analyzer  # Import here to avoid circular import
 
         try:
-            data = collector.get_stock_data(symbol, period="1d")
-            insights = analyzer.generate_insights(symbol, period="1d")
+            data, insights = analyzer.analyze(collector.get_stock_data(symbol, period="1d"))
 
             html_content = self.create_market_summary(
                 {"symbol": symbol, "data": data}, insights
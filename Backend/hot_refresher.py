@@ -0,0 +1,265 @@
+import heapq
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from single_flight import SingleFlight
+
+# (symbol, period, interval)
+RefreshKey = Tuple[str, str, str]
+
+
+@dataclass
+class _RefreshEntry:
+    value: Any
+    fetched_at: float
+    expires_at: float
+
+
+class HotSymbolRefresher:
+    """
+    Stale-while-revalidate cache for the most requested symbols.
+
+    Every lookup is counted, with counts halved periodically so the hot set
+    follows recent traffic. A background thread reloads entries for the
+    hottest keys shortly before they expire, so they are always fresh. Any
+    other entry that has expired is still served immediately while a reload
+    runs in the background, as long as it is no older than max_stale. Only
+    a key that has never been loaded (or is too stale) is loaded in the
+    caller's thread. Reloads run on a bounded worker pool.
+
+    At most max_entries values are kept, least recently used first out, and
+    values too stale to be served are dropped once their key leaves the hot
+    set, so requests for ever new keys cannot grow the map without bound.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[..., Any],
+        ttl_for: Callable[[str], float],
+        hot_set_size: int = 20,
+        max_workers: int = 4,
+        refresh_ahead: float = 15.0,
+        max_stale: float = 3600.0,
+        check_interval: float = 5.0,
+        decay_interval: float = 300.0,
+        is_stale: Optional[Callable[[Any], bool]] = None,
+        max_entries: Optional[int] = None,
+    ):
+        """
+        Args:
+            loader: Called as loader(symbol, period, interval, refresh) and returns
+                the value, or None on failure. refresh is True for background
+                reloads, which must bypass any cache the loader reads from
+            ttl_for: Seconds a value of the given interval stays fresh
+            hot_set_size: Number of most requested keys refreshed ahead of expiry
+            max_workers: Size of the background refresh pool
+            refresh_ahead: Seconds before expiry at which hot keys are refreshed
+            max_stale: Seconds past expiry a value may still be served
+            check_interval: Seconds between scans of the hot set
+            decay_interval: Seconds between halvings of the request counts
+            is_stale: Whether a loaded value is already stale (e.g. a fallback
+                served while the upstream is down); such values expire at once
+            max_entries: Values kept in memory, defaults to four times hot_set_size
+        """
+        self.loader = loader
+        self.ttl_for = ttl_for
+        self.hot_set_size = hot_set_size
+        self.refresh_ahead = refresh_ahead
+        self.max_stale = max_stale
+        self.check_interval = check_interval
+        self.decay_interval = decay_interval
+        self.is_stale = is_stale
+        self.max_entries = max_entries if max_entries is not None else 4 * hot_set_size
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="refresh")
+        self.single_flight = SingleFlight()
+
+        self._entries: "OrderedDict[RefreshKey, _RefreshEntry]" = OrderedDict()
+        self._counts: Dict[RefreshKey, float] = {}
+        self._refreshing: set = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_decay = time.monotonic()
+
+        self.fresh_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.evictions = 0
+
+    def start(self) -> None:
+        """Start refreshing the hot set on a background thread"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="hot-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the background thread and the refresh pool"""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout)
+            self._thread = None
+        self.executor.shutdown(wait=False)
+
+    def get(self, symbol: str, period: str = "6mo", interval: str = "1d") -> Any:
+        """
+        Value for a key, served from memory whenever one is available
+
+        Args:
+            symbol: Stock ticker symbol
+            period: Time period
+            interval: Data interval
+
+        Returns:
+            The loader's value, possibly stale by up to max_stale seconds
+        """
+        key = (symbol.upper(), period, interval)
+        now = time.time()
+        with self._lock:
+            self._counts[key] = self._counts.get(key, 0.0) + 1
+            entry = self._entries.get(key)
+            if entry is not None and now < entry.expires_at:
+                self._entries.move_to_end(key)
+                self.fresh_hits += 1
+                return entry.value
+            if entry is not None and now < entry.expires_at + self.max_stale:
+                self._entries.move_to_end(key)
+                self.stale_hits += 1
+                self._schedule_locked(key)
+                return entry.value
+            self.misses += 1
+
+        value, _ = self.single_flight.do(key, self._load, key, False)
+        return value
+
+    def invalidate(self, symbol: str) -> None:
+        """Drop every cached value for a symbol"""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == symbol.upper()]:
+                del self._entries[key]
+
+    def hot_keys(self) -> List[RefreshKey]:
+        """The most requested keys, most requested first"""
+        with self._lock:
+            return heapq.nlargest(self.hot_set_size, self._counts, key=self._counts.get)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit ratio, refresh counters and the current hot set"""
+        hot = self.hot_keys()
+        with self._lock:
+            lookups = self.fresh_hits + self.stale_hits + self.misses
+            return {
+                "fresh_hits": self.fresh_hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "hit_ratio": (self.fresh_hits + self.stale_hits) / lookups if lookups else 0.0,
+                "fresh_hit_ratio": self.fresh_hits / lookups if lookups else 0.0,
+                "refreshes": self.refreshes,
+                "refresh_errors": self.refresh_errors,
+                "refreshing": len(self._refreshing),
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "evictions": self.evictions,
+                "hot_set_size": self.hot_set_size,
+                "hot_set": ["/".join(key) for key in hot],
+            }
+
+    def _load(self, key: RefreshKey, refresh: bool) -> Any:
+        symbol, period, interval = key
+        value = self.loader(symbol, period, interval, refresh)
+        if value is not None:
+            now = time.time()
+            ttl = 0.0 if self.is_stale is not None and self.is_stale(value) else self.ttl_for(interval)
+            with self._lock:
+                self._entries[key] = _RefreshEntry(value, now, now + ttl)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def _schedule_locked(self, key: RefreshKey) -> None:
+        """Queue a background reload unless one is already running (lock held)"""
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+        try:
+            self.executor.submit(self._refresh, key)
+        except RuntimeError:
+            # Executor already shut down
+            self._refreshing.discard(key)
+
+    def _refresh(self, key: RefreshKey) -> None:
+        try:
+            value, _ = self.single_flight.do(key, self._load, key, True)
+            with self._lock:
+                if value is None:
+                    self.refresh_errors += 1
+                else:
+                    self.refreshes += 1
+        except Exception as e:
+            print(f"Error refreshing {'/'.join(key)}: {str(e)}")
+            with self._lock:
+                self.refresh_errors += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.check_interval):
+            self._decay()
+            hot = self.hot_keys()
+            deadline = time.time() + self.refresh_ahead
+            for key in hot:
+                with self._lock:
+                    entry = self._entries.get(key)
+                    # Keys never loaded are left to the foreground request
+                    if entry is not None and entry.expires_at <= deadline:
+                        self._schedule_locked(key)
+            self._prune(hot)
+
+    def _prune(self, hot: List[RefreshKey]) -> None:
+        """Drop values too stale to be served whose keys are not hot"""
+        now = time.time()
+        hot = set(hot)
+        with self._lock:
+            for key in [key for key, entry in self._entries.items()
+                        if key not in hot and now >= entry.expires_at + self.max_stale]:
+                del self._entries[key]
+
+    def _decay(self) -> None:
+        """Halve request counts so the hot set tracks recent traffic"""
+        if time.monotonic() - self._last_decay < self.decay_interval:
+            return
+        self._last_decay = time.monotonic()
+        with self._lock:
+            self._counts = {key: count / 2 for key, count in self._counts.items() if count >= 0.5}
+
+
+# Example usage
+if __name__ == "__main__":
+    from data_collection import FinancialDataCollector
+
+    collector = FinancialDataCollector()
+    def load(symbol, period, interval, refresh):
+        return collector.get_stock_data(symbol, period, interval, refresh=refresh)
+
+    refresher = HotSymbolRefresher(
+        load,
+        ttl_for=lambda interval: 5.0,
+        refresh_ahead=2.0,
+        check_interval=1.0,
+    )
+    refresher.start()
+    for _ in range(10):
+        data = refresher.get("TSLA")
+        print(None if data is None else data.index[-1], refresher.stats()["hit_ratio"])
+        time.sleep(1)
+    refresher.stop()
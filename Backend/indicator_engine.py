@@ -0,0 +1,393 @@
+import sys
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Columns calculate_technical_indicators adds, in the order it adds them
+TECHNICAL_COLUMNS = [
+    "RSI",
+    "MACD_12_26_9",
+    "MACDh_12_26_9",
+    "MACDs_12_26_9",
+    "BBL_5_2.0",
+    "BBM_5_2.0",
+    "BBU_5_2.0",
+    "BBB_5_2.0",
+    "BBP_5_2.0",
+    "ATR",
+    "Volume_MA",
+]
+
+# Columns FinancialDataCollector adds to every frame
+BASE_COLUMNS = ["SMA_20", "SMA_50", "BBU_20_2.0", "BBM_20_2.0", "BBL_20_2.0"]
+
+
+def pack(values: np.ndarray, valid: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Move each row's valid values to the front, keeping their order
+
+    Symbols have ragged histories (listings, halts, other calendars), so a
+    row of a symbols x time matrix has NaN gaps. Packed, every row starts
+    at column 0 and recursions and windows run over the symbol's own bars
+    exactly as they would for a single-symbol series.
+
+    Args:
+        values: symbols x time matrix
+        valid: Mask of the values that are present
+
+    Returns:
+        Tuple of (packed matrix with NaN after each row's values, column order
+        to pass to unpack)
+    """
+    order = np.argsort(~valid, axis=1, kind="stable")
+    packed = np.take_along_axis(values, order, axis=1)
+    packed[~np.take_along_axis(valid, order, axis=1)] = np.nan
+    return packed, order
+
+
+def unpack(packed: np.ndarray, order: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    """Put packed results back at their original columns, NaN where invalid"""
+    result = np.empty_like(packed)
+    np.put_along_axis(result, order, packed, axis=1)
+    result[~valid] = np.nan
+    return result
+
+
+def rolling_mean(x: np.ndarray, window: int) -> np.ndarray:
+    """Rolling mean along time, NaN until a full window is available"""
+    result = np.full_like(x, np.nan)
+    n = x.shape[1] - window + 1
+    if n > 0:
+        # One whole-matrix add per window offset; windows are short
+        total = x[:, :n].copy()
+        for k in range(1, window):
+            total += x[:, k:k + n]
+        result[:, window - 1:] = total / window
+    return result
+
+
+def rolling_std(x: np.ndarray, window: int, ddof: int) -> np.ndarray:
+    """Rolling standard deviation along time, NaN until a full window is available"""
+    result = np.full_like(x, np.nan)
+    n = x.shape[1] - window + 1
+    if n > 0:
+        # Two-pass: squared deviations from each window's own mean
+        mean = rolling_mean(x, window)[:, window - 1:]
+        squares = np.zeros_like(mean)
+        for k in range(window):
+            squares += (x[:, k:k + n] - mean) ** 2
+        result[:, window - 1:] = np.sqrt(squares / (window - ddof))
+    return result
+
+
+def decayed_sum(x: np.ndarray, decay: float, start: int = 0) -> np.ndarray:
+    """
+    y[t] = x[t] + decay * y[t - 1] along time from column start (y = 0 before it)
+
+    Computed a block of columns at a time as decay**k * cumsum(x * decay**-k)
+    plus the carried-in value, so the Python loop runs once per block instead
+    of once per bar. Blocks are short enough that decay**-k stays well within
+    float range. NaNs propagate forward as they would in the plain recursion.
+    """
+    result = np.full_like(x, np.nan)
+    block = max(1, int(32 / -np.log(decay))) if 0 < decay < 1 else 1
+    steps = np.arange(block)
+    growth, shrink = decay ** -steps, decay ** steps
+    carry = np.zeros(x.shape[0])
+    for begin in range(start, x.shape[1], block):
+        chunk = x[:, begin:begin + block]
+        n = chunk.shape[1]
+        values = shrink[:n] * np.cumsum(chunk * growth[:n], axis=1)
+        values += carry[:, None] * (decay * shrink[:n])
+        result[:, begin:begin + n] = values
+        carry = values[:, -1]
+    return result
+
+
+def rma(x: np.ndarray, length: int, start: int = 0) -> np.ndarray:
+    """
+    Wilder's moving average of packed rows starting at column start
+
+    Matches pandas ewm(alpha=1/length, min_periods=length, adjust=True),
+    which pandas_ta uses for RSI and ATR.
+    """
+    decay = 1 - 1 / length
+    result = decayed_sum(x, decay, start)
+    # Sum of the weights so far, i.e. decayed_sum of ones
+    seen = np.arange(1, x.shape[1] - start + 1)
+    result[:, start:] /= (1 - decay ** seen) / (1 - decay)
+    result[:, start:start + length - 1] = np.nan
+    return result
+
+
+def ema(x: np.ndarray, length: int, start: int = 0) -> np.ndarray:
+    """
+    Exponential moving average of packed rows starting at column start
+
+    Seeded with the simple average of the first length values and continued
+    with ewm(span=length, adjust=False), like pandas_ta's ema.
+    """
+    alpha = 2 / (length + 1)
+    seed = start + length - 1
+    if seed >= x.shape[1]:
+        return np.full_like(x, np.nan)
+    weighted = alpha * x
+    weighted[:, seed] = x[:, start:seed + 1].mean(axis=1)
+    return decayed_sum(weighted, 1 - alpha, seed)
+
+
+def non_zero_range(high: np.ndarray, low: np.ndarray) -> np.ndarray:
+    """high - low, nudged by epsilon in rows where it is ever zero (as pandas_ta does)"""
+    diff = high - low
+    return diff + np.any(diff == 0, axis=1, keepdims=True) * sys.float_info.epsilon
+
+
+def rsi(close: np.ndarray, length: int = 14) -> np.ndarray:
+    """RSI of packed rows: Wilder averages of gains and losses, from the first change"""
+    change = np.full_like(close, np.nan)
+    change[:, 1:] = np.diff(close, axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        gains = rma(np.where(change > 0, change, 0.0), length, start=1)
+        losses = rma(np.where(change < 0, -change, 0.0), length, start=1)
+        return 100 * gains / (gains + losses)
+
+
+def macd(
+    close: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9
+) -> Tuple[np.ndarray, np.ndarray]:
+    """MACD and signal lines of packed rows; the signal line starts where the MACD line does"""
+    line = ema(close, fast) - ema(close, slow)
+    return line, ema(line, signal, start=max(fast, slow) - 1)
+
+
+def technical_indicators(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    volume: np.ndarray,
+) -> Dict[str, np.ndarray]:
+    """
+    RSI, MACD, Bollinger Bands, ATR and volume MA for a symbols x time universe
+
+    Every input is a symbols x time matrix with NaN where a symbol has no
+    bar. Results match the pandas_ta defaults used by
+    FinancialAnalyzer.calculate_technical_indicators.
+
+    Returns:
+        Mapping of column name (see TECHNICAL_COLUMNS) to symbols x time matrix
+    """
+    valid = ~np.isnan(close)
+    close, order = pack(close, valid)
+    high, _ = pack(high, valid)
+    low, _ = pack(low, valid)
+    volume, _ = pack(volume.astype(float), valid)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        macd_line, signal = macd(close, 12, 26, 9)
+
+        # Bollinger Bands (5, 2) with population standard deviation
+        middle = rolling_mean(close, 5)
+        deviations = 2 * rolling_std(close, 5, ddof=0)
+        lower = middle - deviations
+        upper = middle + deviations
+        band_range = non_zero_range(upper, lower)
+
+        # ATR: Wilder average of the true range, which needs a previous close
+        previous_close = np.full_like(close, np.nan)
+        previous_close[:, 1:] = close[:, :-1]
+        true_range = np.fmax(
+            np.abs(non_zero_range(high, low)),
+            np.fmax(np.abs(high - previous_close), np.abs(previous_close - low)),
+        )
+        true_range[:, 0] = np.nan
+        atr = rma(true_range, 14, start=1)
+
+        packed = {
+            "RSI": rsi(close, 14),
+            "MACD_12_26_9": macd_line,
+            "MACDh_12_26_9": macd_line - signal,
+            "MACDs_12_26_9": signal,
+            "BBL_5_2.0": lower,
+            "BBM_5_2.0": middle,
+            "BBU_5_2.0": upper,
+            "BBB_5_2.0": 100 * band_range / middle,
+            "BBP_5_2.0": non_zero_range(close, lower) / band_range,
+            "ATR": atr,
+            "Volume_MA": rolling_mean(volume, 20),
+        }
+    return {name: unpack(values, order, valid) for name, values in packed.items()}
+
+
+def base_indicators(close: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    The SMA and Bollinger Band (20, 2) columns FinancialDataCollector adds,
+    for a symbols x time matrix of closes
+
+    Returns:
+        Mapping of column name (see BASE_COLUMNS) to symbols x time matrix
+    """
+    valid = ~np.isnan(close)
+    close, order = pack(close, valid)
+    sma_20 = rolling_mean(close, 20)
+    deviations = 2 * rolling_std(close, 20, ddof=1)
+    packed = {
+        "SMA_20": sma_20,
+        "SMA_50": rolling_mean(close, 50),
+        "BBU_20_2.0": sma_20 + deviations,
+        "BBM_20_2.0": sma_20,
+        "BBL_20_2.0": sma_20 - deviations,
+    }
+    return {name: unpack(values, order, valid) for name, values in packed.items()}
+
+
+def frames_to_matrices(
+    frames: Dict[str, pd.DataFrame], columns: List[str]
+) -> Tuple[Dict[str, np.ndarray], List[np.ndarray]]:
+    """
+    Stack columns of per-symbol frames into symbols x time matrices
+
+    Rows follow the order of frames; the time axis is the sorted union of
+    the frames' indexes.
+
+    Returns:
+        Tuple of (matrix per column, each frame's column positions on the time axis)
+    """
+    indexes = [df.index.as_unit("ns").asi8 if isinstance(df.index, pd.DatetimeIndex) else df.index.to_numpy()
+               for df in frames.values()]
+    times = np.unique(np.concatenate(indexes))
+    positions = [np.searchsorted(times, index) for index in indexes]
+
+    matrices = {column: np.full((len(frames), len(times)), np.nan) for column in columns}
+    for row, (df, columns_at) in enumerate(zip(frames.values(), positions)):
+        for column in columns:
+            matrices[column][row, columns_at] = df[column].to_numpy(dtype=float)
+    return matrices, positions
+
+
+def add_indicators(
+    frames: Dict[str, pd.DataFrame], include_base: bool = False
+) -> Dict[str, pd.DataFrame]:
+    """
+    Vectorized equivalent of calculate_technical_indicators for many symbols
+
+    Args:
+        frames: OHLCV frames by symbol, e.g. from get_stock_data_batch
+        include_base: Also (re)compute the collector's SMA and Bollinger (20) columns
+
+    Returns:
+        Frames by symbol with the indicator columns appended
+    """
+    frames = {symbol: df for symbol, df in frames.items() if df is not None and not df.empty}
+    if not frames:
+        return {}
+
+    matrices, positions = frames_to_matrices(frames, ["High", "Low", "Close", "Volume"])
+    columns = technical_indicators(
+        matrices["High"], matrices["Low"], matrices["Close"], matrices["Volume"]
+    )
+    if include_base:
+        columns = {**base_indicators(matrices["Close"]), **columns}
+
+    names = list(columns)
+    # symbols x time x indicators, so each symbol's block is one slice
+    stacked = np.stack([columns[name] for name in names], axis=2)
+
+    results = {}
+    for row, (symbol, df) in enumerate(frames.items()):
+        # Compact frames keep their float32 precision for the new columns
+        float_dtype = df["Close"].dtype if df["Close"].dtype == np.float32 else np.float64
+        new_columns = pd.DataFrame(
+            stacked[row, positions[row]].astype(float_dtype), index=df.index, columns=names
+        )
+        if df.columns.isin(names).any():
+            df = df.drop(columns=names, errors="ignore")
+        results[symbol] = pd.concat([df, new_columns], axis=1)
+    return results
+
+
+def synthetic_universe(
+    n_symbols: int = 600, n_bars: int = 1000, seed: Optional[int] = 0
+) -> Dict[str, pd.DataFrame]:
+    """Random-walk OHLCV frames with ragged start dates, for benchmarking"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=n_bars, tz="America/New_York")
+    frames = {}
+    for i in range(n_symbols):
+        start = int(rng.integers(0, n_bars // 4))
+        n = n_bars - start
+        close = 50 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+        spread = close * rng.uniform(0.001, 0.03, n)
+        frames[f"SYM{i:04d}"] = pd.DataFrame(
+            {
+                "Open": close + rng.normal(0, 0.5, n) * spread,
+                "High": close + spread,
+                "Low": close - spread,
+                "Close": close,
+                "Volume": rng.integers(100_000, 10_000_000, n),
+            },
+            index=dates[start:],
+        )
+    return frames
+
+
+# Benchmark against the per-symbol pandas_ta path
+if __name__ == "__main__":
+    import time
+
+    frames = synthetic_universe()
+    matrices, _ = frames_to_matrices(frames, ["High", "Low", "Close", "Volume"])
+    start = time.perf_counter()
+    technical_indicators(matrices["High"], matrices["Low"], matrices["Close"], matrices["Volume"])
+    matrix_seconds = time.perf_counter() - start
+    print(f"Indicator engine, matrices only: {len(frames)} symbols in {matrix_seconds:.3f}s")
+
+    start = time.perf_counter()
+    vectorized = add_indicators(frames)
+    engine_seconds = time.perf_counter() - start
+    print(f"Indicator engine, frames in and out: {len(frames)} symbols in {engine_seconds:.3f}s")
+
+    try:
+        start = time.perf_counter()
+        import pandas_ta  # noqa: F401
+        import_seconds = time.perf_counter() - start
+        from data_analysis import FinancialAnalyzer
+    except ImportError as e:
+        print(f"pandas_ta comparison skipped: {str(e)}")
+    else:
+        print(f"pandas_ta import: {import_seconds:.3f}s (not needed by the numpy backend)")
+        analyzer = FinancialAnalyzer(indicator_backend="pandas_ta")
+        start = time.perf_counter()
+        reference = {symbol: analyzer.calculate_technical_indicators(df) for symbol, df in frames.items()}
+        reference_seconds = time.perf_counter() - start
+        print(f"pandas_ta per symbol: {len(frames)} symbols in {reference_seconds:.3f}s")
+        print(
+            f"Speedup: {reference_seconds / matrix_seconds:.1f}x on matrices, "
+            f"{reference_seconds / engine_seconds:.1f}x frames in and out"
+        )
+
+        # One symbol at a time, as FinancialAnalyzer.analyze does
+        numpy_analyzer = FinancialAnalyzer(indicator_backend="numpy")
+        for bars in (126, 1000):
+            sample = [df.iloc[-bars:] for df in frames.values() if len(df) >= bars][:100]
+            timings = {}
+            for backend in (analyzer, numpy_analyzer):
+                start = time.perf_counter()
+                for df in sample:
+                    backend.calculate_technical_indicators(df)
+                timings[backend.indicator_backend] = (time.perf_counter() - start) / len(sample)
+            print(
+                f"calculate_technical_indicators, {bars} bars: "
+                f"pandas_ta {timings['pandas_ta'] * 1e3:.2f}ms, numpy {timings['numpy'] * 1e3:.2f}ms per symbol"
+            )
+
+        worst = {
+            column: max(
+                np.nanmax(np.abs(vectorized[symbol][column] - reference[symbol][column]), initial=0.0)
+                for symbol in frames
+            )
+            for column in TECHNICAL_COLUMNS
+        }
+        print("Largest absolute difference per column:")
+        for column, difference in worst.items():
+            print(f"  {column}: {difference:.2e}")
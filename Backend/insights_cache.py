@@ -0,0 +1,159 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+
+def fingerprint(df: Optional[pd.DataFrame], *extra: Any) -> Optional[str]:
+    """
+    Cheap content key for a frame of collected bars
+
+    Built from the symbol and interval recorded in df.attrs by
+    FinancialDataCollector, the columns, the last timestamp, the row count
+    and the last bar, so it changes whenever the upstream data does without
+    hashing the whole frame.
+
+    Args:
+        df: DataFrame from FinancialDataCollector.get_stock_data
+        extra: Anything else the cached result depends on
+
+    Returns:
+        Hex digest, or None if the frame is empty or not labelled with a
+        symbol and interval
+    """
+    if df is None or df.empty:
+        return None
+    symbol, interval = df.attrs.get("symbol"), df.attrs.get("interval")
+    if symbol is None or interval is None:
+        return None
+
+    parts = (
+        symbol,
+        interval,
+        str(df.index[-1]),
+        len(df),
+        tuple(df.columns),
+        repr(tuple(df.iloc[-1].tolist())),
+        tuple(str(dtype) for dtype in df.dtypes),
+        bool(df.attrs.get("stale", False)),
+    ) + extra
+    return hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+
+
+class InsightsCache:
+    """
+    Analysis results keyed by input fingerprint, in memory with an optional disk tier
+
+    The memory tier is an LRU of max_entries results. With a directory, each
+    result is also pickled there so it survives restarts; disk hits are
+    promoted back into memory.
+    """
+
+    def __init__(self, max_entries: int = 256, directory: Optional[str] = None):
+        """
+        Args:
+            max_entries: Results kept in memory
+            directory: Directory for the disk tier, None to keep results in memory only
+        """
+        self.max_entries = max_entries
+        self.directory = directory
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Cached result for a fingerprint, or None on a miss"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        value = self._read(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, value)
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        """Cache a result in memory and, if configured, on disk"""
+        with self._lock:
+            self._remember(key, value)
+        self._write(key, value)
+
+    def clear(self) -> None:
+        """Drop every cached result from memory and disk"""
+        with self._lock:
+            self._entries.clear()
+        if self.directory:
+            for name in os.listdir(self.directory):
+                if name.endswith(".pkl"):
+                    os.remove(os.path.join(self.directory, name))
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and memory usage"""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "disk": self.directory,
+            }
+
+    def _remember(self, key: str, value: Any) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def _read(self, key: str) -> Optional[Any]:
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error reading cached insights {key}: {str(e)}")
+            return None
+
+    def _write(self, key: str, value: Any) -> None:
+        if not self.directory:
+            return
+        # Write then rename so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+        except Exception as e:
+            print(f"Error writing cached insights {key}: {str(e)}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+# Process-wide cache shared by every FinancialAnalyzer by default
+shared_insights_cache = InsightsCache(
+    max_entries=int(os.getenv("INSIGHTS_CACHE_SIZE", "256")),
+    directory=os.getenv("INSIGHTS_CACHE_DIR") or None,
+)
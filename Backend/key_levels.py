@@ -0,0 +1,150 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def swing_pivots(high: np.ndarray, low: np.ndarray, order: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Swing highs and lows: bars that are the extreme of the 2 * order + 1 bars centred on them
+
+    Args:
+        high: Bar highs
+        low: Bar lows
+        order: Bars on each side a pivot must dominate
+
+    Returns:
+        Tuple of (swing high bar indices, swing low bar indices)
+    """
+    width = 2 * order + 1
+    if len(high) < width:
+        return np.empty(0, dtype=int), np.empty(0, dtype=int)
+    centre = np.arange(order, len(high) - order)
+    highs = centre[high[order:len(high) - order] == sliding_window_view(high, width).max(axis=1)]
+    lows = centre[low[order:len(low) - order] == sliding_window_view(low, width).min(axis=1)]
+    return highs, lows
+
+
+def _cluster(sorted_values: np.ndarray, width: float) -> np.ndarray:
+    """
+    Level id of each sorted value; a level spans at most width from its lowest value
+
+    Capping the span, rather than splitting on gaps, stops a dense run of
+    pivots from chaining into one wide level. Each level costs one binary
+    search, so the whole pass is O(n log n).
+    """
+    level_ids = np.empty(len(sorted_values), dtype=int)
+    start, level = 0, 0
+    while start < len(sorted_values):
+        end = np.searchsorted(sorted_values, sorted_values[start] + width, side="right")
+        level_ids[start:end] = level
+        start, level = end, level + 1
+    return level_ids
+
+
+def detect_levels(
+    df: pd.DataFrame,
+    orders: Sequence[int] = (3, 8, 21),
+    tolerance: Optional[float] = None,
+    max_levels: int = 5,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Support and resistance levels from swing pivots at several scales
+
+    Pivots are found at every order in orders; a bar that is a pivot at
+    several scales counts once per scale, so major swings weigh more.
+    Pivot prices are sorted and grouped into levels no wider than
+    tolerance, which clusters them in O(n log n). Each cluster
+    is a level at its volume-weighted price, scored by its weighted touches
+    times their relative volume. Levels below the last close are support,
+    the rest resistance.
+
+    Args:
+        df: DataFrame with High, Low, Close and optionally Volume
+        orders: Pivot half-widths in bars, e.g. short, medium and long swings
+        tolerance: Relative width of a level; defaults to the median bar
+            range as a fraction of the close
+        max_levels: Levels returned on each side
+
+    Returns:
+        Dictionary with "support" and "resistance" lists of levels, each a
+        dictionary with price, score, touches, volume and last_touch, best
+        score first
+    """
+    df = df.dropna(subset=["High", "Low", "Close"])
+    result: Dict[str, List[Dict[str, Any]]] = {"support": [], "resistance": []}
+    if df.empty:
+        return result
+
+    high = df["High"].to_numpy(dtype=float)
+    low = df["Low"].to_numpy(dtype=float)
+    close = df["Close"].to_numpy(dtype=float)
+    volume = np.nan_to_num(df["Volume"].to_numpy(dtype=float)) if "Volume" in df else np.ones(len(df))
+    if tolerance is None:
+        tolerance = float(np.median((high - low) / close))
+    tolerance = max(tolerance, 1e-6)
+
+    # Encode swing highs as 2 * bar and swing lows as 2 * bar + 1
+    codes = []
+    for order in orders:
+        highs, lows = swing_pivots(high, low, order)
+        codes.extend([2 * highs, 2 * lows + 1])
+    codes, weights = np.unique(np.concatenate(codes), return_counts=True)
+    if len(codes) == 0:
+        return result
+    bars, is_low = codes // 2, codes % 2 == 1
+    prices = np.where(is_low, low[bars], high[bars])
+
+    median_volume = np.median(volume[volume > 0]) if np.any(volume > 0) else 1.0
+    relative_volume = np.nan_to_num(volume[bars] / median_volume, nan=1.0)
+
+    order_by_price = np.argsort(prices, kind="stable")
+    prices, bars, weights, relative_volume = (
+        prices[order_by_price], bars[order_by_price], weights[order_by_price], relative_volume[order_by_price]
+    )
+    level_ids = _cluster(np.log(prices), tolerance)
+    n_levels = level_ids[-1] + 1
+
+    pivot_volume = volume[bars]
+    volume_totals = np.bincount(level_ids, weights=pivot_volume, minlength=n_levels)
+    price_means = np.bincount(level_ids, weights=prices, minlength=n_levels) / np.bincount(level_ids, minlength=n_levels)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        level_prices = np.where(
+            volume_totals > 0,
+            np.bincount(level_ids, weights=prices * pivot_volume, minlength=n_levels) / volume_totals,
+            price_means,
+        )
+    scores = np.bincount(level_ids, weights=weights * relative_volume, minlength=n_levels)
+    touches = np.bincount(level_ids, minlength=n_levels)
+    starts = np.flatnonzero(np.diff(level_ids, prepend=-1))
+    last_touch = np.maximum.reduceat(bars, starts)
+
+    last_close = close[-1]
+    for level in np.argsort(-scores, kind="stable"):
+        side = "support" if level_prices[level] < last_close else "resistance"
+        if len(result[side]) >= max_levels:
+            continue
+        result[side].append({
+            "price": float(level_prices[level]),
+            "score": float(scores[level]),
+            "touches": int(touches[level]),
+            "volume": float(volume_totals[level]),
+            "last_touch": str(df.index[last_touch[level]]),
+        })
+    return result
+
+
+# Example usage
+if __name__ == "__main__":
+    import time
+
+    from indicator_engine import synthetic_universe
+
+    for bars in (1_000, 50_000):
+        df = next(iter(synthetic_universe(n_symbols=1, n_bars=bars).values()))
+        start = time.perf_counter()
+        levels = detect_levels(df)
+        print(f"{len(df)} bars in {(time.perf_counter() - start) * 1e3:.1f}ms, last close {df['Close'].iloc[-1]:.2f}")
+        for side, found in levels.items():
+            print(f"  {side}: " + ", ".join(f"{level['price']:.2f} ({level['touches']} touches)" for level in found))
@@ -1,8 +1,11 @@
 import uuid
 import os
+import json
 import uvicorn
 from fastapi import FastAPI, HTTPException, Request
-from pydantic import BaseModel
+from fastapi.exception_handlers import request_validation_exception_handler
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, confloat, conint, conlist
 from typing import Dict, Any, List, Optional
 import asyncio
 from datetime import datetime
@@ -11,11 +14,18 @@ import math
 from convert_html_to_pdf import convert_html_to_pdf
 from fastapi.middleware.cors import CORSMiddleware
 
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from data_collection import FinancialDataCollector
+from async_data_collection import AsyncFinancialDataCollector
+from crypto_stream import CryptoStreamIngester
 from data_analysis import FinancialAnalyzer
 from conversation import FinancialChatbot
 from email_service import EmailReportService
+from hot_refresher import HotSymbolRefresher
+from rate_limiter import limiter_stats
+from circuit_breaker import breaker_stats
+from screener import ScreenCriteria, UniverseScreener, load_universe
+from risk_engine import METHODS as RISK_METHODS, RiskEngine, to_records
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -34,6 +44,7 @@ app.add_middleware(
 
 # Initialize components
 collector = FinancialDataCollector()
+async_collector = AsyncFinancialDataCollector(collector)
 analyzer = FinancialAnalyzer()
 chatbot = FinancialChatbot()
 
@@ -41,6 +52,40 @@ chatbot = FinancialChatbot()
 email_service = EmailReportService()
 
 
+def load_analysis(symbol: str, period: str, interval: str, refresh: bool = False):
+    """Load stock data and insights for the hot symbol refresher"""
+    # A refresh bypasses the cached bars but keeps them until the fetch succeeds
+    data = collector.get_stock_data(symbol, period, interval, refresh=refresh)
+    if data is None:
+        return None
+    return analyzer.analyze(data)
+
+
+# Serve analyses for the most requested symbols from memory, refreshed ahead of expiry
+refresher = HotSymbolRefresher(
+    load_analysis,
+    ttl_for=collector.cache.ttl_for,
+    hot_set_size=int(os.getenv("HOT_SYMBOLS_SIZE", "20")),
+    max_workers=int(os.getenv("HOT_REFRESH_WORKERS", "4")),
+    # Stale fallbacks are served but reloaded on the next request
+    is_stale=lambda analysis: bool(analysis[0].attrs.get("stale", False)),
+)
+
+# Universe screens run in worker processes started on first use
+screener = UniverseScreener(
+    collector,
+    max_workers=int(os.getenv("SCREENER_WORKERS", "0")) or None,
+    chunk_size=int(os.getenv("SCREENER_CHUNK_SIZE", "100")),
+)
+
+# VaR/CVaR reports, seeded so the same bars give the same Monte Carlo figures
+risk_engine = RiskEngine(
+    collector,
+    simulations=int(os.getenv("RISK_SIMULATIONS", "10000")),
+    max_bytes=int(os.getenv("RISK_MAX_MB", "64")) * 2 ** 20,
+)
+
+
 # Pydantic models for request/response
 class StockRequest(BaseModel):
     symbol: str
@@ -48,6 +93,12 @@ class StockRequest(BaseModel):
     interval: str = "1d"
 
 
+class MultiIntervalRequest(BaseModel):
+    symbol: str
+    intervals: List[str] = ["1h", "1d", "1wk"]
+    period: str = "6mo"
+
+
 class QueryRequest(BaseModel):
     query: str
     symbol: str
@@ -66,6 +117,34 @@ class EmailReportRequest(BaseModel):
     symbol: str
     period: str = "3mo"
     report_type: str = "summary"  # summary, detailed, custom
+    include_risk: bool = False  # Add a VaR/CVaR table
+
+
+class ScreenRequest(BaseModel):
+    symbols: Optional[List[str]] = None  # Defaults to the configured universe
+    signals: List[str] = []
+    trend: Dict[str, str] = {}
+    min_rsi: Optional[float] = None
+    max_rsi: Optional[float] = None
+    rank_by: str = "rsi"
+    descending: bool = False
+    period: str = "6mo"
+    interval: str = "1d"
+
+
+# Bounds of a risk request, so one call cannot outgrow the Monte Carlo budget
+MAX_RISK_HORIZON = 252  # A year of daily bars
+MAX_RISK_SIMULATIONS = 100_000
+
+
+class RiskRequest(BaseModel):
+    symbols: conlist(str, min_items=1)
+    period: str = "1y"
+    interval: str = "1d"
+    confidences: conlist(confloat(gt=0, lt=1), min_items=1, max_items=10) = [0.95, 0.99]
+    horizons: conlist(conint(ge=1, le=MAX_RISK_HORIZON), min_items=1, max_items=10) = [1, 10]  # In bars of the interval
+    methods: List[str] = list(RISK_METHODS)
+    simulations: Optional[conint(ge=1, le=MAX_RISK_SIMULATIONS)] = None  # Monte Carlo paths, defaults to RISK_SIMULATIONS
 
 
 class ScheduleReportRequest(BaseModel):
@@ -78,6 +157,25 @@ class ScheduleReportRequest(BaseModel):
 app = FastAPI()
 
 
+@app.on_event("startup")
+async def startup():
+    # Stream the configured crypto symbols instead of polling REST on each call
+    stream_symbols = [s for s in os.getenv("CRYPTO_STREAM_SYMBOLS", "").split(",") if s.strip()]
+    if stream_symbols:
+        collector.stream = CryptoStreamIngester(stream_symbols, provider=collector.provider)
+        collector.stream.start()
+    refresher.start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    refresher.stop()
+    screener.close()
+    if collector.stream is not None:
+        collector.stream.stop()
+    await async_collector.aclose()
+
+
 def sanitize_data(data):
     """Recursively replaces NaN, inf, -inf with valid values."""
     if isinstance(data, dict):
@@ -107,7 +205,7 @@ async def root(request: Request):
 async def get_stock_data(request: StockRequest):
     """Get stock data for a given symbol"""
     try:
-        data = collector.get_stock_data(
+        data = await async_collector.get_stock_data(
             symbol=request.symbol, period=request.period, interval=request.interval
         )
 
@@ -127,8 +225,53 @@ async def get_stock_data(request: StockRequest):
             "symbol": request.symbol,
             "timestamp": datetime.now().isoformat(),
             "data": data_dict,
+            # True when the upstream is down and the last known good data is served
+            "stale": bool(data.attrs.get("stale", False)),
+        }
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error fetching stock data: {str(e)}"
+        )
+
+
+@app.post(
+    "/api/stock/data/multi",
+    response_model=Dict[str, Any],
+    summary="Get stock data for several intervals",
+    description="Retrieves historical stock data for a symbol at several intervals, downloading each group of derivable intervals once.",
+)
+async def get_stock_data_multi(request: MultiIntervalRequest):
+    """Get stock data for a given symbol at several intervals"""
+    try:
+        frames = await async_collector.get_stock_data_multi(
+            request.symbol, request.intervals, request.period
+        )
+        if all(data is None for data in frames.values()):
+            raise HTTPException(
+                status_code=404, detail=f"No data found for symbol {request.symbol}"
+            )
+
+        data_by_interval = {}
+        for interval, data in frames.items():
+            if data is None:
+                data_by_interval[interval] = None
+                continue
+            data_dict = data.copy()
+            data_dict.index = data_dict.index.strftime("%Y-%m-%d %H:%M:%S")
+            # Replace NaN with None for JSON serialization
+            data_dict = data_dict.where(data_dict.notna(), None)
+            data_by_interval[interval] = data_dict.reset_index().to_dict(orient="records")
+
+        return {
+            "symbol": request.symbol,
+            "timestamp": datetime.now().isoformat(),
+            "data": data_by_interval,
+            "stale": any(bool(data.attrs.get("stale", False)) for data in frames.values() if data is not None),
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error fetching stock data: {str(e)}"
@@ -143,15 +286,16 @@ async def get_stock_data(request: StockRequest):
 async def get_stock_analysis(request: StockRequest):
     """Get comprehensive analysis for a stock"""
     try:
-        # Get data and generate insights
-        data = collector.get_stock_data(symbol=request.symbol, period=request.period)
+        # Get data and generate insights, served from memory when already loaded
+        analysis = await async_collector.run_blocking(
+            refresher.get, request.symbol, request.period, request.interval
+        )
 
-        if data is None:
+        if analysis is None:
             raise HTTPException(
                 status_code=404, detail=f"No data found for symbol {request.symbol}"
             )
-
-        insights = analyzer.generate_insights(request.symbol, request.period)
+        data, insights = analysis
 
         # Convert DataFrame to dict and handle NaN values
         data_dict = data.copy()
@@ -188,6 +332,7 @@ async def get_stock_analysis(request: StockRequest):
             "symbol": request.symbol,
             "data": data_dict,
             "insights": insights,
+            "stale": bool(data.attrs.get("stale", False)),
         }
 
         return response_data
@@ -211,7 +356,7 @@ async def get_stock_analysis(request: StockRequest):
 async def get_crypto_data(symbol: str = "btcusd"):
     """Get cryptocurrency data"""
     try:
-        data = collector.get_crypto_data(symbol)
+        data = await async_collector.get_crypto_data(symbol)
 
         if data is None:
             raise HTTPException(
@@ -225,6 +370,89 @@ async def get_crypto_data(symbol: str = "btcusd"):
             status_code=500, detail=f"Error fetching crypto data: {str(e)}"
         )
 
+@app.post(
+    "/api/screener",
+    summary="Screen a universe of stocks",
+    description="Streams ranked matches of the signal and trend rules as newline-delimited JSON, one line per completed chunk.",
+)
+async def screen_stocks(request: ScreenRequest):
+    """Screen many stocks for trading signals and trends"""
+    symbols = request.symbols or load_universe()
+    criteria = ScreenCriteria(
+        signals=request.signals,
+        trend=request.trend,
+        min_rsi=request.min_rsi,
+        max_rsi=request.max_rsi,
+        rank_by=request.rank_by,
+        descending=request.descending,
+    )
+    results = screener.screen_iter(symbols, criteria, request.period, request.interval)
+    return StreamingResponse(
+        (json.dumps(result) + "\n" for result in results),
+        media_type="application/x-ndjson",
+    )
+
+
+@app.exception_handler(RequestValidationError)
+async def validation_error(request: Request, exc: RequestValidationError):
+    # Risk requests out of bounds are bad input, like the engine's own ValueErrors
+    if request.url.path == "/api/risk":
+        return JSONResponse(status_code=400, content={"detail": exc.errors()})
+    return await request_validation_exception_handler(request, exc)
+
+
+@app.post(
+    "/api/risk",
+    response_model=Dict[str, Any],
+    summary="Get Value at Risk",
+    description="Computes VaR and CVaR of many stocks at several confidence levels and horizons with historical, parametric and Monte Carlo methods.",
+)
+async def get_risk(request: RiskRequest):
+    """Get VaR and CVaR for a list of stocks"""
+    try:
+        report = await async_collector.run_blocking(
+            risk_engine.for_symbols,
+            request.symbols,
+            request.period,
+            request.interval,
+            confidences=request.confidences,
+            horizons=request.horizons,
+            methods=request.methods,
+            simulations=request.simulations,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error computing risk: {str(e)}")
+
+    if report.empty:
+        raise HTTPException(status_code=404, detail="No data found for the requested symbols")
+    return {"timestamp": datetime.now(), "risk": to_records(report)}
+
+
+@app.get(
+    "/api/stats",
+    response_model=Dict[str, Any],
+    summary="Get data layer statistics",
+    description="Reports cache hit ratios and coalesced upstream requests.",
+)
+async def get_stats():
+    """Get cache and request coalescing statistics"""
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "cache": collector.cache.stats(),
+        "single_flight": {
+            "threaded": collector.single_flight.stats(),
+            "async": async_collector.single_flight.stats(),
+        },
+        "crypto_stream": collector.stream.stats() if collector.stream is not None else None,
+        "hot_refresher": refresher.stats(),
+        "insights_cache": analyzer.insights_cache.stats(),
+        "rate_limits": limiter_stats(),
+        "circuit_breakers": breaker_stats(),
+    }
+
+
 @app.options("/api/query")
 async def preflight():
     return {"message": "CORS preflight request successful"}
@@ -241,8 +469,11 @@ async def process_query(request: QueryRequest):
         #     f"Received query: {request.query}, symbol: {request.symbol}, period: {request.period}"
         # )
 
-        response = chatbot.process_query(
-            query=request.query, symbol=request.symbol, period=request.period
+        response = await async_collector.run_blocking(
+            chatbot.process_query,
+            query=request.query,
+            symbol=request.symbol,
+            period=request.period,
         )
         return {
             "timestamp": datetime.now(),
@@ -287,12 +518,12 @@ async def send_email_report(request: EmailReportRequest):
     """Send email report for a stock"""
     try:
         # Get stock data and analysis
-        data = collector.get_stock_data(request.symbol, request.period)
+        data = await async_collector.get_stock_data(request.symbol, request.period)
         if data is None:
             raise HTTPException(status_code=404, detail=f"No data found for symbol {request.symbol}")
 
-        insights = analyzer.generate_insights(request.symbol, request.period)
-        if insights is None:
+        data, insights = await async_collector.run_blocking(analyzer.analyze, data)
+        if not insights:
             raise HTTPException(status_code=500, detail="Failed to generate insights")
         data_dict = {
             "data": data.to_dict(orient='records'),
@@ -300,15 +531,21 @@ async def send_email_report(request: EmailReportRequest):
             "timestamp": datetime.now().isoformat()
         }
 
+        risk_report = None
+        if request.include_risk:
+            report = await async_collector.run_blocking(risk_engine.for_frame, data, request.symbol)
+            risk_report = to_records(report)
+
         # Create report content
-        html_content = email_service.create_market_summary(data_dict, insights)
+        html_content = email_service.create_market_summary(data_dict, insights, risk_report)
         if html_content is None:
             raise HTTPException(status_code=500, detail="Failed to create report content")
         
        
         # Send email
         
-        success = email_service.send_report(
+        success = await async_collector.run_blocking(
+            email_service.send_report,
             recipient_email=request.email,
             subject=f"Market Analysis Report - {request.symbol}",
             html_content=html_content,
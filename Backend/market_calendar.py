@@ -0,0 +1,84 @@
+from typing import Optional
+
+import pandas as pd
+
+EXCHANGE_TZ = "America/New_York"
+MARKET_OPEN = pd.Timedelta(hours=9, minutes=30)
+MARKET_CLOSE = pd.Timedelta(hours=16)
+
+# Calendar length of the yfinance periods that are not counted in trading days
+PERIOD_OFFSETS = {
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5),
+    "10y": pd.DateOffset(years=10),
+}
+
+
+def period_start(period: str, now: Optional[pd.Timestamp] = None) -> pd.Timestamp:
+    """
+    Earliest UTC timestamp a yfinance period can reach back to
+
+    Trading-day periods ("1d", "5d") are padded with calendar days so that
+    weekends and holidays are always covered.
+    """
+    now = now if now is not None else pd.Timestamp.now(tz="UTC")
+    if period == "max":
+        return pd.Timestamp.min.tz_localize("UTC")
+    if period == "ytd":
+        return pd.Timestamp(year=now.year, month=1, day=1, tz="UTC")
+    if period.endswith("d"):
+        days = int(period[:-1])
+        return (now - pd.Timedelta(days=days * 2 + 4)).normalize()
+    if period in PERIOD_OFFSETS:
+        return (now - PERIOD_OFFSETS[period]).normalize()
+    raise ValueError(f"Unsupported period: {period}")
+
+
+def slice_period(df: pd.DataFrame, period: str) -> pd.DataFrame:
+    """Slice stored bars down to what yfinance would return for the period"""
+    if df.empty or period == "max":
+        return df
+    if period.endswith("d"):
+        # Trading-day periods cover the last N sessions
+        sessions = pd.Index(df.index.date).unique()
+        first_session = sessions[-int(period[:-1]):][0]
+        return df[df.index.date >= first_session]
+    start = period_start(period).tz_convert(df.index.tz or "UTC")
+    if df.index.tz is None:
+        start = start.tz_localize(None)
+    return df[df.index >= start]
+
+
+def is_intraday(interval: str) -> bool:
+    """Whether a yfinance interval is shorter than one session"""
+    return interval.endswith(("m", "h"))
+
+
+def is_market_open(now: Optional[pd.Timestamp] = None) -> bool:
+    """Whether the US equity market is in its regular session (holidays ignored)"""
+    local = _exchange_local(now)
+    if local.dayofweek >= 5:
+        return False
+    time_of_day = local - local.normalize()
+    return MARKET_OPEN <= time_of_day < MARKET_CLOSE
+
+
+def next_market_open(now: Optional[pd.Timestamp] = None) -> pd.Timestamp:
+    """Start of the next regular session after now (holidays ignored)"""
+    local = _exchange_local(now)
+    candidate = local.normalize() + MARKET_OPEN
+    if candidate <= local:
+        candidate += pd.Timedelta(days=1)
+    while candidate.dayofweek >= 5:
+        candidate += pd.Timedelta(days=1)
+    return candidate.tz_localize(EXCHANGE_TZ)
+
+
+def _exchange_local(now: Optional[pd.Timestamp]) -> pd.Timestamp:
+    """Naive exchange-local wall clock time, so session arithmetic ignores DST"""
+    now = now if now is not None else pd.Timestamp.now(tz="UTC")
+    return now.tz_convert(EXCHANGE_TZ).tz_localize(None)
@@ -0,0 +1,346 @@
+import asyncio
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+import pandas as pd
+import requests
+import yfinance as yf
+from requests.adapters import HTTPAdapter
+
+from rate_limiter import Backoff, ThrottledError, TokenBucket, get_limiter
+
+GEMINI_BASE_URL = "https://api.gemini.com"
+
+_http_sessions: Dict[int, requests.Session] = {}
+_http_lock = threading.Lock()
+
+
+class UpstreamEmptyError(Exception):
+    """Raised when an upstream answers without bars it is known to have"""
+
+
+def is_missing_data(error: Any) -> bool:
+    """
+    Whether a yfinance error, or the message it recorded, only says there
+    are no bars, as for an unknown or delisted symbol
+
+    yfinance reports some outages the same way, so callers decide with what
+    they already know about the symbol.
+    """
+    if type(error).__name__ in ("YFPricesMissingError", "YFTzMissingError"):
+        return True
+    message = str(error).lower()
+    return "delisted" in message or "no price data found" in message or "no data found" in message
+
+
+def get_http_session(pool_size: int = 20) -> requests.Session:
+    """
+    Shared keep-alive HTTP session for REST calls
+
+    Sessions are shared per pool size, so every provider reuses the same
+    pooled connections instead of opening a new TCP/TLS connection per call.
+    """
+    with _http_lock:
+        if pool_size not in _http_sessions:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _http_sessions[pool_size] = session
+        return _http_sessions[pool_size]
+
+
+class MarketDataProvider(ABC):
+    """
+    Upstream source of market data used by FinancialDataCollector.
+
+    Stock bars come in the shape yfinance returns them; exchange data is the
+    decoded JSON of a Gemini REST path such as "/v1/pubticker/btcusd".
+    """
+
+    @abstractmethod
+    def history(
+        self,
+        symbol: str,
+        interval: str = "1d",
+        period: Optional[str] = None,
+        start: Optional[pd.Timestamp] = None,
+    ) -> pd.DataFrame:
+        """OHLCV bars for one symbol, for a period or from a start timestamp"""
+
+    @abstractmethod
+    def download(
+        self,
+        symbols: List[str],
+        period: Optional[str] = None,
+        interval: str = "1d",
+        start: Optional[pd.Timestamp] = None,
+    ) -> Tuple[pd.DataFrame, Dict[str, str]]:
+        """
+        OHLCV bars for many symbols at once, for a period or from a start timestamp
+
+        Returns:
+            Tuple of (panel with (field, symbol) columns, per-symbol errors)
+        """
+
+    @abstractmethod
+    def get_json(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """GET a JSON document from the exchange REST API"""
+
+    async def aget_json(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """Async GET of a JSON document; runs get_json in a thread by default"""
+        return await asyncio.to_thread(self.get_json, path, params)
+
+    async def aclose(self) -> None:
+        """Release any async resources held by the provider"""
+
+
+class LiveMarketDataProvider(MarketDataProvider):
+    """
+    Live data from yfinance and the Gemini REST API.
+
+    Every upstream call first takes a token from that upstream's rate
+    limiter, queueing under bursts instead of getting throttled, and calls
+    that are throttled anyway are retried with jittered backoff.
+    """
+
+    def __init__(
+        self,
+        base_url: str = GEMINI_BASE_URL,
+        http_pool_size: int = 20,
+        http_timeout: Tuple[float, float] = (3.05, 10.0),
+        yfinance_limiter: Optional[TokenBucket] = None,
+        gemini_limiter: Optional[TokenBucket] = None,
+        backoff: Optional[Backoff] = None,
+    ):
+        """
+        Args:
+            base_url: Gemini REST API root
+            http_pool_size: Maximum pooled connections to the Gemini API
+            http_timeout: (connect, read) timeouts in seconds
+            yfinance_limiter: Rate limiter for yfinance, defaults to the shared one
+            gemini_limiter: Rate limiter for the Gemini API, defaults to the shared one
+            backoff: Retry policy for throttled calls
+        """
+        self.base_url = base_url
+        self.http_pool_size = http_pool_size
+        self.http_timeout = http_timeout
+        self.http_session = get_http_session(http_pool_size)
+        self.yfinance_limiter = yfinance_limiter or get_limiter("yfinance")
+        self.gemini_limiter = gemini_limiter or get_limiter("gemini")
+        self.backoff = backoff or Backoff()
+        self._async_client: Optional[httpx.AsyncClient] = None
+
+    def history(self, symbol, interval="1d", period=None, start=None):
+        return self.backoff.call(
+            self.yfinance_limiter, self._history, symbol, interval, period, start
+        )
+
+    def _history(self, symbol, interval, period, start):
+        ticker = yf.Ticker(symbol)
+        # Without raise_errors yfinance returns an empty frame on failures
+        if start is not None:
+            return ticker.history(start=start, interval=interval, raise_errors=True)
+        return ticker.history(period=period, interval=interval, raise_errors=True)
+
+    def download(self, symbols, period=None, interval="1d", start=None):
+        # yfinance requests each symbol separately, so charge one token per
+        # symbol. Batches larger than the burst are fine: the bucket goes into
+        # debt and the call waits until the whole batch has been paid for.
+        return self.backoff.call(
+            self.yfinance_limiter, self._download, symbols, period, interval, start, tokens=len(symbols)
+        )
+
+    def _download(self, symbols, period, interval, start):
+        window = {"start": start} if start is not None else {"period": period}
+        panel = yf.download(
+            symbols,
+            interval=interval,
+            **window,
+            group_by="column",
+            auto_adjust=True,
+            actions=True,
+            threads=True,
+            progress=False,
+        )
+        errors = dict(getattr(getattr(yf, "shared", None), "_ERRORS", {}) or {})
+        # yf.download records errors per symbol instead of raising them
+        if errors and all("rate limit" in str(error).lower() for error in errors.values()):
+            raise ThrottledError(f"yfinance rate limited {len(errors)} symbols")
+        if len(errors) >= len(symbols) and not all(is_missing_data(error) for error in errors.values()):
+            raise RuntimeError(f"yfinance download failed for every symbol: {next(iter(errors.values()))}")
+        return panel, errors
+
+    def get_json(self, path, params=None):
+        return self.backoff.call(self.gemini_limiter, self._get_json, path, params)
+
+    def _get_json(self, path, params):
+        response = self.http_session.get(
+            f"{self.base_url}{path}", params=params, timeout=self.http_timeout
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def aget_json(self, path, params=None):
+        return await self.backoff.acall(self.gemini_limiter, self._aget_json, path, params)
+
+    async def _aget_json(self, path, params):
+        # Created lazily so the client binds to the running event loop
+        if self._async_client is None or self._async_client.is_closed:
+            self._async_client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(self.http_timeout[1], connect=self.http_timeout[0]),
+                limits=httpx.Limits(
+                    max_connections=self.http_pool_size,
+                    max_keepalive_connections=self.http_pool_size,
+                ),
+            )
+        response = await self._async_client.get(path, params=params)
+        response.raise_for_status()
+        return response.json()
+
+    async def aclose(self):
+        if self._async_client is not None:
+            await self._async_client.aclose()
+
+
+def _recording_key(method: str, *args: Any) -> str:
+    payload = json.dumps([method, *args], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def _download_key(symbols: List[str], period: Optional[str], interval: str, start: Any) -> str:
+    # Period downloads keep the keys they were recorded under before start existed
+    if start is None:
+        return _recording_key("download", list(symbols), period, interval)
+    return _recording_key("download", list(symbols), period, interval, start)
+
+
+class RecordingMarketDataProvider(MarketDataProvider):
+    """
+    Wraps another provider and records every response to disk.
+
+    Recordings are keyed by the call and its arguments and can be served back
+    by ReplayMarketDataProvider.
+    """
+
+    def __init__(self, inner: MarketDataProvider, directory: str = "recordings"):
+        self.inner = inner
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str, extension: str) -> str:
+        return os.path.join(self.directory, f"{key}.{extension}")
+
+    def history(self, symbol, interval="1d", period=None, start=None):
+        df = self.inner.history(symbol, interval=interval, period=period, start=start)
+        df.to_pickle(self._path(_recording_key("history", symbol, interval, period, start), "pkl"))
+        return df
+
+    def download(self, symbols, period=None, interval="1d", start=None):
+        panel, errors = self.inner.download(symbols, period, interval, start)
+        pd.to_pickle(
+            (panel, errors),
+            self._path(_download_key(symbols, period, interval, start), "pkl"),
+        )
+        return panel, errors
+
+    def get_json(self, path, params=None):
+        data = self.inner.get_json(path, params)
+        with open(self._path(_recording_key("get_json", path, params), "json"), "w") as file:
+            json.dump(data, file)
+        return data
+
+    async def aget_json(self, path, params=None):
+        data = await self.inner.aget_json(path, params)
+        with open(self._path(_recording_key("get_json", path, params), "json"), "w") as file:
+            json.dump(data, file)
+        return data
+
+    async def aclose(self):
+        await self.inner.aclose()
+
+
+class ReplayMarketDataProvider(MarketDataProvider):
+    """
+    Serves responses captured by RecordingMarketDataProvider, fully offline.
+
+    An optional injected latency (plus seeded uniform jitter) is added to every
+    call so benchmarks can model upstream round-trips deterministically.
+    """
+
+    def __init__(
+        self,
+        directory: str = "recordings",
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        seed: int = 0,
+    ):
+        """
+        Args:
+            directory: Directory holding the recordings
+            latency: Seconds added to every call
+            jitter: Maximum extra seconds added on top of latency
+            seed: Seed for the jitter
+        """
+        self.directory = directory
+        self.latency = latency
+        self.jitter = jitter
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+
+    def _delay(self) -> float:
+        with self._random_lock:
+            return self.latency + self._random.uniform(0, self.jitter)
+
+    def _load(self, key: str, extension: str, description: str) -> Any:
+        path = os.path.join(self.directory, f"{key}.{extension}")
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No recording for {description}")
+        if extension == "json":
+            with open(path, "r") as file:
+                return json.load(file)
+        return pd.read_pickle(path)
+
+    def history(self, symbol, interval="1d", period=None, start=None):
+        time.sleep(self._delay())
+        key = _recording_key("history", symbol, interval, period, start)
+        return self._load(key, "pkl", f"history {symbol} {interval} {period or start}")
+
+    def download(self, symbols, period=None, interval="1d", start=None):
+        time.sleep(self._delay())
+        key = _download_key(symbols, period, interval, start)
+        return self._load(key, "pkl", f"download of {len(symbols)} symbols {period or start} {interval}")
+
+    def get_json(self, path, params=None):
+        time.sleep(self._delay())
+        return self._load(_recording_key("get_json", path, params), "json", path)
+
+    async def aget_json(self, path, params=None):
+        await asyncio.sleep(self._delay())
+        return self._load(_recording_key("get_json", path, params), "json", path)
+
+
+def provider_from_env() -> MarketDataProvider:
+    """
+    Build the provider selected by the MARKET_DATA_PROVIDER environment variable
+
+    "live" (default), "record" or "replay". Recordings live in
+    MARKET_DATA_RECORDINGS_DIR and replay latency is set in seconds with
+    MARKET_DATA_REPLAY_LATENCY.
+    """
+    mode = os.getenv("MARKET_DATA_PROVIDER", "live").lower()
+    directory = os.getenv("MARKET_DATA_RECORDINGS_DIR", "recordings")
+    if mode == "record":
+        return RecordingMarketDataProvider(LiveMarketDataProvider(), directory)
+    if mode == "replay":
+        latency = float(os.getenv("MARKET_DATA_REPLAY_LATENCY", "0"))
+        return ReplayMarketDataProvider(directory, latency=latency)
+    return LiveMarketDataProvider()
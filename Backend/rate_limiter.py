@@ -0,0 +1,348 @@
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Default (requests per second, burst) for each upstream
+DEFAULT_LIMITS = {
+    "yfinance": (2.0, 5.0),
+    "gemini": (2.0, 10.0),
+}
+
+
+class TokenBucket(ABC):
+    """
+    Token bucket that queues callers instead of rejecting them.
+
+    A caller takes its tokens straight away, letting the bucket go into
+    debt, and then sleeps until the debt it added has been paid back. Each
+    caller's wait therefore depends only on those ahead of it, so callers
+    are served in arrival order without a separate queue.
+
+    Subclasses provide _reserve, which updates the bucket state atomically,
+    and override _areserve when reserving can block.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum number of tokens, i.e. the allowed burst
+
+        Raises:
+            ValueError: If rate or capacity is not a positive number
+        """
+        if not 0 < rate < float("inf"):
+            raise ValueError(f"Token bucket rate must be a positive number of tokens per second, got {rate}")
+        if not 0 < capacity < float("inf"):
+            raise ValueError(f"Token bucket capacity must be a positive number of tokens, got {capacity}")
+        self.rate = rate
+        self.capacity = capacity
+        self._stats_lock = threading.Lock()
+        self.acquired = 0
+        self.waited = 0
+        self.total_wait = 0.0
+        self.timeouts = 0
+
+    @abstractmethod
+    def _reserve(self, tokens: float, timeout: Optional[float]) -> Optional[float]:
+        """Take tokens and return the seconds to wait, or None if over timeout"""
+
+    async def _areserve(self, tokens: float, timeout: Optional[float]) -> Optional[float]:
+        """_reserve for the event loop; only safe to call inline if it never blocks"""
+        return self._reserve(tokens, timeout)
+
+    def _take(self, tokens: float, state: Tuple[float, float], now: float, timeout: Optional[float]):
+        """Apply a reservation to (tokens, updated_at) and return (new state, wait)"""
+        available, updated_at = state
+        available = min(self.capacity, available + max(now - updated_at, 0.0) * self.rate)
+        wait = max(tokens - available, 0.0) / self.rate
+        if timeout is not None and wait > timeout:
+            return (available, now), None
+        return (available - tokens, now), wait
+
+    def _record(self, wait: Optional[float]) -> None:
+        with self._stats_lock:
+            if wait is None:
+                self.timeouts += 1
+                return
+            self.acquired += 1
+            if wait > 0:
+                self.waited += 1
+                self.total_wait += wait
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """
+        Block until tokens are available
+
+        Args:
+            tokens: Number of tokens to take
+            timeout: Longest acceptable wait in seconds, None to always wait
+
+        Returns:
+            True once the tokens are taken, False if the wait would exceed timeout
+        """
+        wait = self._reserve(tokens, timeout)
+        self._record(wait)
+        if wait is None:
+            return False
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    async def aacquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """Async equivalent of acquire that sleeps without blocking the event loop"""
+        wait = await self._areserve(tokens, timeout)
+        self._record(wait)
+        if wait is None:
+            return False
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Acquisition counters for this process"""
+        with self._stats_lock:
+            return {
+                "rate": self.rate,
+                "capacity": self.capacity,
+                "acquired": self.acquired,
+                "waited": self.waited,
+                "total_wait": self.total_wait,
+                "timeouts": self.timeouts,
+            }
+
+
+class ThreadTokenBucket(TokenBucket):
+    """Token bucket shared by the threads of one process"""
+
+    def __init__(self, rate: float, capacity: float):
+        super().__init__(rate, capacity)
+        self._lock = threading.Lock()
+        self._state = (capacity, time.monotonic())
+
+    def _reserve(self, tokens, timeout):
+        with self._lock:
+            self._state, wait = self._take(tokens, self._state, time.monotonic(), timeout)
+            return wait
+
+
+class FileTokenBucket(TokenBucket):
+    """
+    Token bucket shared by every process on the host through a small state
+    file guarded by an exclusive flock.
+
+    Used when the API runs several worker processes, which would otherwise
+    each be allowed the full rate.
+    """
+
+    def __init__(self, path: str, rate: float, capacity: float):
+        """
+        Args:
+            path: State file, created if missing
+            rate: Tokens added per second
+            capacity: Maximum number of tokens, i.e. the allowed burst
+        """
+        if fcntl is None:
+            raise RuntimeError("FileTokenBucket requires fcntl, which is not available on this platform")
+        super().__init__(rate, capacity)
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Serialise threads here; flock only excludes other processes' descriptions
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens, timeout):
+        with self._lock, open(self.path, "a+") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                handle.seek(0)
+                try:
+                    saved = json.loads(handle.read())
+                    state = (float(saved["tokens"]), float(saved["updated_at"]))
+                except (ValueError, KeyError, TypeError):
+                    state = (self.capacity, time.time())
+
+                # Wall clock, since monotonic clocks are not comparable across processes
+                state, wait = self._take(tokens, state, time.time(), timeout)
+
+                handle.seek(0)
+                handle.truncate()
+                handle.write(json.dumps({"tokens": state[0], "updated_at": state[1]}))
+                handle.flush()
+                return wait
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    async def _areserve(self, tokens, timeout):
+        # The flock waits for other processes, so take it off the event loop thread
+        return await asyncio.to_thread(self._reserve, tokens, timeout)
+
+
+class ThrottledError(Exception):
+    """Raised when an upstream reports rate limiting without an exception of its own"""
+
+
+def is_throttled(error: BaseException) -> bool:
+    """Whether an upstream error means the request was rate limited"""
+    if isinstance(error, ThrottledError):
+        return True
+    response = getattr(error, "response", None)
+    if getattr(response, "status_code", None) == 429:
+        return True
+    # yfinance raises YFRateLimitError ("Too Many Requests. Rate limited.")
+    return type(error).__name__ == "YFRateLimitError" or "too many requests" in str(error).lower()
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    """Seconds requested by a Retry-After header, if the error carries one"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+class Backoff:
+    """
+    Retry policy for throttled upstream calls.
+
+    Delays grow exponentially with full jitter, so callers that were
+    throttled together do not all retry together. A Retry-After header
+    takes precedence when present.
+    """
+
+    def __init__(self, max_retries: int = 5, base_delay: float = 0.5, max_delay: float = 30.0):
+        """
+        Args:
+            max_retries: Retries after the first attempt before giving up
+            base_delay: Upper bound of the first delay in seconds
+            max_delay: Upper bound of any delay in seconds
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self.retries = 0
+        self.exhausted = 0
+
+    def delay(self, attempt: int, error: BaseException) -> float:
+        """Seconds to sleep before retry number attempt (0-based)"""
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _should_retry(self, attempt: int, error: BaseException) -> bool:
+        if not is_throttled(error):
+            return False
+        with self._lock:
+            if attempt >= self.max_retries:
+                self.exhausted += 1
+                return False
+            self.retries += 1
+            return True
+
+    def call(self, limiter: TokenBucket, func: Callable[..., Any], *args, tokens: float = 1.0, **kwargs) -> Any:
+        """Call func through the limiter, retrying throttled attempts"""
+        attempt = 0
+        while True:
+            limiter.acquire(tokens)
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                if not self._should_retry(attempt, e):
+                    raise
+                time.sleep(self.delay(attempt, e))
+                attempt += 1
+
+    async def acall(self, limiter: TokenBucket, func: Callable[..., Any], *args, tokens: float = 1.0, **kwargs) -> Any:
+        """Async equivalent of call for coroutine functions"""
+        attempt = 0
+        while True:
+            await limiter.aacquire(tokens)
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                if not self._should_retry(attempt, e):
+                    raise
+                await asyncio.sleep(self.delay(attempt, e))
+                attempt += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Retry counters for this process"""
+        with self._lock:
+            return {"retries": self.retries, "exhausted": self.exhausted}
+
+
+_limiters: Dict[str, TokenBucket] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(upstream: str) -> TokenBucket:
+    """
+    Process-wide token bucket for an upstream, configured from the environment
+
+    RATE_LIMIT_<UPSTREAM> sets "rate/burst" (e.g. RATE_LIMIT_GEMINI=2/10).
+    RATE_LIMIT_BACKEND=file shares the bucket with other processes through
+    a state file in RATE_LIMIT_DIR; the default "thread" backend is local to
+    this process.
+
+    Raises:
+        ValueError: If RATE_LIMIT_<UPSTREAM> is malformed or not positive
+    """
+    with _limiters_lock:
+        if upstream not in _limiters:
+            rate, capacity = DEFAULT_LIMITS.get(upstream, (1.0, 1.0))
+            configured = os.getenv(f"RATE_LIMIT_{upstream.upper()}")
+            if configured:
+                rate_text, _, capacity_text = configured.partition("/")
+                try:
+                    rate = float(rate_text)
+                    capacity = float(capacity_text) if capacity_text else max(rate, 1.0)
+                except ValueError:
+                    raise ValueError(
+                        f"RATE_LIMIT_{upstream.upper()}={configured!r} is not of the form rate/burst"
+                    ) from None
+
+            backend = os.getenv("RATE_LIMIT_BACKEND", "thread").lower()
+            if backend == "file" and fcntl is not None:
+                directory = os.getenv("RATE_LIMIT_DIR", "rate_limits")
+                _limiters[upstream] = FileTokenBucket(
+                    os.path.join(directory, f"{upstream}.json"), rate, capacity
+                )
+            else:
+                if backend == "file":
+                    print("File rate limiter backend is unavailable, limiting per process")
+                _limiters[upstream] = ThreadTokenBucket(rate, capacity)
+        return _limiters[upstream]
+
+
+def limiter_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats of every limiter created in this process"""
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    return {upstream: limiter.stats() for upstream, limiter in limiters.items()}
+
+
+# Example usage
+if __name__ == "__main__":
+    bucket = ThreadTokenBucket(rate=5, capacity=2)
+    start = time.monotonic()
+    threads = [threading.Thread(target=bucket.acquire) for _ in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(f"12 calls at 5/s with a burst of 2 took {time.monotonic() - start:.2f}s")
+    print(bucket.stats())
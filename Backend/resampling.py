@@ -0,0 +1,167 @@
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+# Length of the yfinance intervals that can be derived from finer bars
+INTRADAY_MINUTES = {
+    "1m": 1,
+    "2m": 2,
+    "5m": 5,
+    "15m": 15,
+    "30m": 30,
+    "60m": 60,
+    "1h": 60,
+    "90m": 90,
+}
+CALENDAR_INTERVALS = ["1d", "1wk", "1mo", "3mo"]
+
+# How far back yfinance serves each intraday interval
+MAX_INTRADAY_LOOKBACK = {
+    "1m": pd.Timedelta(days=7),
+    "2m": pd.Timedelta(days=60),
+    "5m": pd.Timedelta(days=60),
+    "15m": pd.Timedelta(days=60),
+    "30m": pd.Timedelta(days=60),
+    "90m": pd.Timedelta(days=60),
+    "60m": pd.Timedelta(days=730),
+    "1h": pd.Timedelta(days=730),
+}
+
+AGGREGATIONS = {
+    "Open": "first",
+    "High": "max",
+    "Low": "min",
+    "Close": "last",
+    "Volume": "sum",
+    "Dividends": "sum",
+    "Stock Splits": "max",
+    "Capital Gains": "sum",
+}
+
+
+def can_resample(source_interval: str, target_interval: str, adjusted: bool = True) -> bool:
+    """
+    Whether bars of target_interval can be built from bars of source_interval
+
+    yfinance adjusts daily and longer bars for dividends and splits but not
+    intraday bars, so for adjusted targets (the collector's bars) calendar
+    intervals are only built from daily or longer bars; mixing the two
+    would shift prices around every dividend and split.
+
+    Args:
+        source_interval: Interval of the bars at hand
+        target_interval: Interval to build
+        adjusted: Whether the target must match yfinance's adjusted bars
+    """
+    if source_interval == target_interval:
+        return False
+    if source_interval in INTRADAY_MINUTES:
+        if target_interval in INTRADAY_MINUTES:
+            source, target = INTRADAY_MINUTES[source_interval], INTRADAY_MINUTES[target_interval]
+            return target > source and target % source == 0
+        return not adjusted and target_interval in CALENDAR_INTERVALS
+    if source_interval == "1d":
+        return target_interval in ("1wk", "1mo", "3mo")
+    if source_interval == "1mo":
+        return target_interval == "3mo"
+    return False
+
+
+def interval_sort_key(interval: str) -> float:
+    """Approximate bar length in minutes, for ordering intervals fine to coarse"""
+    if interval in INTRADAY_MINUTES:
+        return INTRADAY_MINUTES[interval]
+    return {"1d": 1440, "5d": 7200, "1wk": 10080, "1mo": 43200, "3mo": 129600}[interval]
+
+
+def resample_ohlcv(df: pd.DataFrame, target_interval: str) -> pd.DataFrame:
+    """
+    Aggregate OHLCV bars into coarser bars
+
+    Bins are computed in the exchange's own timezone (the timezone of the
+    index, as yfinance returns it). Intraday bins are anchored to the session
+    open, so 5m bars roll up into 1h bars starting at 9:30 for US equities just
+    like yfinance's own hourly bars. Daily bins are sessions, weekly bins start
+    on Monday and monthly bins on the first of the month.
+
+    Note that yfinance intraday bars are not dividend adjusted, so daily bars
+    derived from them match unadjusted daily bars (see can_resample).
+
+    Args:
+        df: Raw OHLCV bars indexed by timestamp
+        target_interval: Interval to build (15m, 30m, 1h, 1d, 1wk, 1mo, 3mo, ...)
+
+    Returns:
+        DataFrame of resampled bars labelled by bin start
+    """
+    if df.empty:
+        return df
+
+    tz = df.index.tz
+    local = df.index.tz_localize(None) if tz is not None else df.index
+    day = local.normalize()
+
+    if target_interval in INTRADAY_MINUTES:
+        width = pd.Timedelta(minutes=INTRADAY_MINUTES[target_interval])
+        time_of_day = local - day
+        # Anchor bins to the session open, the earliest bar time in the frame
+        session_open = time_of_day.min()
+        bins = day + session_open + ((time_of_day - session_open) // width) * width
+    elif target_interval == "1d":
+        bins = day
+    elif target_interval == "1wk":
+        bins = day - pd.to_timedelta(local.dayofweek, unit="D")
+    elif target_interval == "1mo":
+        bins = local.to_period("M").to_timestamp()
+    elif target_interval == "3mo":
+        bins = local.to_period("Q").to_timestamp()
+    else:
+        raise ValueError(f"Unsupported target interval: {target_interval}")
+
+    rules = {column: AGGREGATIONS.get(column, "last") for column in df.columns}
+    resampled = df.groupby(bins, sort=True).agg(rules)
+    if "Close" in resampled:
+        resampled = resampled.dropna(subset=["Close"])
+
+    index = pd.DatetimeIndex(resampled.index)
+    if tz is not None:
+        index = index.tz_localize(tz, ambiguous="NaT", nonexistent="shift_forward")
+    resampled.index = index.rename(df.index.name)
+    return resampled
+
+
+def plan_fetches(
+    intervals: List[str], lookback: Optional[pd.Timedelta] = None, adjusted: bool = True
+) -> Dict[str, List[str]]:
+    """
+    Group requested intervals by the single fetched interval they derive from
+
+    The finest interval yfinance can serve for the lookback is fetched; every
+    coarser interval that can be built from it is derived locally. Intervals
+    finer than yfinance allows for the lookback are fetched on their own.
+
+    Args:
+        intervals: Requested intervals
+        lookback: How far back the request reaches, None for unlimited
+        adjusted: Whether derived bars must match adjusted ones, as for can_resample
+
+    Returns:
+        Mapping of interval to fetch -> intervals derived from it (including itself)
+    """
+    plan: Dict[str, List[str]] = {}
+    complete = set()
+    for interval in sorted(set(intervals), key=interval_sort_key):
+        source = next(
+            (fetched for fetched in plan if fetched in complete and can_resample(fetched, interval, adjusted)),
+            None,
+        )
+        if source is not None:
+            plan[source].append(interval)
+            continue
+
+        plan[interval] = [interval]
+        # Intraday intervals only count as a source if they reach back far enough
+        limit = MAX_INTRADAY_LOOKBACK.get(interval)
+        if limit is None or (lookback is not None and lookback <= limit):
+            complete.add(interval)
+    return plan
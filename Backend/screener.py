@@ -0,0 +1,263 @@
+import math
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+import pandas as pd
+
+from data_analysis import FinancialAnalyzer
+from indicator_engine import add_indicators
+
+# Used when a screen does not name its symbols
+DEFAULT_UNIVERSE = ["AAPL", "MSFT", "GOOGL", "AMZN", "NVDA", "META", "TSLA", "NFLX", "AMD", "INTC"]
+
+
+@dataclass
+class ScreenCriteria:
+    """
+    What a symbol must show at its last bar to match a screen
+
+    signals are the messages of FinancialAnalyzer.generate_trading_signals
+    (e.g. "MACD bullish crossover") and trend the fields of
+    FinancialAnalyzer.analyze_trend (e.g. {"short_term": "bullish"}); all
+    of them must be present. Matches are ranked by rank_by, a key of the
+    match records.
+    """
+
+    signals: List[str] = field(default_factory=list)
+    trend: Dict[str, str] = field(default_factory=dict)
+    min_rsi: Optional[float] = None
+    max_rsi: Optional[float] = None
+    rank_by: str = "rsi"
+    descending: bool = False
+
+
+def load_universe(source: Optional[str] = None) -> List[str]:
+    """
+    Symbols to screen
+
+    Args:
+        source: Comma-separated tickers or the path of a file with one ticker
+            per line; defaults to the SCREENER_UNIVERSE environment variable
+
+    Returns:
+        Upper-case tickers, DEFAULT_UNIVERSE if nothing is configured
+    """
+    source = source if source is not None else os.getenv("SCREENER_UNIVERSE", "")
+    if source and os.path.isfile(source):
+        with open(source) as f:
+            source = f.read().replace("\n", ",")
+    symbols = [symbol.strip().upper() for symbol in source.split(",") if symbol.strip()]
+    return list(dict.fromkeys(symbols)) or list(DEFAULT_UNIVERSE)
+
+
+def _number(value: Any) -> Optional[float]:
+    """float for JSON, None for missing values"""
+    value = float(value)
+    return None if math.isnan(value) or math.isinf(value) else value
+
+
+def evaluate(symbol: str, df: pd.DataFrame, criteria: ScreenCriteria) -> Optional[Dict[str, Any]]:
+    """
+    Apply the analyzer's signal and trend rules to one symbol
+
+    Args:
+        symbol: Stock ticker symbol
+        df: Bars with the collector's and the technical indicator columns
+        criteria: What the symbol must show
+
+    Returns:
+        Match record, or None if the symbol does not match
+    """
+    if len(df) < 2:
+        return None
+
+    rsi = _number(df["RSI"].iloc[-1])
+    if criteria.min_rsi is not None and (rsi is None or rsi < criteria.min_rsi):
+        return None
+    if criteria.max_rsi is not None and (rsi is None or rsi > criteria.max_rsi):
+        return None
+
+    signals = FinancialAnalyzer.generate_trading_signals(df)
+    if not set(criteria.signals).issubset(signals):
+        return None
+    trend = FinancialAnalyzer.analyze_trend(df)
+    if any(trend.get(name) != value for name, value in criteria.trend.items()):
+        return None
+
+    return {
+        "symbol": symbol,
+        "timestamp": str(df.index[-1]),
+        "close": _number(df["Close"].iloc[-1]),
+        "rsi": rsi,
+        "macd_histogram": _number(df["MACDh_12_26_9"].iloc[-1]),
+        "change_1d": _number(FinancialAnalyzer.calculate_change(df["Close"], 1)),
+        "change_1w": _number(FinancialAnalyzer.calculate_change(df["Close"], 5)),
+        "signals": signals,
+        "trend": trend,
+    }
+
+
+def rank(matches: List[Dict[str, Any]], criteria: ScreenCriteria) -> List[Dict[str, Any]]:
+    """Sort matches by criteria.rank_by, missing values last"""
+    present = [match for match in matches if match.get(criteria.rank_by) is not None]
+    missing = [match for match in matches if match.get(criteria.rank_by) is None]
+    present.sort(key=lambda match: match[criteria.rank_by], reverse=criteria.descending)
+    return present + missing
+
+
+def screen_frames(frames: Dict[str, pd.DataFrame], criteria: ScreenCriteria) -> Dict[str, Any]:
+    """
+    Screen one chunk of already fetched symbols; runs in a worker process
+
+    The indicators are computed for all symbols of the chunk at once before
+    the rules are applied.
+
+    Returns:
+        Dictionary with ranked "matches", the number of symbols "screened"
+        and "errors" by symbol
+    """
+    matches, errors = [], {}
+    for symbol, df in add_indicators(frames).items():
+        try:
+            match = evaluate(symbol, df, criteria)
+        except Exception as e:
+            errors[symbol] = str(e)
+            continue
+        if match is not None:
+            matches.append(match)
+    return {"matches": rank(matches, criteria), "screened": len(frames), "errors": errors}
+
+
+class UniverseScreener:
+    """
+    Screens a universe of symbols over a process pool
+
+    The universe is split into chunks. Each chunk is fetched in this
+    process with one batched download, so the collector's rate limits,
+    circuit breakers, cache and store are shared by the whole screen, and
+    worker processes compute the indicators and apply the rules in
+    parallel. Chunks are submitted as soon as they are fetched and results
+    are yielded as soon as they complete.
+    """
+
+    def __init__(self, collector=None, max_workers: Optional[int] = None, chunk_size: int = 100):
+        """
+        Args:
+            collector: FinancialDataCollector, created on first use if not given
+            max_workers: Worker processes, defaults to the number of CPUs
+            chunk_size: Symbols per batched download and task
+        """
+        self._collector = collector
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def collector(self):
+        if self._collector is None:
+            from data_collection import FinancialDataCollector
+
+            self._collector = FinancialDataCollector()
+        return self._collector
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # Spawned workers do not inherit the server's threads and locks
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    def screen_iter(
+        self,
+        symbols: List[str],
+        criteria: ScreenCriteria,
+        period: str = "6mo",
+        interval: str = "1d",
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Screen symbols and yield each chunk's results as soon as it completes
+
+        Yields:
+            screen_frames results, plus "completed" and "chunks" counts
+        """
+        symbols = list(dict.fromkeys(symbol.upper() for symbol in symbols))
+        chunks = [symbols[i:i + self.chunk_size] for i in range(0, len(symbols), self.chunk_size)]
+        pool = self._get_pool()
+        # future -> (chunk symbols, download errors)
+        futures: Dict[Any, Any] = {}
+        completed = 0
+
+        def finish(future) -> Dict[str, Any]:
+            nonlocal completed
+            chunk, download_errors = futures.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"Error screening chunk: {str(e)}")
+                if isinstance(e, BrokenProcessPool):
+                    # A worker died; start a fresh pool for the next screen
+                    self._pool = None
+                result = {"matches": [], "screened": 0,
+                          "errors": {symbol: str(e) for symbol in chunk}}
+            completed += 1
+            return {**result, "errors": {**download_errors, **result["errors"]},
+                    "completed": completed, "chunks": len(chunks)}
+
+        try:
+            for chunk in chunks:
+                batch = self.collector.get_stock_data_batch(chunk, period, interval)
+                futures[pool.submit(screen_frames, batch["data"], criteria)] = (chunk, batch["errors"])
+                # Hand out what finished while this chunk was downloading
+                for future in [future for future in futures if future.done()]:
+                    yield finish(future)
+            while futures:
+                done, _ = wait(list(futures), return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield finish(future)
+        finally:
+            # The consumer may stop early, e.g. a disconnected client
+            for future in futures:
+                future.cancel()
+
+    def screen(
+        self,
+        symbols: List[str],
+        criteria: ScreenCriteria,
+        period: str = "6mo",
+        interval: str = "1d",
+    ) -> Dict[str, Any]:
+        """
+        Screen symbols and return every match ranked
+
+        Returns:
+            Dictionary with ranked "matches", the number of symbols "screened"
+            and "errors" by symbol
+        """
+        matches, errors, screened = [], {}, 0
+        for result in self.screen_iter(symbols, criteria, period, interval):
+            matches.extend(result["matches"])
+            errors.update(result["errors"])
+            screened += result["screened"]
+        return {"matches": rank(matches, criteria), "screened": screened, "errors": errors}
+
+    def close(self) -> None:
+        """Shut the worker processes down"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+# Example usage
+if __name__ == "__main__":
+    screener = UniverseScreener(max_workers=4, chunk_size=50)
+    criteria = ScreenCriteria(signals=["MACD bullish crossover"], max_rsi=30)
+
+    for partial in screener.screen_iter(load_universe(), criteria):
+        print(f"Chunk {partial['completed']}/{partial['chunks']}: "
+              f"{[match['symbol'] for match in partial['matches']]}")
+    screener.close()
@@ -0,0 +1,133 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it is
+    in flight wait for it and receive the same result (or exception).
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, func: Callable[..., Any], *args, **kwargs) -> Tuple[Any, bool]:
+        """
+        Run func once for all concurrent callers of key
+
+        Returns:
+            Tuple of (result, shared) where shared is True for callers that
+            received the result of another caller's execution
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = func(*args, **kwargs)
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> Dict[str, int]:
+        """Number of executions and of calls that were coalesced into them"""
+        with self._lock:
+            return {
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls),
+            }
+
+
+class _AsyncCall:
+    def __init__(self, task: "asyncio.Task"):
+        self.task = task
+        self.waiters = 0
+
+
+class AsyncSingleFlight:
+    """
+    asyncio counterpart of SingleFlight for coroutines on one event loop
+
+    The shared call runs as its own task that every caller awaits through
+    asyncio.shield, so cancelling any caller, the first one included, only
+    cancels that caller. The task is cancelled once no caller waits for it.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _AsyncCall] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(
+        self, key: Hashable, func: Callable[..., Awaitable[Any]], *args, **kwargs
+    ) -> Tuple[Any, bool]:
+        """
+        Await func once for all concurrent callers of key
+
+        Returns:
+            Tuple of (result, shared) as for SingleFlight.do
+        """
+        call = self._calls.get(key)
+        shared = call is not None
+        if shared:
+            self.coalesced += 1
+        else:
+            call = _AsyncCall(asyncio.ensure_future(func(*args, **kwargs)))
+            self._calls[key] = call
+            self.executions += 1
+            call.task.add_done_callback(lambda task: self._finish(key, call))
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task), shared
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+
+    def _finish(self, key: Hashable, call: _AsyncCall) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        # Mark the exception as retrieved when nobody else is waiting
+        if not call.task.cancelled():
+            call.task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        """Number of executions and of calls that were coalesced into them"""
+        return {
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls),
+        }
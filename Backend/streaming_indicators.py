@@ -0,0 +1,300 @@
+import math
+from collections import deque
+from typing import Any, Dict, Mapping, Optional
+
+import pandas as pd
+
+NAN = float("nan")
+
+
+class StreamingIndicator:
+    """
+    Base class for indicators updated one value at a time in O(1).
+
+    State is kept in plain attributes (numbers, deques and nested
+    indicators) so snapshot/restore can round-trip it through JSON.
+    """
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-serialisable copy of the indicator's state"""
+        state = {}
+        for name, value in self.__dict__.items():
+            if isinstance(value, StreamingIndicator):
+                state[name] = value.snapshot()
+            elif isinstance(value, deque):
+                state[name] = {"maxlen": value.maxlen, "items": list(value)}
+            else:
+                state[name] = value
+        return state
+
+    def restore(self, state: Dict[str, Any]) -> "StreamingIndicator":
+        """Load state produced by snapshot into this indicator"""
+        for name, value in state.items():
+            current = self.__dict__.get(name)
+            if isinstance(current, StreamingIndicator):
+                current.restore(value)
+            elif isinstance(current, deque):
+                setattr(self, name, deque(value["items"], maxlen=value["maxlen"]))
+            else:
+                setattr(self, name, value)
+        return self
+
+
+class RollingWindow(StreamingIndicator):
+    """
+    Fixed-length window with running mean and variance
+
+    The mean and sum of squared deviations are updated with Welford's
+    method, replacing the value that leaves the window in the same step, so
+    both stay accurate without re-summing the window.
+    """
+
+    def __init__(self, length: int, ddof: int = 1):
+        self.length = length
+        self.ddof = ddof
+        self.values = deque(maxlen=length)
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, value: float) -> None:
+        if len(self.values) < self.length:
+            self.values.append(value)
+            delta = value - self.mean
+            self.mean += delta / len(self.values)
+            self.m2 += delta * (value - self.mean)
+            return
+        oldest = self.values[0]
+        self.values.append(value)
+        previous_mean = self.mean
+        self.mean += (value - oldest) / self.length
+        self.m2 += (value - oldest) * (value - self.mean + oldest - previous_mean)
+
+    @property
+    def full(self) -> bool:
+        return len(self.values) == self.length
+
+    def average(self) -> float:
+        return self.mean if self.full else NAN
+
+    def std(self) -> float:
+        if not self.full or self.length <= self.ddof:
+            return NAN
+        # Rounding can leave a tiny negative M2 for a flat window
+        return math.sqrt(max(self.m2, 0.0) / (self.length - self.ddof))
+
+
+class StreamingEMA(StreamingIndicator):
+    """EMA seeded with the SMA of the first length values, as pandas_ta does"""
+
+    def __init__(self, length: int):
+        self.length = length
+        self.alpha = 2 / (length + 1)
+        self.count = 0
+        self.total = 0.0
+        self.value = NAN
+
+    def update(self, value: float) -> float:
+        self.count += 1
+        if self.count < self.length:
+            self.total += value
+        elif self.count == self.length:
+            self.value = (self.total + value) / self.length
+        else:
+            self.value = self.alpha * value + (1 - self.alpha) * self.value
+        return self.value
+
+
+class StreamingRMA(StreamingIndicator):
+    """
+    Wilder's moving average, matching pandas
+    ewm(alpha=1/length, min_periods=length, adjust=True) as used by pandas_ta
+    """
+
+    def __init__(self, length: int):
+        self.length = length
+        self.decay = 1 - 1 / length
+        self.count = 0
+        self.numerator = 0.0
+        self.denominator = 0.0
+
+    def update(self, value: float) -> float:
+        self.count += 1
+        self.numerator = value + self.decay * self.numerator
+        self.denominator = 1 + self.decay * self.denominator
+        return self.value
+
+    @property
+    def value(self) -> float:
+        return self.numerator / self.denominator if self.count >= self.length else NAN
+
+
+class StreamingRSI(StreamingIndicator):
+    def __init__(self, length: int = 14):
+        self.previous_close: Optional[float] = None
+        self.gains = StreamingRMA(length)
+        self.losses = StreamingRMA(length)
+
+    def update(self, close: float) -> float:
+        if self.previous_close is None:
+            self.previous_close = close
+            return NAN
+        change = close - self.previous_close
+        self.previous_close = close
+        gain = self.gains.update(max(change, 0.0))
+        loss = self.losses.update(max(-change, 0.0))
+        if math.isnan(gain) or gain + loss == 0:
+            return NAN
+        return 100 * gain / (gain + loss)
+
+
+class StreamingMACD(StreamingIndicator):
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast = StreamingEMA(fast)
+        self.slow = StreamingEMA(slow)
+        self.signal = StreamingEMA(signal)
+
+    def update(self, close: float) -> Dict[str, float]:
+        macd = self.fast.update(close) - self.slow.update(close)
+        # The signal line starts with the first MACD value
+        signal = self.signal.update(macd) if not math.isnan(macd) else NAN
+        return {"macd": macd, "histogram": macd - signal, "signal": signal}
+
+
+class StreamingBBands(StreamingIndicator):
+    def __init__(self, length: int = 5, std: float = 2.0, ddof: int = 0):
+        self.std = std
+        self.window = RollingWindow(length, ddof)
+
+    def update(self, close: float) -> Dict[str, float]:
+        self.window.update(close)
+        middle = self.window.average()
+        deviations = self.std * self.window.std()
+        lower = middle - deviations
+        upper = middle + deviations
+        band_range = upper - lower
+        return {
+            "lower": lower,
+            "middle": middle,
+            "upper": upper,
+            "bandwidth": 100 * band_range / middle if middle else NAN,
+            "percent": (close - lower) / band_range if band_range else NAN,
+        }
+
+
+class StreamingATR(StreamingIndicator):
+    def __init__(self, length: int = 14):
+        self.previous_close: Optional[float] = None
+        self.rma = StreamingRMA(length)
+
+    def update(self, high: float, low: float, close: float) -> float:
+        previous_close = self.previous_close
+        self.previous_close = close
+        if previous_close is None:
+            return NAN
+        true_range = max(high - low, abs(high - previous_close), abs(previous_close - low))
+        return self.rma.update(true_range)
+
+
+class IndicatorState(StreamingIndicator):
+    """
+    Every indicator column of an analyzed frame, updated per bar in O(1)
+
+    Produces the collector's SMA/Bollinger (20) columns and the columns of
+    FinancialAnalyzer.calculate_technical_indicators, matching the batch
+    values for the same bars (pandas_ta's epsilon nudge for zero ranges
+    aside).
+    """
+
+    def __init__(self):
+        self.sma_20 = RollingWindow(20, ddof=1)
+        self.sma_50 = RollingWindow(50, ddof=1)
+        self.rsi = StreamingRSI(14)
+        self.macd = StreamingMACD(12, 26, 9)
+        self.bbands = StreamingBBands(5, 2.0, ddof=0)
+        self.atr = StreamingATR(14)
+        self.volume_ma = RollingWindow(20)
+        self.bars = 0
+        self.last_timestamp: Optional[str] = None
+
+    def update(self, bar: Mapping[str, Any], timestamp: Any = None) -> Dict[str, float]:
+        """
+        Add one bar
+
+        Args:
+            bar: Mapping with High, Low, Close and Volume (e.g. a DataFrame row)
+            timestamp: Time of the bar, remembered so callers can skip bars already seen
+
+        Returns:
+            Indicator values for the bar, keyed by column name
+        """
+        high, low, close = float(bar["High"]), float(bar["Low"]), float(bar["Close"])
+        self.bars += 1
+        if timestamp is not None:
+            self.last_timestamp = str(pd.Timestamp(timestamp))
+
+        self.sma_20.update(close)
+        self.sma_50.update(close)
+        self.volume_ma.update(float(bar["Volume"]))
+        sma_20 = self.sma_20.average()
+        deviations = 2 * self.sma_20.std()
+        macd = self.macd.update(close)
+        bbands = self.bbands.update(close)
+
+        return {
+            "SMA_20": sma_20,
+            "SMA_50": self.sma_50.average(),
+            "BBU_20_2.0": sma_20 + deviations,
+            "BBM_20_2.0": sma_20,
+            "BBL_20_2.0": sma_20 - deviations,
+            "RSI": self.rsi.update(close),
+            "MACD_12_26_9": macd["macd"],
+            "MACDh_12_26_9": macd["histogram"],
+            "MACDs_12_26_9": macd["signal"],
+            "BBL_5_2.0": bbands["lower"],
+            "BBM_5_2.0": bbands["middle"],
+            "BBU_5_2.0": bbands["upper"],
+            "BBB_5_2.0": bbands["bandwidth"],
+            "BBP_5_2.0": bbands["percent"],
+            "ATR": self.atr.update(high, low, close),
+            "Volume_MA": self.volume_ma.average(),
+        }
+
+    def seed(self, df: pd.DataFrame) -> Optional[Dict[str, float]]:
+        """
+        Feed historical bars, oldest first
+
+        Returns:
+            Indicator values for the last bar, None if df is empty
+        """
+        values = None
+        columns = df[["High", "Low", "Close", "Volume"]].to_numpy(dtype=float)
+        for high, low, close, volume in columns:
+            values = self.update({"High": high, "Low": low, "Close": close, "Volume": volume})
+        if values is not None:
+            self.last_timestamp = str(pd.Timestamp(df.index[-1]))
+        return values
+
+
+# Example usage
+if __name__ == "__main__":
+    import time
+
+    from indicator_engine import add_indicators, synthetic_universe
+
+    frames = synthetic_universe(n_symbols=1, n_bars=2000)
+    df = next(iter(frames.values()))
+    history, new_bars = df.iloc[:-500], df.iloc[-500:]
+
+    state = IndicatorState()
+    state.seed(history)
+    restored = IndicatorState().restore(state.snapshot())
+
+    start = time.perf_counter()
+    rows = [restored.update(bar, timestamp) for timestamp, bar in new_bars.iterrows()]
+    per_bar = (time.perf_counter() - start) / len(rows)
+    print(f"Streaming update: {per_bar * 1e6:.1f}us per bar")
+
+    batch = add_indicators({"SYM": df}, include_base=True)["SYM"].iloc[-500:]
+    streamed = pd.DataFrame(rows, index=new_bars.index)
+    print("Largest absolute difference from the batch engine:")
+    print((streamed - batch[streamed.columns]).abs().max())
@@ -0,0 +1,119 @@
+import os
+import sys
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# The Backend modules import each other as top-level modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import yfinance  # noqa: F401
+except ImportError:
+    # On sys.path rather than in sys.modules so spawned worker processes find it too
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "stubs"))
+
+import circuit_breaker  # noqa: E402
+from data_cache import DataFrameCache  # noqa: E402
+from market_calendar import slice_period  # noqa: E402
+from market_data_providers import MarketDataProvider  # noqa: E402
+
+MISSING = "possibly delisted; no price data found"
+
+
+class FakeClock:
+    """Stands in for the time module; sleeping advances the clock instead of blocking"""
+
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def daily_bars(n: int = 300, start_price: float = 100.0, seed: int = 0, end=None) -> pd.DataFrame:
+    """Business-day OHLCV bars in yfinance's shape, ending today"""
+    rng = np.random.default_rng(seed)
+    end = end if end is not None else pd.Timestamp.now(tz="America/New_York").normalize()
+    index = pd.bdate_range(end=end, periods=n, tz="America/New_York")
+    close = start_price * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    return pd.DataFrame(
+        {
+            "Open": close * (1 + rng.normal(0, 0.002, n)),
+            "High": close * 1.01,
+            "Low": close * 0.99,
+            "Close": close,
+            "Volume": rng.integers(1_000, 100_000, n).astype(float),
+            "Dividends": 0.0,
+            "Stock Splits": 0.0,
+        },
+        index=index,
+    )
+
+
+class FakeProvider(MarketDataProvider):
+    """
+    Serves bars from memory the way yfinance would and records every call
+
+    Symbols not in bars fail as unknown symbols do.
+    """
+
+    def __init__(self, bars: Optional[Dict[str, pd.DataFrame]] = None, json_data: Optional[Dict] = None):
+        self.bars = dict(bars or {})
+        self.json_data = dict(json_data or {})
+        self.calls: List[tuple] = []
+
+    def _window(self, symbol, period, start) -> pd.DataFrame:
+        df = self.bars[symbol]
+        return (df[df.index >= start] if start is not None else slice_period(df, period)).copy()
+
+    def history(self, symbol, interval="1d", period=None, start=None):
+        self.calls.append(("history", symbol, interval, period, start))
+        if symbol not in self.bars:
+            raise Exception(f"${symbol}: {MISSING}")
+        return self._window(symbol, period, start)
+
+    def download(self, symbols, period=None, interval="1d", start=None):
+        self.calls.append(("download", tuple(symbols), interval, period, start))
+        frames = {symbol: self._window(symbol, period, start) for symbol in symbols if symbol in self.bars}
+        errors = {symbol: MISSING for symbol in symbols if symbol not in self.bars}
+        if not frames:
+            return pd.DataFrame(), errors
+        panel = pd.concat(frames, axis=1).swaplevel(axis=1).sort_index(axis=1)
+        return panel, errors
+
+    def get_json(self, path, params=None):
+        self.calls.append(("get_json", path, params))
+        if path not in self.json_data:
+            raise FileNotFoundError(path)
+        return self.json_data[path]
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def provider():
+    return FakeProvider()
+
+
+@pytest.fixture
+def collector(tmp_path, provider, monkeypatch):
+    """Collector over FakeProvider with its own store, cache and circuit breakers"""
+    from data_collection import FinancialDataCollector
+
+    monkeypatch.setattr(circuit_breaker, "_breakers", {})
+    return FinancialDataCollector(store_dir=str(tmp_path / "store"), cache=DataFrameCache(), provider=provider)
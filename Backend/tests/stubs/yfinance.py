@@ -0,0 +1,16 @@
+"""
+Placeholder for yfinance where it is not installed
+
+The tests never reach yfinance; they pass fake providers to the collector.
+This module only lets market_data_providers be imported, in the test process
+and in the worker processes it spawns.
+"""
+
+
+class Ticker:
+    def __init__(self, *args, **kwargs):
+        raise RuntimeError("yfinance is not installed")
+
+
+def download(*args, **kwargs):
+    raise RuntimeError("yfinance is not installed")
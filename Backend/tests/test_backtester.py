@@ -0,0 +1,145 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtester import METRICS, Backtester, parameter_grid, positions, rule_signals, simulate
+from indicator_engine import add_indicators, frames_to_matrices, synthetic_universe
+
+
+def loop_backtest(close, entries, exits, periods_per_year=252, cost=0.0):
+    """One symbol, one bar at a time"""
+    position, price, equity, peak = 0.0, math.nan, 1.0, 1.0
+    strategy, drawdowns, held_bars, trades = [], [], 0, []
+    for t in range(len(close)):
+        valid = not math.isnan(close[t])
+        previous_price = price
+        if valid:
+            price = close[t]
+        held = position
+        bar_return = price / previous_price - 1 if valid and not math.isnan(previous_price) else 0.0
+        if valid and exits[t]:
+            position = 0.0
+        elif valid and entries[t]:
+            position = 1.0
+        if position > held:
+            trades.append([price, None])
+        elif position < held:
+            trades[-1][1] = price
+        value = held * bar_return - cost * abs(position - held)
+        equity *= 1 + value
+        peak = max(peak, equity)
+        drawdowns.append(equity / peak - 1)
+        if valid:
+            strategy.append(value)
+            held_bars += held
+    returns = [(exit_price if exit_price is not None else price) / entry * (1 - cost) ** 2 - 1
+               for entry, exit_price in trades]
+    deviation = np.std(strategy, ddof=1)
+    return {
+        "total_return": equity - 1,
+        "sharpe": np.mean(strategy) / deviation * math.sqrt(periods_per_year) if deviation > 0 else math.nan,
+        "max_drawdown": min(drawdowns),
+        "trades": len(trades),
+        "hit_rate": np.mean([r > 0 for r in returns]) if trades else math.nan,
+        "exposure": held_bars / len(strategy),
+    }
+
+
+@pytest.fixture(scope="module")
+def frames():
+    frames = synthetic_universe(n_symbols=6, n_bars=500, seed=4)
+    halted = frames["SYM0001"]
+    frames["SYM0001"] = halted.drop(halted.index[200:215])
+    return frames
+
+
+@pytest.fixture(scope="module")
+def close(frames):
+    return frames_to_matrices(frames, ["Close"])[0]["Close"]
+
+
+@pytest.mark.parametrize("cost", [0.0, 0.001])
+def test_simulation_matches_a_per_bar_loop(close, cost):
+    rng = np.random.default_rng(0)
+    entries, exits = rng.random(close.shape) < 0.05, rng.random(close.shape) < 0.05
+    result = simulate(close, entries, exits, cost=cost)
+    for row in range(len(close)):
+        expected = loop_backtest(close[row], entries[row], exits[row], cost=cost)
+        for metric in METRICS:
+            assert result[metric][row] == pytest.approx(expected[metric], rel=1e-9, abs=1e-12, nan_ok=True), metric
+
+
+def test_exits_win_over_entries_on_the_same_bar():
+    entries = np.array([[True, False, True, False, False]])
+    exits = np.array([[False, False, True, False, True]])
+    np.testing.assert_array_equal(positions(entries, exits), [[1, 1, 0, 0, 0]])
+
+
+def test_rsi_rule_uses_the_indicator_engines_rsi(frames, close):
+    entries, exits = rule_signals(close, "rsi", {"lower": 25, "upper": 75})
+    rsi = add_indicators({"SYM0000": frames["SYM0000"]})["SYM0000"]["RSI"].to_numpy()
+    row = list(frames).index("SYM0000")
+    present = ~np.isnan(close[row])
+    np.testing.assert_array_equal(entries[row][present], rsi < 25)
+    np.testing.assert_array_equal(exits[row][present], rsi > 75)
+
+
+def test_macd_rule_fires_on_histogram_crossovers(frames, close):
+    entries, exits = rule_signals(close, "macd", {})
+    histogram = add_indicators({"SYM0000": frames["SYM0000"]})["SYM0000"]["MACDh_12_26_9"]
+    row = list(frames).index("SYM0000")
+    present = ~np.isnan(close[row])
+    previous = histogram.shift()
+    np.testing.assert_array_equal(entries[row][present], (histogram > 0) & (previous <= 0))
+    np.testing.assert_array_equal(exits[row][present], (histogram < 0) & (previous >= 0))
+
+
+def test_run_reports_metrics_equity_and_trades(frames):
+    backtester = Backtester(frames, cost=0.0005)
+    result = backtester.run("macd")
+
+    assert list(result["metrics"].index) == list(frames)
+    assert list(result["metrics"].columns) == METRICS
+    assert result["equity"].shape == (len(backtester.index), len(frames))
+    counts = result["trades"].groupby("symbol").size().reindex(list(frames), fill_value=0)
+    np.testing.assert_array_equal(counts.to_numpy(), result["metrics"]["trades"].to_numpy())
+    assert (result["trades"]["exit_time"] >= result["trades"]["entry_time"]).all()
+    assert result["trades"]["open"].sum() <= len(frames)
+    final = result["equity"].iloc[-1] - 1
+    np.testing.assert_allclose(final.to_numpy(), result["metrics"]["total_return"].to_numpy())
+
+
+def test_parameter_grid():
+    grid = parameter_grid(lower=[20, 30], upper=[70, 80, 90])
+    assert len(grid) == 6
+    assert grid[0] == {"lower": 20, "upper": 70} and grid[-1] == {"lower": 30, "upper": 90}
+
+
+def test_sweep_matches_single_runs(frames):
+    backtester = Backtester(frames)
+    grid = parameter_grid(length=[7, 14], lower=[25, 30])
+    results = backtester.sweep("rsi", grid, max_workers=1, chunk_size=3)
+    assert len(results) == len(grid) * len(frames)
+
+    single = backtester.run("rsi", length=7, lower=30)["metrics"]
+    swept = results.xs((7, 30, 70.0), level=["length", "lower", "upper"])
+    pd.testing.assert_frame_equal(swept, single, check_dtype=False)
+    assert list(Backtester.summarize(results).columns) == METRICS
+
+
+def test_sweep_over_a_process_pool_matches_in_process(frames):
+    backtester = Backtester(frames)
+    grid = parameter_grid(fast=[8, 12, 30], slow=[26], signal=[9])
+    pooled = backtester.sweep("macd", grid, max_workers=2, chunk_size=1)
+    local = backtester.sweep("macd", grid, max_workers=1)
+    # fast >= slow is left out
+    assert len(local) == 2 * len(frames)
+    pd.testing.assert_frame_equal(pooled, local)
+
+
+def test_empty_universe():
+    backtester = Backtester({"A": pd.DataFrame()})
+    assert backtester.symbols == []
+    assert backtester.sweep("rsi", []).empty
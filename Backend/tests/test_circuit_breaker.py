@@ -0,0 +1,142 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import circuit_breaker
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, get_breaker
+
+
+@pytest.fixture
+def breaker(monkeypatch, clock):
+    monkeypatch.setattr(circuit_breaker, "time", clock)
+    return CircuitBreaker("upstream", failure_threshold=2, reset_timeout=30)
+
+
+def fail(error=None):
+    raise error or ConnectionError("timed out")
+
+
+def http_error(status: int) -> Exception:
+    error = Exception(f"HTTP {status}")
+    error.response = SimpleNamespace(status_code=status)
+    return error
+
+
+def trip(breaker):
+    for _ in range(breaker.failure_threshold):
+        with pytest.raises(ConnectionError):
+            breaker.call(fail)
+
+
+def test_opens_after_consecutive_failures_and_fails_fast(breaker):
+    with pytest.raises(ConnectionError):
+        breaker.call(fail)
+    assert breaker.state == CLOSED
+    with pytest.raises(ConnectionError):
+        breaker.call(fail)
+    assert breaker.state == OPEN
+
+    calls = []
+    with pytest.raises(CircuitOpenError):
+        breaker.call(calls.append, 1)
+    assert not calls
+    assert breaker.stats()["opens"] == 1 and breaker.stats()["rejected"] == 1
+
+
+def test_success_resets_the_failure_count(breaker):
+    with pytest.raises(ConnectionError):
+        breaker.call(fail)
+    assert breaker.call(lambda: "ok") == "ok"
+    with pytest.raises(ConnectionError):
+        breaker.call(fail)
+    assert breaker.state == CLOSED
+
+
+def test_successful_probe_closes_the_circuit(breaker, clock):
+    trip(breaker)
+    clock.advance(29)
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: "ok")
+    clock.advance(1)
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == CLOSED
+
+
+def test_failed_probe_opens_the_circuit_again(breaker, clock):
+    trip(breaker)
+    clock.advance(30)
+    with pytest.raises(ConnectionError):
+        breaker.call(fail)
+    assert breaker.state == OPEN
+    clock.advance(29)
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: "ok")
+
+
+def test_only_one_probe_at_a_time(breaker, clock):
+    trip(breaker)
+    clock.advance(30)
+
+    def probe():
+        assert breaker.state == HALF_OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.call(lambda: "second probe")
+        return "ok"
+
+    assert breaker.call(probe) == "ok"
+
+
+def test_client_errors_do_not_count(breaker):
+    for _ in range(5):
+        with pytest.raises(Exception):
+            breaker.call(fail, http_error(404))
+    assert breaker.state == CLOSED
+    for status in (429, 503):
+        with pytest.raises(Exception):
+            breaker.call(fail, http_error(status))
+    assert breaker.state == OPEN
+
+
+def test_client_error_from_a_probe_proves_the_upstream_is_back(breaker, clock):
+    trip(breaker)
+    clock.advance(30)
+    with pytest.raises(Exception):
+        breaker.call(fail, http_error(404))
+    assert breaker.state == CLOSED
+
+
+def test_cancelled_calls_do_not_count(breaker):
+    async def cancelled():
+        raise asyncio.CancelledError()
+
+    async def main():
+        for _ in range(3):
+            with pytest.raises(asyncio.CancelledError):
+                await breaker.acall(cancelled)
+
+    asyncio.run(main())
+    assert breaker.state == CLOSED
+
+
+def test_async_calls_trip_the_breaker(breaker):
+    async def failing():
+        raise ConnectionError("timed out")
+
+    async def main():
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                await breaker.acall(failing)
+        with pytest.raises(CircuitOpenError):
+            await breaker.acall(failing)
+
+    asyncio.run(main())
+    assert breaker.stats()["state"] == OPEN
+
+
+def test_get_breaker_returns_one_breaker_per_upstream(monkeypatch):
+    monkeypatch.setattr(circuit_breaker, "_breakers", {})
+    breaker = get_breaker("yfinance", failure_threshold=3)
+    assert get_breaker("yfinance") is breaker
+    assert get_breaker("gemini") is not breaker
+    assert set(circuit_breaker.breaker_stats()) == {"yfinance", "gemini"}
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import daily_bars
+
+from compact_frames import compact_frame, expand_index, frame_memory_report
+from data_analysis import FinancialAnalyzer
+from data_collection import FinancialDataCollector
+from insights_cache import InsightsCache
+
+
+@pytest.fixture
+def bars():
+    df = daily_bars(300)
+    df.attrs.update(symbol="AAA", interval="1d")
+    return df
+
+
+def test_compact_frame_downcasts_and_drops_actions(bars):
+    compact = compact_frame(bars)
+    assert list(compact.columns) == ["Open", "High", "Low", "Close", "Volume"]
+    assert (compact[["Open", "High", "Low", "Close"]].dtypes == np.float32).all()
+    assert compact["Volume"].dtype == np.uint32
+    assert compact.index.name == "epoch_ns" and compact.index.dtype == np.int64
+    assert compact.attrs == {**bars.attrs, "tz": "America/New_York"}
+    assert frame_memory_report(compact)["total_bytes"] < frame_memory_report(bars)["total_bytes"] / 2
+
+    kept = compact_frame(bars, keep_actions=True)
+    assert kept["Dividends"].dtype == "category" and kept["Stock Splits"].dtype == "category"
+
+
+def test_large_or_missing_volume_still_fits(bars):
+    bars = bars.copy()
+    bars.loc[bars.index[0], "Volume"] = 2.0 ** 33
+    bars.loc[bars.index[1], "Volume"] = np.nan
+    compact = compact_frame(bars)
+    assert compact["Volume"].dtype == np.int64
+    assert compact["Volume"].iloc[0] == 2 ** 33 and compact["Volume"].iloc[1] == 0
+
+
+@pytest.mark.parametrize("tz", ["America/New_York", "UTC", None])
+def test_round_trip_restores_the_index_and_values(bars, tz):
+    bars = bars.tz_convert(tz) if tz else bars.tz_localize(None)
+    expanded = expand_index(compact_frame(bars))
+    assert expanded.index.equals(bars.index.rename("Date"))
+    assert (str(expanded.index.tz) if expanded.index.tz else None) == tz
+    for column in ["Open", "High", "Low", "Close"]:
+        np.testing.assert_allclose(expanded[column], bars[column], rtol=1e-7)
+    np.testing.assert_array_equal(expanded["Volume"], bars["Volume"])
+    # Column dtypes stay compact
+    assert expanded["Close"].dtype == np.float32
+
+
+def test_expand_index_leaves_full_frames_alone(bars):
+    assert expand_index(bars) is bars
+
+
+def test_collector_returns_compact_frames(collector, provider):
+    provider.bars["AAA"] = daily_bars(300)
+    full = collector.get_stock_data("AAA", "6mo")
+    compact = collector.get_stock_data("AAA", "6mo", compact=True)
+    assert compact["SMA_20"].dtype == np.float32 and compact.attrs["symbol"] == "AAA"
+    expanded = expand_index(compact)
+    assert expanded.index.equals(full.index.rename("Date"))
+    np.testing.assert_allclose(expanded["BBU_20_2.0"], full["BBU_20_2.0"], rtol=1e-6)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_analysis_of_compact_frames_matches_full_precision(monkeypatch, seed):
+    monkeypatch.setenv("OHLCV_STORE_DIR", "")
+    df = FinancialDataCollector._add_indicators(None, daily_bars(300, seed=seed), "AAA", "1d")
+    analyzer = FinancialAnalyzer(insights_cache=InsightsCache())
+    full_df, full = analyzer.analyze(df)
+    compact_df, compact = analyzer.analyze(compact_frame(df))
+
+    assert compact["signals"] == full["signals"]
+    assert compact["trend_analysis"] == full["trend_analysis"]
+    for section in ["statistics", "risk_metrics"]:
+        flat_full = pd.json_normalize(full[section]).iloc[0]
+        flat_compact = pd.json_normalize(compact[section]).iloc[0]
+        np.testing.assert_allclose(flat_compact.astype(float), flat_full.astype(float), rtol=1e-4, atol=1e-7)
+    for side in ["support", "resistance"]:
+        np.testing.assert_allclose(compact["key_levels"][side], full["key_levels"][side], rtol=1e-5)
+    for column in ["RSI", "MACD_12_26_9", "ATR"]:
+        np.testing.assert_allclose(compact_df[column], full_df[column], rtol=1e-3, atol=1e-4)
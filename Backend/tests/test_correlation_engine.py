@@ -0,0 +1,149 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import correlation_engine
+from correlation_engine import (
+    CorrelationEngine,
+    aligned_returns,
+    beta,
+    pairwise_matrices,
+    rolling_beta,
+    rolling_correlation,
+    rolling_matrices,
+)
+from indicator_engine import synthetic_universe
+
+
+@pytest.fixture(scope="module")
+def frames():
+    return synthetic_universe(n_symbols=8, n_bars=300, seed=2)
+
+
+@pytest.fixture(scope="module")
+def returns(frames):
+    returns = aligned_returns(frames)
+    # Scattered missing bars on top of the ragged starts
+    rng = np.random.default_rng(0)
+    return returns.mask(rng.random(returns.shape) < 0.05)
+
+
+class FakeCollector:
+    def __init__(self, frames):
+        self.frames = frames
+        self.calls = []
+        self.cache = SimpleNamespace(ttl_for=lambda interval: 60.0)
+
+    def get_stock_data_batch(self, symbols, period, interval):
+        self.calls.append(list(symbols))
+        upper = [symbol.upper() for symbol in symbols]
+        return {"data": {symbol: self.frames[symbol] for symbol in upper if symbol in self.frames}, "errors": {}}
+
+
+def test_aligned_returns_use_the_union_of_the_indexes(frames):
+    returns = aligned_returns(frames)
+    assert list(returns.columns) == list(frames)
+    union = frames["SYM0000"].index
+    for df in frames.values():
+        union = union.union(df.index)
+    assert len(returns) == len(union) - 1
+    first = frames["SYM0003"]["Close"]
+    pd.testing.assert_series_equal(returns["SYM0003"].dropna(), first.pct_change().iloc[1:],
+                                   check_names=False, check_freq=False)
+    assert aligned_returns({"A": pd.DataFrame()}).empty
+
+
+def test_pairwise_matrices_match_pandas(returns):
+    covariance, correlation, count = pairwise_matrices(returns.to_numpy())
+    np.testing.assert_allclose(covariance, returns.cov().to_numpy(), rtol=1e-10, atol=1e-15)
+    np.testing.assert_allclose(correlation, returns.corr().to_numpy(), rtol=1e-10, atol=1e-12)
+    valid = returns.notna().to_numpy().astype(int)
+    np.testing.assert_array_equal(count, valid.T @ valid)
+
+
+def test_pairs_with_too_few_observations_are_nan(returns):
+    _, correlation, count = pairwise_matrices(returns.to_numpy(), min_periods=250)
+    expected = returns.corr(min_periods=250).to_numpy()
+    np.testing.assert_array_equal(np.isnan(correlation), np.isnan(expected))
+    assert np.isnan(correlation[count < 250]).all()
+
+
+def test_rolling_matrices_match_pandas_rolling(returns):
+    window = 60
+    complete = returns.dropna()
+    result = rolling_matrices(complete, window, step=7)
+    ends = result["correlation"].index.get_level_values(0).unique()
+    assert ends[-1] == complete.index[-1]
+    assert len(ends) == len(range(len(complete) - 1, window - 2, -7))
+
+    expected_corr = complete.rolling(window).corr()
+    expected_cov = complete.rolling(window).cov()
+    for end in ends:
+        np.testing.assert_allclose(result["correlation"].loc[end], expected_corr.loc[end], rtol=1e-9, atol=1e-12)
+        np.testing.assert_allclose(result["covariance"].loc[end], expected_cov.loc[end], rtol=1e-9, atol=1e-15)
+
+
+def test_rolling_matrices_shorter_than_the_window_are_empty(returns):
+    result = rolling_matrices(returns.iloc[:10], 60)
+    assert result["correlation"].empty and list(result["correlation"].columns) == list(returns.columns)
+
+
+def test_beta_matches_covariance_over_variance(returns):
+    benchmark = returns.iloc[:, 0]
+    result = beta(returns, benchmark)
+    for symbol in returns.columns:
+        both = returns[[symbol]].assign(benchmark=benchmark).dropna()
+        expected = both[symbol].cov(both["benchmark"]) / both["benchmark"].var()
+        assert result[symbol] == pytest.approx(expected, rel=1e-9)
+
+
+def test_rolling_beta_and_correlation_match_pandas(returns):
+    complete = returns.dropna()
+    benchmark = complete.iloc[:, 0]
+    betas = rolling_beta(complete, benchmark, window=30)
+    correlations = rolling_correlation(complete, benchmark, window=30)
+
+    expected_beta = complete.rolling(30).cov(benchmark).div(benchmark.rolling(30).var(), axis=0)
+    np.testing.assert_allclose(betas, expected_beta, rtol=1e-8, atol=1e-10)
+    np.testing.assert_allclose(correlations, complete.rolling(30).corr(benchmark), rtol=1e-8, atol=1e-10)
+    assert betas.iloc[:29].isna().all().all()
+
+
+def test_engine_orders_matrices_as_requested_and_caches_them(frames):
+    collector = FakeCollector(frames)
+    engine = CorrelationEngine(collector)
+    symbols = ["SYM0002", "sym0000", "SYM0001", "MISSING"]
+
+    first = engine.matrices(symbols)
+    assert list(first["correlation"].index) == ["SYM0002", "SYM0000", "SYM0001"]
+    expected = aligned_returns({symbol: frames[symbol] for symbol in ["SYM0002", "SYM0000", "SYM0001"]}).corr()
+    np.testing.assert_allclose(first["correlation"], expected, rtol=1e-10)
+
+    reordered = engine.correlation(["SYM0001", "SYM0002", "SYM0000", "MISSING"])
+    assert list(reordered.columns) == ["SYM0001", "SYM0002", "SYM0000"]
+    assert len(collector.calls) == 1
+    assert engine.stats()["hits"] == 1 and engine.stats()["misses"] == 1
+
+
+def test_engine_cache_expires_with_the_data_cache(frames, monkeypatch, clock):
+    monkeypatch.setattr(correlation_engine, "time", clock)
+    collector = FakeCollector(frames)
+    engine = CorrelationEngine(collector)
+    engine.covariance(["SYM0000", "SYM0001"])
+    clock.advance(59)
+    engine.covariance(["SYM0000", "SYM0001"])
+    assert len(collector.calls) == 1
+    clock.advance(1)
+    engine.covariance(["SYM0000", "SYM0001"])
+    assert len(collector.calls) == 2
+
+
+def test_engine_rolling_matrices_and_beta(frames):
+    engine = CorrelationEngine(FakeCollector(frames))
+    rolling = engine.rolling_matrices(["SYM0001", "SYM0000"], window=20, step=5)
+    assert list(rolling["covariance"].columns) == ["SYM0001", "SYM0000"]
+    betas = engine.beta(["SYM0001", "SYM0002"], benchmark="SYM0000")
+    assert list(betas.index) == ["SYM0001", "SYM0002"]
+    assert engine.beta(["SYM0001"], benchmark="MISSING") is None
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+from cross_asset import align_asof, bar_close_times, candles_to_frame
+from data_collection import FinancialDataCollector
+
+
+def candles(opens, width="1h"):
+    """Candles whose values are their position, so joins are easy to read"""
+    index = pd.DatetimeIndex(opens, tz="UTC", name="Date")
+    close = np.arange(len(index), dtype=float)
+    return pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close, "Volume": 1.0}, index=index)
+
+
+def stock_bars(opens, tz="America/New_York"):
+    index = pd.DatetimeIndex(opens).tz_localize(tz)
+    return pd.DataFrame({"Close": np.arange(len(index), dtype=float) + 100}, index=index)
+
+
+def test_candles_are_parsed_oldest_first():
+    frame = candles_to_frame([[1_700_003_600_000, 2, 3, 1, 2.5, 10], [1_700_000_000_000, 1, 2, 0.5, 1.5, 5]])
+    assert frame.index.is_monotonic_increasing and str(frame.index.tz) == "UTC"
+    assert frame["Close"].tolist() == [1.5, 2.5]
+    assert candles_to_frame([]).empty
+
+
+def test_bar_close_times():
+    bars = stock_bars(["2024-03-05 10:00", "2024-03-05 11:00"])
+    assert bar_close_times(bars.index, "1h").tolist() == [
+        pd.Timestamp("2024-03-05 16:00", tz="UTC"), pd.Timestamp("2024-03-05 17:00", tz="UTC")
+    ]
+    daily = pd.DatetimeIndex(["2024-03-05", "2024-07-05"])  # tz-naive, EST and EDT
+    assert bar_close_times(daily, "1d").tolist() == [
+        pd.Timestamp("2024-03-05 21:00", tz="UTC"), pd.Timestamp("2024-07-05 20:00", tz="UTC")
+    ]
+
+
+def test_intraday_join_has_no_lookahead():
+    # One hour stock bars open 10:00 and 11:00 EST, so close 16:00 and 17:00 UTC
+    bars = stock_bars(["2024-03-05 10:00", "2024-03-05 11:00"])
+    btc = candles(["2024-03-05 14:00", "2024-03-05 15:00", "2024-03-05 15:30", "2024-03-05 16:00"])
+    aligned = align_asof(bars, btc, "1h", pd.Timedelta(hours=1), "BTCUSD")
+
+    # 15:00 closes with the first bar, 15:30 only 30 minutes after it and 16:00 with the second
+    assert aligned["BTCUSD_Close"].tolist() == [1.0, 3.0]
+    assert list(aligned.columns) == ["Close"] + [f"BTCUSD_{c}" for c in ["Open", "High", "Low", "Close", "Volume"]]
+    assert "BTCUSD_Close" not in bars.columns
+
+
+def test_candle_open_after_the_bar_is_never_joined():
+    bars = stock_bars(["2024-03-05 10:00"])
+    btc = candles(["2024-03-05 15:01", "2024-03-05 16:00"])
+    aligned = align_asof(bars, btc, "1h", pd.Timedelta(hours=1), "BTCUSD")
+    assert np.isnan(aligned["BTCUSD_Close"].iloc[0])
+
+
+def test_daily_bars_join_the_last_day_closed_by_the_session_close():
+    bars = stock_bars(["2024-03-04", "2024-03-05"])
+    btc = candles(["2024-03-03", "2024-03-04", "2024-03-05"])
+    aligned = align_asof(bars, btc, "1d", pd.Timedelta(days=1), "BTCUSD")
+    # The 1day candle of the 5th closes at midnight UTC, after the 16:00 ET close
+    assert aligned["BTCUSD_Close"].tolist() == [0.0, 1.0]
+
+
+def test_stale_candles_beyond_the_tolerance_are_dropped():
+    opens = ["2024-03-05 10:00", "2024-03-05 11:00", "2024-03-05 12:00", "2024-03-05 13:00", "2024-03-05 14:00"]
+    bars = stock_bars(opens)
+    btc = candles(["2024-03-05 15:00"])  # Closes with the first bar, then nothing
+
+    # Defaults to twice the longer bar: two hours of staleness are fine, three are not
+    aligned = align_asof(bars, btc, "1h", pd.Timedelta(hours=1), "BTCUSD")
+    assert aligned["BTCUSD_Close"].isna().tolist() == [False, False, False, True, True]
+
+    exact = align_asof(bars, btc, "1h", pd.Timedelta(hours=1), "BTCUSD", tolerance=pd.Timedelta(0))
+    assert exact["BTCUSD_Close"].isna().tolist() == [False, True, True, True, True]
+    lenient = align_asof(bars, btc, "1h", pd.Timedelta(hours=1), "BTCUSD", tolerance=pd.Timedelta(days=1))
+    assert lenient["BTCUSD_Close"].notna().all()
+
+
+def test_align_combined_keeps_the_stock_index_and_staleness():
+    bars = stock_bars(["2024-03-04", "2024-03-05"])
+    bars.attrs["stale"] = True
+    aligned = FinancialDataCollector.align_combined(bars, candles(["2024-03-04"]), "btcusd", "1d", "1day")
+    assert aligned.index.equals(bars.index) and aligned.attrs["stale"]
+    assert aligned["BTCUSD_Close"].isna().tolist() == [True, False]
+    assert FinancialDataCollector.align_combined(None, candles([]), "btcusd", "1d", "1day") is None
@@ -0,0 +1,93 @@
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pytest
+import websockets
+from conftest import FakeProvider
+
+from crypto_stream import CryptoStreamIngester
+from crypto_stream_server import MarketDataStandIn
+
+
+@pytest.fixture
+def stand_in():
+    """The stand-in served on a free port from its own event loop thread"""
+    stand_in = MarketDataStandIn(interval=0.002, drop_after=40, gap_every=25, seed=1)
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    stopped = loop.create_future()
+
+    async def serve():
+        async with websockets.serve(stand_in.handler, "localhost", 0) as server:
+            stand_in.url = f"ws://localhost:{server.sockets[0].getsockname()[1]}"
+            started.set()
+            await stopped
+
+    thread = threading.Thread(target=loop.run_until_complete, args=(serve(),), daemon=True)
+    thread.start()
+    assert started.wait(5)
+    stand_in.loop = loop
+    yield stand_in
+    loop.call_soon_threadsafe(stopped.set_result, None)
+    thread.join(5)
+    loop.close()
+
+
+class BackfillProvider(FakeProvider):
+    """REST side of the stand-in: each trades call reports one trade the stream never sent"""
+
+    def __init__(self, stand_in):
+        super().__init__(json_data={"/v1/pubticker/btcusd": {"volume": {"USD": "12345.5"}, "last": "100.0"}})
+        self.stand_in = stand_in
+        self.backfilled = []
+
+    def get_json(self, path, params=None):
+        if path != "/v1/trades/btcusd":
+            return super().get_json(path, params)
+
+        async def reserve():
+            tid = self.stand_in._next_tid
+            self.stand_in._next_tid += 1
+            return tid
+
+        # Take the trade id on the stand-in's loop, so it is never streamed too
+        tid = asyncio.run_coroutine_threadsafe(reserve(), self.stand_in.loop).result(5)
+        self.backfilled.append(tid)
+        return [{"tid": tid, "timestampms": int(time.time() * 1000), "price": "101.5",
+                 "amount": "0.5", "type": "buy"}]
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_ingester_streams_reconnects_and_backfills(stand_in):
+    provider = BackfillProvider(stand_in)
+    ingester = CryptoStreamIngester(["btcusd"], provider=provider, ws_url=stand_in.url,
+                                    capacity=10_000, reconnect_delay=0.01, max_reconnect_delay=0.05)
+    ingester.start()
+    try:
+        # Drops after 40 messages and sequence gaps both force reconnects
+        assert wait_for(lambda: ingester.stats()["btcusd"]["reconnects"] >= 3 and len(provider.backfilled) >= 3)
+        assert wait_for(lambda: ingester.stats()["btcusd"]["buffered_trades"] >= 50)
+        snapshot = ingester.snapshot("btcusd")
+    finally:
+        ingester.stop()
+
+    assert snapshot is not None and not snapshot["stale"]
+    assert snapshot["bid"] < snapshot["ask"]
+    assert snapshot["volume"] == 12345.5
+    assert snapshot["recent_trades"]
+
+    tids = ingester._states["btcusd"].trades.latest()["tid"][::-1]
+    assert np.all(np.diff(tids) > 0)
+    # Every trade reported over REST on a reconnect was backfilled into the buffer
+    assert set(provider.backfilled) <= set(tids.tolist())
+    assert ingester.stats()["btcusd"]["connected"] is False
@@ -0,0 +1,93 @@
+import pandas as pd
+import pytest
+
+import data_cache
+from data_cache import DataFrameCache
+from market_calendar import period_start
+
+
+def daily_bars(days: int = 400) -> pd.DataFrame:
+    index = pd.date_range(end=pd.Timestamp.now(tz="America/New_York").normalize(), periods=days, freq="D")
+    return pd.DataFrame({"Close": range(days)}, index=index, dtype=float)
+
+
+@pytest.fixture
+def cache(monkeypatch, clock):
+    cache = DataFrameCache(max_bytes=10 ** 9)
+    monkeypatch.setattr(data_cache, "time", clock)
+    monkeypatch.setattr(cache, "ttl_for", lambda interval, now=None: 60.0)
+    return cache
+
+
+def test_ttl_while_open_depends_on_interval():
+    cache = DataFrameCache(intraday_ttl=60, daily_ttl=300)
+    wednesday_open = pd.Timestamp("2024-01-10 15:00", tz="UTC")
+    assert cache.ttl_for("5m", wednesday_open) == 60
+    assert cache.ttl_for("1d", wednesday_open) == 300
+
+
+def test_ttl_while_closed_lasts_until_the_next_open():
+    cache = DataFrameCache()
+    saturday = pd.Timestamp("2024-01-13 12:00", tz="UTC")
+    monday_open = pd.Timestamp("2024-01-15 14:30", tz="UTC")
+    assert cache.ttl_for("1d", saturday) == (monday_open - saturday).total_seconds()
+
+
+def test_longer_entry_answers_shorter_periods(cache):
+    bars = daily_bars()
+    cache.put("aapl", "1d", bars, period_start("1y"))
+
+    month = cache.get("AAPL", "1mo", "1d")
+    assert month is not None
+    assert month.index[0] >= period_start("1mo")
+    assert month.index[-1] == bars.index[-1]
+    assert cache.get("AAPL", "2y", "1d") is None
+    assert cache.get("AAPL", "1mo", "1h") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_expired_entry_misses_but_stays_available_as_stale(cache, clock):
+    bars = daily_bars()
+    cache.put("AAPL", "1d", bars, period_start("1y"))
+    clock.advance(61)
+
+    assert cache.get("AAPL", "6mo", "1d") is None
+    stale = cache.get_stale("AAPL", "6mo", "1d")
+    assert stale is not None and stale.index[-1] == bars.index[-1]
+    assert cache.get_stale("AAPL", "2y", "1d") is None
+    assert cache.contains("aapl", "1d")
+    assert cache.stats()["misses"] == 1
+
+
+def test_least_recently_used_entry_is_evicted_first(cache):
+    bars = daily_bars()
+    nbytes = int(bars.memory_usage(index=True, deep=True).sum())
+    cache.max_bytes = 2 * nbytes
+    cache.put("A", "1d", bars, period_start("1y"))
+    cache.put("B", "1d", bars, period_start("1y"))
+    assert cache.get("A", "1y", "1d") is not None
+
+    cache.put("C", "1d", bars, period_start("1y"))
+    assert cache.contains("A", "1d") and cache.contains("C", "1d")
+    assert not cache.contains("B", "1d")
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] == 2 * nbytes
+
+
+def test_frames_over_budget_are_not_cached(cache):
+    bars = daily_bars()
+    cache.max_bytes = 10
+    cache.put("A", "1d", bars, period_start("1y"))
+    assert not cache.contains("A", "1d")
+    assert cache.stats()["bytes"] == 0
+
+
+def test_invalidate_one_interval_or_all(cache):
+    bars = daily_bars()
+    for interval in ("1d", "1h"):
+        cache.put("A", interval, bars, period_start("1y"))
+    cache.invalidate("a", "1h")
+    assert cache.contains("A", "1d") and not cache.contains("A", "1h")
+    cache.invalidate("A")
+    assert cache.stats()["entries"] == 0 and cache.stats()["bytes"] == 0
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import MISSING, daily_bars
+
+from market_calendar import period_start
+
+
+@pytest.fixture
+def universe(provider):
+    provider.bars = {symbol: daily_bars(400, seed=seed) for seed, symbol in enumerate(["AAA", "BBB", "CCC"])}
+    # CCC misses days the others trade, so the close panel has holes
+    provider.bars["CCC"] = provider.bars["CCC"].iloc[::3]
+    return provider.bars
+
+
+def test_batch_splits_stored_symbols_from_new_ones(collector, provider, universe):
+    collector.get_stock_data("AAA", "1y")
+    stored = collector.store.read("AAA", "1d")
+    collector.cache.invalidate("AAA")
+    provider.calls.clear()
+
+    result = collector.get_stock_data_batch(["aaa", "BBB", "AAA"], "6mo")
+    assert provider.calls == [
+        ("download", ("AAA",), "1d", None, collector.store.top_up_start(stored)),
+        ("download", ("BBB",), "1d", "6mo", None),
+    ]
+    assert sorted(result["data"]) == ["AAA", "BBB"] and not result["errors"]
+    assert collector.store.coverage_start("BBB", "1d") == period_start("6mo")
+
+    # Everything is cached now
+    provider.calls.clear()
+    again = collector.get_stock_data_batch(["AAA", "BBB"], "6mo")
+    assert provider.calls == []
+    pd.testing.assert_frame_equal(again["data"]["BBB"], result["data"]["BBB"])
+
+
+def test_unknown_tickers_land_in_errors(collector, provider, universe):
+    result = collector.get_stock_data_batch(["AAA", "ZZZ"], "6mo")
+    assert list(result["data"]) == ["AAA"]
+    assert result["errors"] == {"ZZZ": MISSING}
+
+    result = collector.get_stock_data_batch(["YYY", "ZZZ"], "6mo")
+    assert result == {"data": {}, "errors": {"YYY": MISSING, "ZZZ": MISSING}}
+
+
+def test_failed_download_serves_the_last_known_bars(collector, provider, universe):
+    first = collector.get_stock_data_batch(["AAA"], "6mo")["data"]["AAA"]
+    collector.cache.invalidate("AAA")
+
+    def fail(*args, **kwargs):
+        raise ConnectionError("upstream down")
+
+    provider.download = fail
+    result = collector.get_stock_data_batch(["AAA", "BBB"], "6mo")
+    assert result["errors"] == {"BBB": "upstream down"}
+    pd.testing.assert_series_equal(result["data"]["AAA"]["Close"], first["Close"], check_freq=False)
+    assert result["data"]["AAA"].attrs["stale"]
+
+
+def test_panel_indicators_match_the_single_symbol_path(collector, universe):
+    batch = collector.get_stock_data_batch(["AAA", "BBB", "CCC"], "6mo")["data"]
+    for symbol in ["AAA", "BBB", "CCC"]:
+        raw = batch[symbol][["Open", "High", "Low", "Close", "Volume", "Dividends", "Stock Splits"]]
+        single = collector._add_indicators(raw, symbol, "1d")
+        assert batch[symbol].attrs["symbol"] == symbol
+        for column in ["SMA_20", "SMA_50", "BBU_20_2.0", "BBM_20_2.0", "BBL_20_2.0"]:
+            np.testing.assert_allclose(batch[symbol][column], single[column], rtol=1e-9, atol=1e-9)
+            assert batch[symbol][column].isna().sum() == single[column].isna().sum()
+
+
+def test_batch_and_single_requests_agree(collector, universe):
+    batch = collector.get_stock_data_batch(["BBB", "CCC"], "6mo")["data"]
+    collector.cache.invalidate("CCC")
+    single = collector.get_stock_data("CCC", "6mo")
+    pd.testing.assert_frame_equal(batch["CCC"], single, check_freq=False, rtol=1e-9)
+
+
+def test_batch_returns_compact_frames(collector, universe):
+    data = collector.get_stock_data_batch(["AAA", "BBB"], "6mo", compact=True)["data"]
+    assert all(df["SMA_20"].dtype == np.float32 and df.index.name == "epoch_ns" for df in data.values())
@@ -0,0 +1,156 @@
+import os
+
+import pandas as pd
+import pytest
+from conftest import daily_bars
+
+from data_store import OHLCVStore
+from market_calendar import period_start
+
+
+@pytest.fixture
+def store(tmp_path):
+    return OHLCVStore(str(tmp_path / "store"))
+
+
+def test_write_and_read_round_trip_with_coverage(store):
+    bars = daily_bars(50)
+    assert store.read("AAPL", "1d") is None and store.coverage_start("AAPL", "1d") is None
+
+    start = pd.Timestamp("2024-01-02", tz="America/New_York")
+    store.write("aapl", "1d", bars, coverage_start=start)
+    pd.testing.assert_frame_equal(store.read("AAPL", "1d"), bars, check_freq=False)
+    assert store.coverage_start("AAPL", "1d") == start
+    assert store.coverage_start("AAPL", "1h") is None
+
+    store.write("AAPL", "1d", bars, coverage_start=pd.Timestamp.min.tz_localize("UTC"))
+    assert store.coverage_start("AAPL", "1d") == pd.Timestamp.min.tz_localize("UTC")
+
+    directory = os.path.dirname(store._base_path("AAPL", "1d"))
+    assert sorted(os.listdir(directory)) == ["AAPL.json", "AAPL.parquet"]
+    store.clear("AAPL", "1d")
+    assert store.read("AAPL", "1d") is None and store.coverage_start("AAPL", "1d") is None
+
+
+def test_merge_keeps_the_newer_duplicate_bar(store):
+    bars = daily_bars(10)
+    stored = bars.iloc[:6].copy()
+    stored.loc[stored.index[-1], "Close"] = -1.0  # captured while in progress
+    new_bars = bars.iloc[5:]
+
+    merged = store.merge(stored, new_bars)
+    pd.testing.assert_frame_equal(merged, bars, check_freq=False)
+    assert store.merge(None, new_bars.iloc[::-1]).index.is_monotonic_increasing
+    assert store.merge(stored, pd.DataFrame()) is stored
+
+
+def test_merge_keeps_columns_of_both_sides(store):
+    bars = daily_bars(10)
+    merged = store.merge(bars.iloc[:5].drop(columns=["Dividends"]), bars.iloc[5:])
+    assert set(merged.columns) == set(bars.columns)
+    assert merged["Dividends"].iloc[:5].isna().all()
+
+
+def test_top_up_starts_at_the_last_complete_bar():
+    bars = daily_bars(10)
+    assert OHLCVStore.top_up_start(bars) == bars.index[-2]
+    assert OHLCVStore.top_up_start(bars.iloc[:1]) == bars.index[0]
+
+
+def test_adjustment_change_is_detected():
+    bars = daily_bars(10)
+    stored, new_bars = bars.iloc[:8], bars.iloc[6:].copy()
+    assert not OHLCVStore.adjustment_changed(stored, new_bars)
+
+    # The last stored bar may have been in progress, so its close may differ
+    in_progress = new_bars.copy()
+    in_progress.loc[in_progress.index[1], "Close"] *= 1.01
+    assert not OHLCVStore.adjustment_changed(stored, in_progress)
+
+    readjusted = new_bars.copy()
+    readjusted.loc[readjusted.index[0], "Close"] *= 0.99
+    assert OHLCVStore.adjustment_changed(stored, readjusted)
+
+    dividend = new_bars.copy()
+    dividend.loc[dividend.index[-1], "Dividends"] = 0.25
+    assert OHLCVStore.adjustment_changed(stored, dividend)
+    # A split the stored bars already reflect is not a change
+    split = bars.copy()
+    split.loc[split.index[7], "Stock Splits"] = 2.0
+    assert not OHLCVStore.adjustment_changed(split.iloc[:8], split.iloc[6:])
+    assert not OHLCVStore.adjustment_changed(None, new_bars)
+
+
+def test_uncovered_request_downloads_the_whole_period(collector, provider):
+    provider.bars["AAA"] = daily_bars(400)
+    df = collector.get_stock_data("AAA", "6mo")
+    assert provider.calls == [("history", "AAA", "1d", "6mo", None)]
+    assert df.index[0] >= period_start("6mo")
+    assert collector.store.coverage_start("AAA", "1d") == period_start("6mo")
+
+    # A longer period than the store covers is downloaded whole, too
+    collector.cache.invalidate("AAA")
+    collector.get_stock_data("AAA", "1y")
+    assert provider.calls[-1] == ("history", "AAA", "1d", "1y", None)
+    assert collector.store.coverage_start("AAA", "1d") == period_start("1y")
+
+
+def test_covered_request_only_tops_up(collector, provider):
+    bars = daily_bars(400)
+    provider.bars["AAA"] = bars.iloc[:-1]
+    collector.get_stock_data("AAA", "1y")
+    stored = collector.store.read("AAA", "1d")
+
+    provider.bars["AAA"] = bars
+    df = collector.get_stock_data("AAA", "6mo", refresh=True)
+    assert provider.calls[-1] == ("history", "AAA", "1d", None, stored.index[-2])
+    assert df.index[-1] == bars.index[-1]
+    assert len(collector.store.read("AAA", "1d")) == len(stored) + 1
+    assert collector.store.coverage_start("AAA", "1d") == period_start("1y")
+
+
+def test_readjusted_history_replaces_the_store(collector, provider):
+    bars = daily_bars(400)
+    provider.bars["AAA"] = bars.iloc[:-1]
+    collector.get_stock_data("AAA", "6mo")
+
+    # A dividend on the newest bar re-adjusts every earlier close
+    adjusted = bars.copy()
+    adjusted.loc[adjusted.index[:-1], ["Open", "High", "Low", "Close"]] *= 0.98
+    adjusted.loc[adjusted.index[-1], "Dividends"] = 1.0
+    provider.bars["AAA"] = adjusted
+
+    df = collector.get_stock_data("AAA", "6mo", refresh=True)
+    assert [call[3:] for call in provider.calls[-2:]] == [(None, bars.index[-3]), ("6mo", None)]
+    expected = adjusted[adjusted.index >= period_start("6mo")]
+    pd.testing.assert_series_equal(df["Close"], expected["Close"], check_freq=False)
+    stored = collector.store.read("AAA", "1d")
+    pd.testing.assert_series_equal(stored["Close"], expected["Close"], check_freq=False)
+
+
+def test_batch_splits_top_up_and_full_groups_and_refetches_readjusted(collector, provider):
+    bars = {symbol: daily_bars(400, seed=seed) for seed, symbol in enumerate(["AAA", "BBB", "CCC"])}
+    provider.bars = {symbol: df.iloc[:-1] for symbol, df in bars.items()}
+    collector.get_stock_data_batch(["AAA", "BBB"], "6mo")
+    assert provider.calls == [("download", ("AAA", "BBB"), "1d", "6mo", None)]
+
+    adjusted = bars["BBB"].copy()
+    adjusted.loc[adjusted.index[:-1], "Close"] *= 0.5
+    adjusted.loc[adjusted.index[-1], "Stock Splits"] = 2.0
+    provider.bars = {**bars, "BBB": adjusted}
+    collector.cache.invalidate("AAA")
+    collector.cache.invalidate("BBB")
+    provider.calls.clear()
+
+    result = collector.get_stock_data_batch(["AAA", "BBB", "CCC"], "6mo")
+    start = bars["AAA"].index[-3]
+    assert provider.calls == [
+        ("download", ("AAA", "BBB"), "1d", None, start),
+        ("download", ("CCC",), "1d", "6mo", None),
+        ("download", ("BBB",), "1d", "6mo", None),
+    ]
+    assert not result["errors"]
+    for symbol, expected in [("AAA", bars["AAA"]), ("BBB", adjusted), ("CCC", bars["CCC"])]:
+        expected = expected[expected.index >= period_start("6mo")]["Close"]
+        pd.testing.assert_series_equal(result["data"][symbol]["Close"], expected,
+                                       check_freq=False, check_names=False)
@@ -0,0 +1,58 @@
+import pytest
+
+import hot_refresher
+from hot_refresher import HotSymbolRefresher
+
+
+@pytest.fixture
+def refresher(monkeypatch, clock):
+    monkeypatch.setattr(hot_refresher, "time", clock)
+    calls = []
+
+    def load(symbol, period, interval, refresh):
+        calls.append((symbol, refresh))
+        return f"{symbol}:{len(calls)}"
+
+    refresher = HotSymbolRefresher(load, ttl_for=lambda interval: 60.0, hot_set_size=2,
+                                   max_entries=5, max_stale=100.0)
+    refresher.calls = calls
+    yield refresher
+    refresher.stop()
+
+
+def test_values_are_served_fresh_then_stale_within_max_stale(refresher, clock):
+    assert refresher.get("aapl") == "AAPL:1"
+    assert refresher.get("AAPL") == "AAPL:1"
+    clock.advance(100)
+    # Stale but servable: returned at once, reloaded in the background
+    assert refresher.get("AAPL") == "AAPL:1"
+    clock.advance(100)
+    refresher.executor.shutdown(wait=True)
+    stats = refresher.stats()
+    assert (stats["fresh_hits"], stats["stale_hits"], stats["misses"]) == (1, 1, 1)
+
+
+def test_distinct_requests_do_not_grow_the_map_past_max_entries(refresher):
+    for i in range(50):
+        refresher.get(f"SYM{i}")
+    # The most recently used keys survive
+    refresher.get("SYM46")
+    refresher.get("SYM60")
+
+    stats = refresher.stats()
+    assert stats["entries"] == 5
+    assert stats["evictions"] == 46
+    assert set(refresher._entries) == {(f"SYM{i}", "6mo", "1d") for i in (46, 47, 48, 49, 60)}
+    assert len(refresher.calls) == 51
+
+
+def test_values_too_stale_to_serve_are_pruned_unless_hot(refresher, clock):
+    refresher.hot_set_size = 1
+    for symbol in ("HOT", "HOT", "COLD", "FRESH"):
+        refresher.get(symbol)
+    clock.advance(150)
+    refresher.get("FRESH", period="1y")
+    clock.advance(15)
+
+    refresher._prune(refresher.hot_keys())
+    assert set(refresher._entries) == {("HOT", "6mo", "1d"), ("FRESH", "1y", "1d")}
@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from indicator_engine import BASE_COLUMNS, TECHNICAL_COLUMNS, add_indicators, decayed_sum, pack, synthetic_universe, unpack
+
+
+# Per-symbol pandas versions of the pandas_ta defaults the engine reproduces
+def rma(series: pd.Series, length: int) -> pd.Series:
+    return series.ewm(alpha=1 / length, min_periods=length, adjust=True).mean()
+
+
+def ema(series: pd.Series, length: int) -> pd.Series:
+    seeded = series.copy()
+    seeded.iloc[:length - 1] = np.nan
+    seeded.iloc[length - 1] = series.iloc[:length].mean()
+    return seeded.ewm(span=length, adjust=False).mean()
+
+
+def reference_indicators(df: pd.DataFrame) -> pd.DataFrame:
+    close, high, low = df["Close"], df["High"], df["Low"]
+    change = close.diff()
+    gains, losses = rma(change.clip(lower=0), 14), rma(-change.clip(upper=0), 14)
+    line = ema(close, 12) - ema(close, 26)
+    signal = ema(line.iloc[25:], 9).reindex(line.index)
+    middle = close.rolling(5).mean()
+    deviations = 2 * close.rolling(5).std(ddof=0)
+    lower, upper = middle - deviations, middle + deviations
+    previous_close = close.shift()
+    true_range = pd.concat([high - low, (high - previous_close).abs(), (previous_close - low).abs()], axis=1)
+    return pd.DataFrame({
+        "RSI": 100 * gains / (gains + losses),
+        "MACD_12_26_9": line,
+        "MACDh_12_26_9": line - signal,
+        "MACDs_12_26_9": signal,
+        "BBL_5_2.0": lower,
+        "BBM_5_2.0": middle,
+        "BBU_5_2.0": upper,
+        "BBB_5_2.0": 100 * (upper - lower) / middle,
+        "BBP_5_2.0": (close - lower) / (upper - lower),
+        "ATR": rma(true_range.max(axis=1, skipna=False), 14),
+        "Volume_MA": df["Volume"].rolling(20).mean(),
+        "SMA_20": close.rolling(20).mean(),
+        "SMA_50": close.rolling(50).mean(),
+        "BBU_20_2.0": close.rolling(20).mean() + 2 * close.rolling(20).std(),
+        "BBM_20_2.0": close.rolling(20).mean(),
+        "BBL_20_2.0": close.rolling(20).mean() - 2 * close.rolling(20).std(),
+    }, index=df.index)
+
+
+@pytest.fixture(scope="module")
+def frames():
+    frames = synthetic_universe(n_symbols=6, n_bars=400, seed=1)
+    # A halt in one symbol: its bars go on after the gap as if it were not there
+    halted = frames["SYM0002"]
+    frames["SYM0002"] = halted.drop(halted.index[150:160])
+    return frames
+
+
+def test_indicators_match_pandas_per_symbol(frames):
+    results = add_indicators(frames, include_base=True)
+    assert list(results) == list(frames)
+    for symbol, df in frames.items():
+        result, reference = results[symbol], reference_indicators(df)
+        assert list(result.columns) == list(df.columns) + BASE_COLUMNS + TECHNICAL_COLUMNS
+        for column in BASE_COLUMNS + TECHNICAL_COLUMNS:
+            np.testing.assert_allclose(result[column], reference[column], rtol=1e-8, atol=1e-8,
+                                       err_msg=f"{symbol} {column}")
+
+
+def test_warm_up_bars_are_nan(frames):
+    df = add_indicators(frames)["SYM0000"]
+    assert df["RSI"].iloc[:14].isna().all() and df["RSI"].iloc[14:].notna().all()
+    assert df["MACDs_12_26_9"].iloc[:33].isna().all() and df["MACDs_12_26_9"].iloc[33:].notna().all()
+    assert df["ATR"].iloc[:14].isna().all() and df["ATR"].iloc[14:].notna().all()
+
+
+def test_existing_indicator_columns_are_replaced(frames):
+    once = add_indicators(frames)
+    twice = add_indicators(once)
+    for symbol in frames:
+        assert list(twice[symbol].columns) == list(once[symbol].columns)
+        pd.testing.assert_frame_equal(twice[symbol], once[symbol])
+
+
+def test_compact_frames_keep_float32():
+    df = next(iter(synthetic_universe(n_symbols=1, n_bars=100).values())).astype(np.float32)
+    result = add_indicators({"SYM": df})["SYM"]
+    assert (result[TECHNICAL_COLUMNS].dtypes == np.float32).all()
+
+
+def test_empty_frames_are_skipped():
+    assert add_indicators({"A": pd.DataFrame(), "B": None}) == {}
+
+
+def test_pack_and_unpack_round_trip():
+    values = np.array([[np.nan, 1.0, np.nan, 2.0], [3.0, 4.0, 5.0, np.nan]])
+    valid = ~np.isnan(values)
+    packed, order = pack(values, valid)
+    np.testing.assert_array_equal(packed, [[1.0, 2.0, np.nan, np.nan], [3.0, 4.0, 5.0, np.nan]])
+    np.testing.assert_array_equal(unpack(packed, order, valid), values)
+
+
+def test_decayed_sum_matches_the_recursion():
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=(3, 500))
+    expected = np.zeros_like(x)
+    expected[:, 0] = x[:, 0]
+    for t in range(1, x.shape[1]):
+        expected[:, t] = x[:, t] + 0.97 * expected[:, t - 1]
+    np.testing.assert_allclose(decayed_sum(x, 0.97), expected, rtol=1e-12, atol=1e-12)
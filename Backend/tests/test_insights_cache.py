@@ -0,0 +1,117 @@
+import os
+import pickle
+
+import pandas as pd
+import pytest
+from conftest import daily_bars
+
+from insights_cache import InsightsCache, fingerprint
+
+
+def labelled(df, symbol="AAPL", interval="1d"):
+    df.attrs.update(symbol=symbol, interval=interval)
+    return df
+
+
+@pytest.fixture
+def bars():
+    return labelled(daily_bars(60))
+
+
+def test_fingerprint_follows_the_last_bar_and_the_columns(bars):
+    key = fingerprint(bars)
+    assert key == fingerprint(labelled(bars.copy()))
+
+    changed = bars.copy()
+    changed.iloc[-1, changed.columns.get_loc("Close")] += 0.01
+    assert fingerprint(changed) != key
+    changed = bars.copy()
+    changed.iloc[-1, changed.columns.get_loc("Volume")] += 1
+    assert fingerprint(changed) != key
+
+    assert fingerprint(bars.drop(columns=["Dividends"])) != key
+    assert fingerprint(bars.assign(SMA_20=0.0)) != key
+    assert fingerprint(bars.astype({"Close": "float32"})) != key
+    assert fingerprint(bars.iloc[:-1]) != key
+    assert fingerprint(bars, "pandas_ta") != key
+    assert fingerprint(labelled(bars.copy(), interval="1h")) != key
+
+    stale = bars.copy()
+    stale.attrs["stale"] = True
+    assert fingerprint(stale) != key
+
+
+def test_unlabelled_or_empty_frames_have_no_fingerprint(bars):
+    assert fingerprint(daily_bars(5)) is None
+    assert fingerprint(labelled(bars.iloc[:0])) is None
+    assert fingerprint(None) is None
+
+
+def test_memory_tier_is_an_lru():
+    cache = InsightsCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["hits"] == 3 and cache.stats()["misses"] == 1
+
+
+def test_disk_hit_returns_an_equal_independent_copy(tmp_path, bars):
+    value = (bars, {"statistics": {"mean": 1.0}})
+    InsightsCache(directory=str(tmp_path)).put("key", value)
+
+    # A new cache, as after a restart, only has the disk tier
+    cache = InsightsCache(directory=str(tmp_path))
+    df, insights = cache.get("key")
+    assert cache.stats()["disk_hits"] == 1
+    pd.testing.assert_frame_equal(df, bars)
+    assert insights == value[1]
+
+    df.loc[df.index[-1], "Close"] = -1.0
+    insights["statistics"]["mean"] = 2.0
+    assert bars["Close"].iloc[-1] != -1.0 and value[1]["statistics"]["mean"] == 1.0
+    fresh, fresh_insights = InsightsCache(directory=str(tmp_path)).get("key")
+    pd.testing.assert_frame_equal(fresh, bars)
+    assert fresh_insights == value[1]
+
+
+@pytest.mark.parametrize("content", [b"", b"not a pickle", None])
+def test_corrupt_or_partial_disk_file_is_a_miss(tmp_path, bars, content):
+    InsightsCache(directory=str(tmp_path)).put("key", (bars, {"a": 1}))
+    path = os.path.join(str(tmp_path), "key.pkl")
+    if content is None:
+        # Truncated half way, as by a crash without the atomic rename
+        content = pickle.dumps((bars, {"a": 1}))[:200]
+    with open(path, "wb") as f:
+        f.write(content)
+
+    cache = InsightsCache(directory=str(tmp_path))
+    assert cache.get("key") is None
+    assert cache.stats()["misses"] == 1 and cache.stats()["entries"] == 0
+
+    cache.put("key", "fixed")
+    assert InsightsCache(directory=str(tmp_path)).get("key") == "fixed"
+
+
+def test_writes_leave_no_temporary_files(tmp_path):
+    cache = InsightsCache(directory=str(tmp_path))
+    cache.put("a", 1)
+    cache.put("a", 2)
+    assert os.listdir(str(tmp_path)) == ["a.pkl"]
+    cache.clear()
+    assert os.listdir(str(tmp_path)) == [] and cache.get("a") is None
+
+
+def test_analyzer_results_are_independent_copies(monkeypatch, bars):
+    monkeypatch.setenv("OHLCV_STORE_DIR", "")
+    from data_analysis import FinancialAnalyzer
+
+    analyzer = FinancialAnalyzer(insights_cache=InsightsCache())
+    first_df, first = analyzer.analyze(bars)
+    first_df["extra"] = 1.0
+    first["statistics"]["extra"] = True
+
+    second_df, second = analyzer.analyze(bars)
+    assert analyzer.insights_cache.stats()["hits"] == 1
+    assert "extra" not in second_df.columns and "extra" not in second["statistics"]
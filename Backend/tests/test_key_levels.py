@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from key_levels import _cluster, detect_levels, swing_pivots
+
+
+def zigzag(waypoints, steps=5, volume=None):
+    """Bars whose close moves in straight lines through the waypoints"""
+    close = np.concatenate([
+        np.linspace(a, b, steps, endpoint=False) for a, b in zip(waypoints[:-1], waypoints[1:])
+    ] + [[waypoints[-1]]])
+    index = pd.date_range("2024-01-01", periods=len(close), freq="D")
+    df = pd.DataFrame({"High": close, "Low": close, "Close": close}, index=index)
+    df["Volume"] = 1.0 if volume is None else volume(len(df))
+    return df
+
+
+def test_swing_pivots_dominate_their_neighbours():
+    high = np.array([1, 2, 5, 2, 1, 2, 6, 2, 1, 3.0])
+    low = high - 0.5
+    highs, lows = swing_pivots(high, low, order=1)
+    assert highs.tolist() == [2, 6]
+    assert lows.tolist() == [4, 8]
+    # Pivots need order bars on both sides
+    assert swing_pivots(high, low, order=2)[0].tolist() == [2, 6]
+    assert len(swing_pivots(high[:4], low[:4], order=2)[0]) == 0
+
+
+def test_clusters_are_no_wider_than_the_width():
+    values = np.array([0.0, 0.05, 0.1, 0.16, 0.2, 1.0])
+    assert _cluster(values, 0.1).tolist() == [0, 0, 0, 1, 1, 2]
+    # A dense run is cut every width rather than chained into one level
+    run = np.arange(0, 1, 0.01)
+    ids = _cluster(run, 0.1)
+    for level in np.unique(ids):
+        assert np.ptp(run[ids == level]) <= 0.1 + 1e-12
+
+
+def test_known_pivots_give_support_and_resistance():
+    df = zigzag([100, 110, 90, 110, 90, 110, 90, 100])
+    levels = detect_levels(df, orders=(2,), tolerance=0.01)
+    assert [level["price"] for level in levels["support"]] == [pytest.approx(90)]
+    assert [level["price"] for level in levels["resistance"]] == [pytest.approx(110)]
+    assert levels["resistance"][0]["touches"] == 3 and levels["support"][0]["touches"] == 3
+    assert levels["support"][0]["last_touch"] == str(df.index[30])
+
+
+def test_pivots_at_several_scales_weigh_more():
+    df = zigzag([100, 110, 90, 110, 90, 110, 90, 100])
+    single = detect_levels(df, orders=(2,), tolerance=0.01)
+    multi = detect_levels(df, orders=(2, 3), tolerance=0.01)
+    assert multi["support"][0]["score"] == 2 * single["support"][0]["score"]
+    assert multi["support"][0]["touches"] == single["support"][0]["touches"]
+
+
+def test_tolerance_sets_the_level_width():
+    # Peaks 0.45% apart are one level at 1% and two at 0.1%
+    df = zigzag([100, 110, 95, 110.5, 95, 110, 95, 100])
+    wide = detect_levels(df, orders=(2,), tolerance=0.01)["resistance"]
+    assert len(wide) == 1 and wide[0]["touches"] == 3
+    assert wide[0]["price"] == pytest.approx((110 + 110.5 + 110) / 3)
+    narrow = detect_levels(df, orders=(2,), tolerance=0.001)["resistance"]
+    assert sorted(level["price"] for level in narrow) == [pytest.approx(110), pytest.approx(110.5)]
+    assert [level["touches"] for level in narrow] == [2, 1]
+
+
+def test_level_price_is_volume_weighted():
+    df = zigzag([100, 110, 95, 110.5, 95, 100], volume=lambda n: np.where(np.arange(n) == 15, 3.0, 1.0))
+    level = detect_levels(df, orders=(2,), tolerance=0.01)["resistance"][0]
+    assert level["price"] == pytest.approx((110 * 1 + 110.5 * 3) / 4)
+    assert level["volume"] == 4.0
+
+
+def test_max_levels_keeps_the_best_scored_on_each_side():
+    # Troughs at four prices, touched 4, 3, 2 and 1 times
+    troughs = [80] * 4 + [85] * 3 + [90] * 2 + [95]
+    waypoints = [100]
+    for trough in troughs:
+        waypoints += [trough, 120]
+    waypoints[-1] = 110
+    levels = detect_levels(zigzag(waypoints), orders=(2,), tolerance=0.01, max_levels=2)
+    assert [level["price"] for level in levels["support"]] == [pytest.approx(80), pytest.approx(85)]
+    assert [level["touches"] for level in levels["support"]] == [4, 3]
+    assert len(detect_levels(zigzag(waypoints), orders=(2,), tolerance=0.01)["support"]) == 4
+
+
+def test_sides_follow_the_last_close():
+    waypoints = [100, 110, 90, 110, 90]
+    below = detect_levels(zigzag(waypoints + [80]), orders=(2,), tolerance=0.01)
+    assert below["support"] == [] and len(below["resistance"]) == 2
+    above = detect_levels(zigzag(waypoints + [120]), orders=(2,), tolerance=0.01)
+    assert above["resistance"] == [] and len(above["support"]) == 2
+
+
+def test_short_or_empty_frames_have_no_levels():
+    empty = {"support": [], "resistance": []}
+    assert detect_levels(zigzag([100, 101])) == empty
+    assert detect_levels(zigzag([100, 110, 90]).iloc[:0]) == empty
@@ -0,0 +1,114 @@
+import asyncio
+import time
+
+import pandas as pd
+import pytest
+from conftest import FakeProvider, daily_bars
+
+from data_cache import DataFrameCache
+from data_collection import FinancialDataCollector
+from market_data_providers import (
+    LiveMarketDataProvider,
+    RecordingMarketDataProvider,
+    ReplayMarketDataProvider,
+    provider_from_env,
+)
+
+
+@pytest.fixture
+def recorded(tmp_path):
+    """A fake provider's responses recorded to tmp_path, and the provider itself"""
+    inner = FakeProvider(
+        bars={"AAA": daily_bars(120, seed=1), "BBB": daily_bars(120, seed=2)},
+        json_data={"/v1/pubticker/btcusd": {"last": "100.5", "volume": {"USD": "10"}}},
+    )
+    recorder = RecordingMarketDataProvider(inner, str(tmp_path / "recordings"))
+    start = inner.bars["AAA"].index[-10]
+    responses = {
+        "history": recorder.history("AAA", "1d", period="3mo"),
+        "history_start": recorder.history("AAA", "1d", start=start),
+        "download": recorder.download(["AAA", "BBB", "ZZZ"], "1mo", "1d"),
+        "download_start": recorder.download(["AAA", "BBB"], None, "1d", start),
+        "json": recorder.get_json("/v1/pubticker/btcusd"),
+        "json_params": asyncio.run(recorder.aget_json("/v1/pubticker/btcusd", {"limit_trades": 5})),
+    }
+    return str(tmp_path / "recordings"), start, responses
+
+
+def test_replay_serves_what_was_recorded(recorded):
+    directory, start, responses = recorded
+    replay = ReplayMarketDataProvider(directory)
+
+    pd.testing.assert_frame_equal(replay.history("AAA", "1d", period="3mo"), responses["history"])
+    pd.testing.assert_frame_equal(replay.history("AAA", "1d", start=start), responses["history_start"])
+
+    panel, errors = replay.download(["AAA", "BBB", "ZZZ"], "1mo", "1d")
+    pd.testing.assert_frame_equal(panel, responses["download"][0])
+    assert errors == responses["download"][1] and "ZZZ" in errors
+    pd.testing.assert_frame_equal(replay.download(["AAA", "BBB"], None, "1d", start)[0],
+                                  responses["download_start"][0])
+
+    assert replay.get_json("/v1/pubticker/btcusd") == responses["json"]
+    assert asyncio.run(replay.aget_json("/v1/pubticker/btcusd", {"limit_trades": 5})) == responses["json_params"]
+
+
+def test_missing_recordings_raise_a_clear_error(recorded):
+    directory, start, _ = recorded
+    replay = ReplayMarketDataProvider(directory)
+    with pytest.raises(FileNotFoundError, match="No recording for history AAA 1d 1y"):
+        replay.history("AAA", "1d", period="1y")
+    with pytest.raises(FileNotFoundError, match="No recording for download of 1 symbols 1mo 1d"):
+        replay.download(["AAA"], "1mo", "1d")
+    # Parameters are part of the key
+    with pytest.raises(FileNotFoundError, match="No recording for /v1/pubticker/btcusd"):
+        replay.get_json("/v1/pubticker/btcusd", {"limit_trades": 6})
+    with pytest.raises(FileNotFoundError, match="No recording for /v1/trades/btcusd"):
+        asyncio.run(replay.aget_json("/v1/trades/btcusd"))
+
+
+def test_failed_calls_are_not_recorded(tmp_path):
+    recorder = RecordingMarketDataProvider(FakeProvider(), str(tmp_path))
+    with pytest.raises(Exception, match="no price data found"):
+        recorder.history("NOPE", "1d", period="1mo")
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_replay_latency_is_seeded(recorded):
+    directory, _, _ = recorded
+    delays = [ReplayMarketDataProvider(directory, latency=0.01, jitter=0.02, seed=3)._delay() for _ in range(2)]
+    assert delays[0] == delays[1] and 0.01 <= delays[0] <= 0.03
+
+    replay = ReplayMarketDataProvider(directory, latency=0.05)
+    started = time.perf_counter()
+    replay.get_json("/v1/pubticker/btcusd")
+    assert time.perf_counter() - started >= 0.05
+
+
+def test_collector_replays_a_recorded_session_offline(tmp_path, monkeypatch):
+    monkeypatch.setattr("circuit_breaker._breakers", {})
+    inner = FakeProvider(bars={"AAA": daily_bars(300)})
+    recording = FinancialDataCollector(
+        store_dir="", cache=DataFrameCache(),
+        provider=RecordingMarketDataProvider(inner, str(tmp_path / "recordings")),
+    )
+    recorded = recording.get_stock_data("AAA", "6mo")
+
+    replaying = FinancialDataCollector(
+        store_dir="", cache=DataFrameCache(), provider=ReplayMarketDataProvider(str(tmp_path / "recordings")),
+    )
+    pd.testing.assert_frame_equal(replaying.get_stock_data("AAA", "6mo"), recorded)
+    assert replaying.get_stock_data("AAA", "1y") is None
+
+
+def test_provider_from_env(tmp_path, monkeypatch):
+    monkeypatch.setenv("MARKET_DATA_RECORDINGS_DIR", str(tmp_path / "recordings"))
+    monkeypatch.setenv("MARKET_DATA_PROVIDER", "replay")
+    monkeypatch.setenv("MARKET_DATA_REPLAY_LATENCY", "0.25")
+    replay = provider_from_env()
+    assert isinstance(replay, ReplayMarketDataProvider) and replay.latency == 0.25
+
+    monkeypatch.setenv("MARKET_DATA_PROVIDER", "record")
+    recorder = provider_from_env()
+    assert isinstance(recorder, RecordingMarketDataProvider)
+    assert isinstance(recorder.inner, LiveMarketDataProvider)
+    assert (tmp_path / "recordings").is_dir()
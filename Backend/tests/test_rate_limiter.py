@@ -0,0 +1,196 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import rate_limiter
+from rate_limiter import (
+    Backoff,
+    FileTokenBucket,
+    ThreadTokenBucket,
+    ThrottledError,
+    TokenBucket,
+    get_limiter,
+    is_throttled,
+)
+
+
+@pytest.fixture(autouse=True)
+def fake_time(monkeypatch, clock):
+    monkeypatch.setattr(rate_limiter, "time", clock)
+    return clock
+
+
+def http_error(status: int, headers=None) -> Exception:
+    error = Exception(f"HTTP {status}")
+    error.response = SimpleNamespace(status_code=status, headers=headers or {})
+    return error
+
+
+def test_token_bucket_is_abstract():
+    with pytest.raises(TypeError):
+        TokenBucket(1, 1)
+
+
+def test_burst_is_free_then_callers_wait_in_arrival_order():
+    bucket = ThreadTokenBucket(rate=5, capacity=2)
+    waits = [bucket._reserve(1, None) for _ in range(5)]
+    assert waits == pytest.approx([0, 0, 0.2, 0.4, 0.6])
+
+
+def test_acquire_sleeps_off_its_debt(clock):
+    bucket = ThreadTokenBucket(rate=5, capacity=2)
+    start = clock.now
+    for _ in range(3):
+        assert bucket.acquire()
+    assert clock.now - start == pytest.approx(0.2)
+    stats = bucket.stats()
+    assert (stats["acquired"], stats["waited"]) == (3, 1)
+    assert stats["total_wait"] == pytest.approx(0.2)
+
+
+def test_tokens_refill_up_to_capacity(clock):
+    bucket = ThreadTokenBucket(rate=5, capacity=2)
+    bucket._reserve(2, None)
+    clock.advance(100)
+    assert [bucket._reserve(1, None) for _ in range(3)] == pytest.approx([0, 0, 0.2])
+
+
+def test_batch_larger_than_the_burst_waits_for_its_whole_charge():
+    bucket = ThreadTokenBucket(rate=5, capacity=2)
+    assert bucket._reserve(5, None) == pytest.approx(0.6)
+    assert bucket._reserve(1, None) == pytest.approx(0.8)
+
+
+def test_timeout_gives_up_without_taking_tokens():
+    bucket = ThreadTokenBucket(rate=5, capacity=1)
+    assert bucket.acquire()
+    assert not bucket.acquire(timeout=0.1)
+    assert bucket.stats()["timeouts"] == 1
+    assert bucket._reserve(1, None) == pytest.approx(0.2)
+
+
+def test_file_buckets_on_one_path_share_their_tokens(tmp_path):
+    path = str(tmp_path / "limits" / "yfinance.json")
+    first, second = FileTokenBucket(path, rate=5, capacity=2), FileTokenBucket(path, rate=5, capacity=2)
+    assert first._reserve(2, None) == 0
+    assert second._reserve(1, None) == pytest.approx(0.2)
+    assert first._reserve(1, None) == pytest.approx(0.4)
+
+
+def test_async_acquire_for_both_backends(tmp_path):
+    buckets = [ThreadTokenBucket(rate=5, capacity=2), FileTokenBucket(str(tmp_path / "b.json"), rate=5, capacity=2)]
+
+    async def main():
+        return [await bucket.aacquire() for bucket in buckets for _ in range(2)]
+
+    assert asyncio.run(main()) == [True] * 4
+    assert [bucket.stats()["acquired"] for bucket in buckets] == [2, 2]
+
+
+def test_is_throttled():
+    assert is_throttled(ThrottledError())
+    assert is_throttled(http_error(429))
+    assert is_throttled(type("YFRateLimitError", (Exception,), {})())
+    assert is_throttled(Exception("Too Many Requests. Rate limited."))
+    assert not is_throttled(http_error(500))
+    assert not is_throttled(ValueError("bad symbol"))
+
+
+def test_backoff_retries_throttled_calls_until_they_succeed():
+    backoff = Backoff(max_retries=5, base_delay=0.1)
+    bucket = ThreadTokenBucket(rate=100, capacity=10)
+    attempts = []
+
+    def call():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ThrottledError()
+        return "ok"
+
+    assert backoff.call(bucket, call) == "ok"
+    assert len(attempts) == 3
+    assert bucket.stats()["acquired"] == 3
+    assert backoff.stats() == {"retries": 2, "exhausted": 0}
+
+
+def test_backoff_gives_up_after_max_retries():
+    backoff = Backoff(max_retries=2)
+    attempts = []
+
+    def call():
+        attempts.append(1)
+        raise ThrottledError()
+
+    with pytest.raises(ThrottledError):
+        backoff.call(ThreadTokenBucket(100, 10), call)
+    assert len(attempts) == 3
+    assert backoff.stats() == {"retries": 2, "exhausted": 1}
+
+
+def test_backoff_does_not_retry_other_errors():
+    backoff = Backoff()
+
+    def call():
+        raise ValueError("bad symbol")
+
+    with pytest.raises(ValueError):
+        backoff.call(ThreadTokenBucket(100, 10), call)
+    assert backoff.stats()["retries"] == 0
+
+
+def test_backoff_delay_honours_retry_after_and_its_bounds():
+    backoff = Backoff(base_delay=0.5, max_delay=30)
+    assert backoff.delay(0, http_error(429, {"Retry-After": "7"})) == 7
+    assert backoff.delay(0, http_error(429, {"Retry-After": "120"})) == 30
+    assert all(0 <= backoff.delay(attempt, ThrottledError()) <= min(30, 0.5 * 2 ** attempt) for attempt in range(8))
+
+
+def test_async_backoff_retries_throttled_calls():
+    backoff = Backoff(base_delay=0.001)
+    attempts = []
+
+    async def call():
+        attempts.append(1)
+        if len(attempts) < 2:
+            raise http_error(429)
+        return "ok"
+
+    assert asyncio.run(backoff.acall(ThreadTokenBucket(100, 10), call)) == "ok"
+    assert backoff.stats()["retries"] == 1
+
+
+def test_get_limiter_reads_the_environment(monkeypatch, tmp_path):
+    monkeypatch.setattr(rate_limiter, "_limiters", {})
+    monkeypatch.setenv("RATE_LIMIT_YFINANCE", "3/7")
+    monkeypatch.delenv("RATE_LIMIT_BACKEND", raising=False)
+    limiter = get_limiter("yfinance")
+    assert isinstance(limiter, ThreadTokenBucket)
+    assert (limiter.rate, limiter.capacity) == (3, 7)
+    assert get_limiter("yfinance") is limiter
+
+    monkeypatch.setenv("RATE_LIMIT_BACKEND", "file")
+    monkeypatch.setenv("RATE_LIMIT_DIR", str(tmp_path))
+    shared = get_limiter("gemini")
+    assert isinstance(shared, FileTokenBucket)
+    assert shared.path == str(tmp_path / "gemini.json")
+    assert (shared.rate, shared.capacity) == rate_limiter.DEFAULT_LIMITS["gemini"]
+
+
+@pytest.mark.parametrize("rate, capacity", [(0, 1), (-1, 1), (float("nan"), 1), (1, 0), (1, float("inf"))])
+def test_buckets_reject_rates_and_capacities_that_are_not_positive(rate, capacity, tmp_path):
+    with pytest.raises(ValueError, match="must be a positive number"):
+        ThreadTokenBucket(rate, capacity)
+    with pytest.raises(ValueError, match="must be a positive number"):
+        FileTokenBucket(str(tmp_path / "bucket.json"), rate, capacity)
+
+
+@pytest.mark.parametrize("configured, message", [("0/5", "rate must be"), ("0", "rate must be"),
+                                                 ("2/0", "capacity must be"), ("fast", "rate/burst")])
+def test_get_limiter_rejects_bad_configuration(monkeypatch, configured, message):
+    monkeypatch.setattr(rate_limiter, "_limiters", {})
+    monkeypatch.delenv("RATE_LIMIT_BACKEND", raising=False)
+    monkeypatch.setenv("RATE_LIMIT_YFINANCE", configured)
+    with pytest.raises(ValueError, match=message):
+        get_limiter("yfinance")
+    assert rate_limiter._limiters == {}
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from resampling import can_resample, plan_fetches, resample_ohlcv
+
+
+def intraday_bars(days=("2024-01-09", "2024-01-10"), minutes: int = 5) -> pd.DataFrame:
+    index = pd.DatetimeIndex([])
+    for day in days:
+        index = index.append(pd.date_range(f"{day} 09:30", f"{day} 15:55", freq=f"{minutes}min",
+                                           tz="America/New_York"))
+    n = len(index)
+    close = 100 + np.arange(n, dtype=float)
+    return pd.DataFrame(
+        {"Open": close - 0.5, "High": close + 1, "Low": close - 1, "Close": close, "Volume": np.ones(n)},
+        index=index,
+    )
+
+
+def test_intraday_bins_are_anchored_to_the_session_open():
+    bars = intraday_bars()
+    hourly = resample_ohlcv(bars, "1h")
+
+    first_day = hourly[hourly.index.date == pd.Timestamp("2024-01-09").date()]
+    assert list(first_day.index.strftime("%H:%M")) == ["09:30", "10:30", "11:30", "12:30", "13:30", "14:30", "15:30"]
+    assert str(hourly.index.tz) == "America/New_York"
+
+    first_hour = bars.iloc[:12]
+    expected = [first_hour["Open"].iloc[0], first_hour["High"].max(), first_hour["Low"].min(),
+                first_hour["Close"].iloc[-1], first_hour["Volume"].sum()]
+    assert hourly.iloc[0][["Open", "High", "Low", "Close", "Volume"]].tolist() == expected
+    # The last bin of a session holds the half hour to the close
+    assert hourly.iloc[6]["Volume"] == 6
+
+
+def test_daily_bars_roll_up_into_weeks_starting_on_monday():
+    index = pd.bdate_range("2024-01-03", "2024-01-19", tz="America/New_York")
+    bars = pd.DataFrame({"Open": 1.0, "High": 2.0, "Low": 0.5, "Close": np.arange(len(index), dtype=float),
+                         "Volume": 10.0}, index=index)
+    weekly = resample_ohlcv(bars, "1wk")
+
+    assert list(weekly.index.strftime("%Y-%m-%d")) == ["2024-01-01", "2024-01-08", "2024-01-15"]
+    assert weekly["Volume"].tolist() == [30.0, 50.0, 50.0]
+    assert weekly["Close"].tolist() == [2.0, 7.0, 12.0]
+
+
+def test_unsupported_target_is_rejected():
+    with pytest.raises(ValueError):
+        resample_ohlcv(intraday_bars(), "7m")
+
+
+@pytest.mark.parametrize("source, target, adjusted, expected", [
+    ("5m", "15m", True, True),
+    ("15m", "1h", True, True),
+    ("15m", "5m", True, False),
+    ("2m", "5m", True, False),
+    ("5m", "1d", True, False),
+    ("5m", "1d", False, True),
+    ("1d", "1wk", True, True),
+    ("1d", "1d", True, False),
+    ("1mo", "3mo", True, True),
+    ("1wk", "1mo", True, False),
+])
+def test_can_resample(source, target, adjusted, expected):
+    assert can_resample(source, target, adjusted) is expected
+
+
+def test_plan_derives_coarser_intervals_from_one_fetch():
+    lookback = pd.Timedelta(days=30)
+    assert plan_fetches(["1wk", "1h", "5m", "1d"], lookback) == {"5m": ["5m", "1h"], "1d": ["1d", "1wk"]}
+
+
+def test_plan_derives_calendar_intervals_from_intraday_bars_only_unadjusted():
+    lookback = pd.Timedelta(days=30)
+    assert plan_fetches(["5m", "1d", "1wk"], lookback, adjusted=False) == {"5m": ["5m", "1d", "1wk"]}
+
+
+def test_plan_fetches_intraday_intervals_on_their_own_beyond_their_lookback():
+    assert plan_fetches(["5m", "1h", "1d"], pd.Timedelta(days=365)) == {"5m": ["5m"], "1h": ["1h"], "1d": ["1d"]}
+    assert plan_fetches(["5m", "1h"]) == {"5m": ["5m"], "1h": ["1h"]}
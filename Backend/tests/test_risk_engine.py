@@ -0,0 +1,135 @@
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from correlation_engine import aligned_returns
+from indicator_engine import synthetic_universe
+from risk_engine import METHODS, RiskEngine, to_records
+
+
+@pytest.fixture(scope="module")
+def returns():
+    returns = aligned_returns(synthetic_universe(n_symbols=5, n_bars=600, seed=5))
+    rng = np.random.default_rng(1)
+    return returns.mask(rng.random(returns.shape) < 0.03)
+
+
+def row(report, symbol, method, confidence, horizon):
+    match = report[(report["symbol"] == symbol) & (report["method"] == method)
+                   & (report["confidence"] == confidence) & (report["horizon"] == horizon)]
+    assert len(match) == 1
+    return match.iloc[0]
+
+
+def test_historical_matches_quantiles_of_overlapping_returns(returns):
+    report = RiskEngine().compute(returns, confidences=(0.95, 0.99), horizons=(1, 5), methods=["historical"])
+    assert len(report) == returns.shape[1] * 4
+    for symbol in returns.columns:
+        log_returns = np.log1p(returns[symbol].dropna().to_numpy())
+        for horizon in (1, 5):
+            windows = np.convolve(log_returns, np.ones(horizon), mode="valid")
+            for confidence in (0.95, 0.99):
+                quantile = np.quantile(windows, 1 - confidence)
+                result = row(report, symbol, "historical", confidence, horizon)
+                assert result["var"] == pytest.approx(np.expm1(quantile), rel=1e-12)
+                assert result["cvar"] == pytest.approx(np.expm1(windows[windows <= quantile]).mean(), rel=1e-12)
+                assert result["observations"] == len(log_returns)
+
+
+def test_parametric_matches_the_lognormal_formulas(returns):
+    report = RiskEngine().compute(returns, confidences=(0.99,), horizons=(10,), methods=["parametric"])
+    normal = NormalDist()
+    for symbol in returns.columns:
+        log_returns = np.log1p(returns[symbol].dropna().to_numpy())
+        m, s = 10 * log_returns.mean(), np.sqrt(10) * log_returns.std(ddof=1)
+        quantile = m + normal.inv_cdf(0.01) * s
+        shortfall = np.exp(m + s ** 2 / 2) * normal.cdf((quantile - m - s ** 2) / s) / 0.01 - 1
+        result = row(report, symbol, "parametric", 0.99, 10)
+        assert result["var"] == pytest.approx(np.expm1(quantile), rel=1e-9)
+        assert result["cvar"] == pytest.approx(shortfall, rel=1e-9)
+        assert result["cvar"] < result["var"] < 0
+
+
+def test_monte_carlo_is_seeded_and_agrees_with_historical(returns):
+    engine = RiskEngine(simulations=20_000, seed=7)
+    first = engine.compute(returns, horizons=(1,), methods=["monte_carlo", "historical"])
+    second = engine.compute(returns, horizons=(1,), methods=["monte_carlo"])
+    monte_carlo = first[first["method"] == "monte_carlo"].reset_index(drop=True)
+    pd.testing.assert_frame_equal(monte_carlo, second)
+
+    historical = first[first["method"] == "historical"].reset_index(drop=True)
+    np.testing.assert_allclose(monte_carlo["var"], historical["var"], atol=0.003)
+    np.testing.assert_allclose(monte_carlo["cvar"], historical["cvar"], atol=0.003)
+
+
+def test_monte_carlo_chunking_keeps_results_close(returns):
+    engine = RiskEngine(simulations=20_000, seed=0)
+    # One symbol's outcomes fit, so symbols run one at a time and paths in chunks
+    small = RiskEngine(simulations=20_000, seed=0, max_bytes=2 ** 19)
+    kwargs = {"horizons": (1, 10), "methods": ["monte_carlo"]}
+    np.testing.assert_allclose(small.compute(returns, **kwargs)["var"], engine.compute(returns, **kwargs)["var"],
+                               atol=0.01)
+
+
+def test_symbols_with_too_few_returns_are_nan():
+    returns = pd.DataFrame({"A": [0.01, -0.02, 0.005, 0.01], "B": [np.nan, np.nan, np.nan, 0.01]})
+    report = RiskEngine(simulations=100).compute(returns, horizons=(1,))
+    thin = report[report["symbol"] == "B"]
+    assert thin["observations"].eq(1).all()
+    assert thin[thin["method"] != "historical"]["var"].isna().all()
+    assert report[report["symbol"] == "A"]["var"].notna().all()
+    assert RiskEngine().compute(returns, horizons=(10,), methods=["historical"])["var"].isna().all()
+
+
+def test_invalid_arguments_are_rejected(returns):
+    engine = RiskEngine()
+    with pytest.raises(ValueError):
+        engine.compute(returns, methods=["garch"])
+    with pytest.raises(ValueError):
+        engine.compute(returns, confidences=(95,))
+    with pytest.raises(ValueError):
+        engine.compute(returns, horizons=(0,))
+    with pytest.raises(ValueError):
+        engine.compute(returns, methods=["monte_carlo"], simulations=0)
+
+
+def test_monte_carlo_outside_the_memory_budget_is_rejected(returns):
+    engine = RiskEngine(max_bytes=2 ** 16)
+    with pytest.raises(ValueError, match="at most 4096"):
+        engine.compute(returns, horizons=(1, 10), methods=["monte_carlo"], simulations=4097)
+    with pytest.raises(ValueError, match="horizon"):
+        engine.compute(returns, horizons=(3000,), methods=["monte_carlo"], simulations=1)
+    assert len(engine.compute(returns, horizons=(1, 10), methods=["monte_carlo"], simulations=4096)) == 20
+
+
+def test_empty_returns_give_an_empty_report():
+    report = RiskEngine().compute(pd.DataFrame())
+    assert report.empty and "var" in report.columns
+
+
+def test_records_are_json_friendly():
+    returns = pd.DataFrame({"A": [0.01, -0.02, 0.005], "B": [np.nan, np.nan, 0.01]})
+    records = to_records(RiskEngine(simulations=100).compute(returns, horizons=(1,), methods=METHODS))
+    assert {record["symbol"] for record in records} == {"A", "B"}
+    for record in records:
+        assert all(not isinstance(value, np.generic) for value in record.values())
+    assert any(record["var"] is None for record in records if record["symbol"] == "B")
+
+
+def test_for_symbols_uses_one_batched_download():
+    frames = synthetic_universe(n_symbols=3, n_bars=100, seed=0)
+    calls = []
+
+    class Collector:
+        def get_stock_data_batch(self, symbols, period, interval):
+            calls.append((list(symbols), period, interval))
+            return {"data": {symbol: frames[symbol] for symbol in symbols if symbol in frames}, "errors": {}}
+
+    engine = RiskEngine(Collector())
+    report = engine.for_symbols(["SYM0000", "SYM0002", "MISSING"], period="6mo", methods=["historical"])
+    assert calls == [(["SYM0000", "SYM0002", "MISSING"], "6mo", "1d")]
+    assert set(report["symbol"]) == {"SYM0000", "SYM0002"}
+    single = engine.for_frame(frames["SYM0000"], "sym0000", methods=["historical"])
+    pd.testing.assert_frame_equal(single, report[report["symbol"] == "SYM0000"].reset_index(drop=True))
@@ -0,0 +1,78 @@
+import pytest
+
+from indicator_engine import add_indicators, synthetic_universe
+from screener import ScreenCriteria, UniverseScreener, evaluate, rank, screen_frames
+
+
+@pytest.fixture(scope="module")
+def frames():
+    # The collector's frames come with the SMA and Bollinger (20) columns
+    return add_indicators(synthetic_universe(n_symbols=6, n_bars=200, seed=6), include_base=True)
+
+
+class FakeCollector:
+    def __init__(self, frames):
+        self.frames = frames
+        self.calls = []
+
+    def get_stock_data_batch(self, symbols, period, interval):
+        self.calls.append(list(symbols))
+        return {
+            "data": {symbol: self.frames[symbol] for symbol in symbols if symbol in self.frames},
+            "errors": {symbol: "delisted" for symbol in symbols if symbol not in self.frames},
+        }
+
+
+def test_matches_are_filtered_and_ranked(frames):
+    everything = screen_frames(frames, ScreenCriteria())
+    assert everything["screened"] == len(frames) and not everything["errors"]
+    rsi = [match["rsi"] for match in everything["matches"]]
+    assert rsi == sorted(rsi)
+
+    threshold = rsi[len(rsi) // 2]
+    low = screen_frames(frames, ScreenCriteria(max_rsi=threshold, rank_by="close", descending=True))
+    assert all(match["rsi"] <= threshold for match in low["matches"])
+    closes = [match["close"] for match in low["matches"]]
+    assert closes == sorted(closes, reverse=True)
+
+
+def test_signal_and_trend_criteria_must_all_hold(frames):
+    result = screen_frames(frames, ScreenCriteria())
+    match = result["matches"][0]
+    criteria = ScreenCriteria(signals=match["signals"], trend=match["trend"])
+    assert match["symbol"] in [m["symbol"] for m in screen_frames(frames, criteria)["matches"]]
+    assert not screen_frames(frames, ScreenCriteria(signals=["no such signal"]))["matches"]
+
+
+def test_chunks_are_fetched_by_the_parents_collector(frames):
+    collector = FakeCollector(frames)
+    screener = UniverseScreener(collector, max_workers=1, chunk_size=4)
+    symbols = list(frames) + ["BAD"]
+    try:
+        partials = list(screener.screen_iter([symbol.lower() for symbol in symbols], ScreenCriteria()))
+        result = screener.screen(symbols, ScreenCriteria())
+    finally:
+        screener.close()
+
+    assert collector.calls[:2] == [symbols[:4], symbols[4:]]
+    assert [(partial["completed"], partial["chunks"]) for partial in partials] == [(1, 2), (2, 2)]
+    assert result["screened"] == len(frames)
+    assert result["errors"] == {"BAD": "delisted"}
+    assert result["matches"] == screen_frames(frames, ScreenCriteria())["matches"]
+
+
+def test_evaluate_applies_the_rsi_bounds(frames):
+    df = add_indicators({"SYM0000": frames["SYM0000"]})["SYM0000"]
+    rsi = df["RSI"].iloc[-1]
+    match = evaluate("SYM0000", df, ScreenCriteria())
+    assert match["rsi"] == pytest.approx(rsi)
+    assert match["change_1d"] == pytest.approx(100 * (df["Close"].iloc[-1] / df["Close"].iloc[-2] - 1), rel=1e-9)
+    assert evaluate("SYM0000", df, ScreenCriteria(min_rsi=rsi + 1)) is None
+    assert evaluate("SYM0000", df, ScreenCriteria(max_rsi=rsi - 1)) is None
+    assert evaluate("SYM0000", df.iloc[:1], ScreenCriteria()) is None
+
+
+def test_rank_puts_missing_values_last():
+    matches = [{"symbol": "A", "rsi": None}, {"symbol": "B", "rsi": 60.0}, {"symbol": "C", "rsi": 20.0}]
+    assert [m["symbol"] for m in rank(matches, ScreenCriteria())] == ["C", "B", "A"]
+    assert [m["symbol"] for m in rank(matches, ScreenCriteria(descending=True))] == ["B", "C", "A"]
@@ -0,0 +1,174 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from single_flight import AsyncSingleFlight, SingleFlight
+
+
+def wait_for(condition, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.001)
+
+
+def run_concurrently(flight: SingleFlight, func, followers: int = 4):
+    """Start a leader blocked in func, then followers for the same key"""
+    results, errors = [], []
+
+    def caller():
+        try:
+            results.append(flight.do("key", func))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=caller)]
+    threads[0].start()
+    wait_for(lambda: flight.stats()["in_flight"] == 1)
+    threads += [threading.Thread(target=caller) for _ in range(followers)]
+    for thread in threads[1:]:
+        thread.start()
+    wait_for(lambda: flight.stats()["coalesced"] == followers)
+    return threads, results, errors
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return "bars"
+
+    threads, results, errors = run_concurrently(flight, fetch)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1 and not errors
+    assert sorted(results) == [("bars", False)] + [("bars", True)] * 4
+    assert flight.stats() == {"executions": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_followers_receive_the_leaders_exception():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def fetch():
+        release.wait(5)
+        raise RuntimeError("upstream down")
+
+    threads, results, errors = run_concurrently(flight, fetch, followers=2)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert not results
+    assert [str(e) for e in errors] == ["upstream down"] * 3
+
+
+def test_sequential_calls_execute_again():
+    flight = SingleFlight()
+    assert flight.do("key", lambda: 1) == (1, False)
+    assert flight.do("key", lambda: 2) == (2, False)
+    assert flight.stats()["executions"] == 2
+
+
+def test_async_callers_share_one_execution():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "bars"
+
+    async def main():
+        return await asyncio.gather(*(flight.do("key", fetch) for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert sorted(results) == [("bars", False)] + [("bars", True)] * 4
+    assert flight.stats() == {"executions": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_cancelled_follower_does_not_cancel_the_shared_call():
+    flight = AsyncSingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.02)
+        return "bars"
+
+    async def main():
+        leader = asyncio.create_task(flight.do("key", fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("key", fetch))
+        await asyncio.sleep(0)
+        follower.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+        return await leader
+
+    assert asyncio.run(main()) == ("bars", False)
+
+
+def test_async_followers_receive_the_leaders_exception():
+    flight = AsyncSingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    async def main():
+        return await asyncio.gather(*(flight.do("key", fetch) for _ in range(3)), return_exceptions=True)
+
+    assert [str(e) for e in asyncio.run(main())] == ["upstream down"] * 3
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_cancelled_leader_does_not_cancel_the_followers():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return "bars"
+
+    async def main():
+        leader = asyncio.create_task(flight.do("key", fetch))
+        await asyncio.sleep(0)
+        followers = [asyncio.create_task(flight.do("key", fetch)) for _ in range(2)]
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await asyncio.gather(*followers)
+
+    assert asyncio.run(main()) == [("bars", True)] * 2
+    assert len(calls) == 1 and flight.stats()["in_flight"] == 0
+
+
+def test_shared_call_is_cancelled_once_nobody_waits():
+    flight = AsyncSingleFlight()
+    finished = []
+
+    async def fetch():
+        await asyncio.sleep(1)
+        finished.append(1)
+
+    async def main():
+        callers = [asyncio.create_task(flight.do("key", fetch)) for _ in range(2)]
+        await asyncio.sleep(0)
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.sleep(0)
+        return flight.stats()["in_flight"]
+
+    assert asyncio.run(main()) == 0
+    assert not finished
@@ -0,0 +1,77 @@
+import json
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from indicator_engine import add_indicators, synthetic_universe
+from streaming_indicators import IndicatorState, RollingWindow, StreamingEMA
+
+
+@pytest.fixture(scope="module")
+def bars():
+    return next(iter(synthetic_universe(n_symbols=1, n_bars=600, seed=3).values()))
+
+
+def test_streamed_values_match_the_batch_engine(bars):
+    state = IndicatorState()
+    rows = [state.update(bar, timestamp) for timestamp, bar in bars.iterrows()]
+    streamed = pd.DataFrame(rows, index=bars.index)
+    batch = add_indicators({"SYM": bars}, include_base=True)["SYM"][streamed.columns]
+
+    assert (streamed.isna() == batch.isna()).all().all()
+    np.testing.assert_allclose(streamed.to_numpy(), batch.to_numpy(), rtol=1e-8, atol=1e-8)
+    assert state.bars == len(bars)
+    assert state.last_timestamp == str(bars.index[-1])
+
+
+def test_snapshot_restore_round_trips_through_json(bars):
+    history, new_bars = bars.iloc[:-50], bars.iloc[-50:]
+    original = IndicatorState()
+    original.seed(history)
+    restored = IndicatorState().restore(json.loads(json.dumps(original.snapshot())))
+    assert restored.last_timestamp == str(history.index[-1])
+
+    for timestamp, bar in new_bars.iterrows():
+        expected, actual = original.update(bar, timestamp), restored.update(bar, timestamp)
+        assert actual.keys() == expected.keys()
+        for name, value in expected.items():
+            assert (math.isnan(value) and math.isnan(actual[name])) or actual[name] == value
+    assert restored.snapshot() == original.snapshot()
+
+
+def test_seed_returns_the_last_bars_values(bars):
+    state = IndicatorState()
+    assert state.seed(bars.iloc[:0]) is None
+    values = state.seed(bars)
+    batch = add_indicators({"SYM": bars}, include_base=True)["SYM"].iloc[-1]
+    for name, value in values.items():
+        assert value == pytest.approx(batch[name], rel=1e-8)
+
+
+def test_rolling_window_stays_accurate_over_long_streams():
+    rng = np.random.default_rng(0)
+    values = 1e4 + rng.normal(size=20_000)
+    window = RollingWindow(20, ddof=1)
+    for value in values:
+        window.update(value)
+    assert window.average() == pytest.approx(values[-20:].mean(), rel=1e-12)
+    assert window.std() == pytest.approx(values[-20:].std(ddof=1), rel=1e-6)
+
+
+def test_rolling_window_of_a_flat_series_has_zero_deviation():
+    window = RollingWindow(5, ddof=0)
+    for _ in range(3):
+        window.update(0.1)
+    assert math.isnan(window.average())
+    for _ in range(10):
+        window.update(0.1)
+    assert window.std() == pytest.approx(0.0, abs=1e-12)
+
+
+def test_ema_is_seeded_with_the_simple_average():
+    ema = StreamingEMA(3)
+    assert math.isnan(ema.update(1.0)) and math.isnan(ema.update(2.0))
+    assert ema.update(3.0) == 2.0
+    assert ema.update(6.0) == 4.0
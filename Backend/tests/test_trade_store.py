@@ -0,0 +1,135 @@
+import asyncio
+
+import numpy as np
+import pytest
+from conftest import FakeProvider
+
+from async_data_collection import AsyncFinancialDataCollector
+from data_collection import MAX_TRADE_PAGES, TRADES_PAGE
+from trade_buffer import TRADE_DTYPE, TradeRingBuffer, trades_to_records, trades_vwap
+from trade_store import TradeStore
+
+
+def gemini_trades(first_tid, count):
+    """Gemini-shaped trades with consecutive ids, newest first"""
+    return [
+        {"tid": tid, "timestampms": 1_700_000_000_000 + tid, "price": str(100.0 + tid % 7),
+         "amount": str(0.1 * (1 + tid % 3)), "type": "buy" if tid % 2 else "sell"}
+        for tid in range(first_tid + count - 1, first_tid - 1, -1)
+    ]
+
+
+class TradesProvider(FakeProvider):
+    """Serves /v1/trades pages the way Gemini does: the oldest trades after since_tid, newest first"""
+
+    def __init__(self, trades):
+        super().__init__(json_data={"/v1/pubticker/btcusd": {
+            "last": "100", "bid": "99.9", "ask": "100.1", "volume": {"USD": "1000", "timestamp": 1_700_000_000_000},
+        }})
+        self.trades = trades
+
+    def get_json(self, path, params=None):
+        if not path.startswith("/v1/trades/"):
+            return super().get_json(path, params)
+        self.calls.append(("get_json", path, dict(params)))
+        limit = params["limit_trades"]
+        if "since_tid" not in params:
+            return self.trades[:limit]
+        newer = [trade for trade in self.trades if trade["tid"] > params["since_tid"]]
+        return newer[-limit:]
+
+    async def aget_json(self, path, params=None):
+        return self.get_json(path, params)
+
+
+def test_ring_buffer_keeps_the_newest_trades():
+    buffer = TradeRingBuffer(capacity=4)
+    assert buffer.last_tid() == 0 and len(buffer.latest()) == 0
+    for tid in range(1, 4):
+        buffer.append(tid, tid * 1000, 100.0 + tid, 1.0, 1)
+    trades = np.array([(tid, tid * 1000, 100.0 + tid, 1.0, -1) for tid in range(4, 8)], dtype=TRADE_DTYPE)
+    buffer.extend(trades)
+    assert len(buffer) == 4 and buffer.last_tid() == 7
+    assert buffer.latest()["tid"].tolist() == [7, 6, 5, 4]
+    assert buffer.latest(2)["tid"].tolist() == [7, 6]
+
+
+def test_ingest_skips_trades_already_seen():
+    store = TradeStore(capacity=100)
+    assert store.ingest("BTCUSD", gemini_trades(1, 10)) == 10
+    # An overlapping page only adds the trades after the last seen id
+    assert store.ingest("btcusd", gemini_trades(6, 10)) == 5
+    assert store.ingest("btcusd", gemini_trades(1, 15)) == 0
+    assert store.stats("btcusd") == {"stored_trades": 15, "total_trades": 15, "last_tid": 15}
+    assert store.recent("btcusd", 15)["tid"].tolist() == list(range(15, 0, -1))
+    assert store.recent_records("btcusd", 1)[0]["tid"] == 15
+
+
+def test_vwap_and_average_price():
+    store = TradeStore(capacity=5)
+    trades = gemini_trades(1, 12)
+    store.ingest("btcusd", trades)
+    prices = np.array([float(trade["price"]) for trade in trades])
+    amounts = np.array([float(trade["amount"]) for trade in trades])
+
+    # Running totals cover every trade, the buffer only the newest five
+    assert store.cumulative_vwap("btcusd") == pytest.approx(np.dot(prices, amounts) / amounts.sum())
+    assert store.vwap("btcusd") == pytest.approx(np.dot(prices[:5], amounts[:5]) / amounts[:5].sum())
+    assert store.average_price("btcusd", 3) == pytest.approx(prices[:3].mean())
+    assert store.vwap("ethusd") is None and store.cumulative_vwap("ethusd") is None
+    assert trades_vwap(np.zeros(2, dtype=TRADE_DTYPE)) is None
+
+
+def test_records_round_trip_through_the_store():
+    store = TradeStore()
+    trades = gemini_trades(1, 3)
+    store.ingest("btcusd", trades)
+    records = trades_to_records(store.recent("btcusd", 3))
+    assert [(r["tid"], float(r["price"]), float(r["amount"]), r["type"]) for r in records] == [
+        (t["tid"], float(t["price"]), float(t["amount"]), t["type"]) for t in trades
+    ]
+
+
+def test_least_recently_ingested_symbols_are_dropped():
+    store = TradeStore(capacity=10, max_symbols=2)
+    for symbol in ["a", "b", "a", "c"]:
+        store.ingest(symbol, gemini_trades(store.last_tid(symbol) + 1, 1))
+    assert store.last_tid("b") == 0
+    assert store.stats("a")["total_trades"] == 2 and store.last_tid("c") == 1
+
+
+def test_polls_page_through_missed_trades(collector):
+    provider = TradesProvider(gemini_trades(1, 10))
+    collector.provider = provider
+    collector.get_crypto_data("btcusd")
+    assert provider.calls[-1][2] == {"limit_trades": TRADES_PAGE}
+
+    # 1,234 trades since the last poll take three pages, the last one short
+    provider.trades = gemini_trades(1, 1244)
+    provider.calls.clear()
+    collector.get_crypto_data("btcusd")
+    pages = [call[2] for call in provider.calls if call[1] == "/v1/trades/btcusd"]
+    assert [page["since_tid"] for page in pages] == [10, 510, 1010]
+    stats = collector.trade_store.stats("btcusd")
+    assert stats["total_trades"] == 1244 and stats["last_tid"] == 1244
+
+
+def test_catching_up_is_capped(collector):
+    provider = TradesProvider(gemini_trades(1, 1))
+    collector.provider = provider
+    collector.get_crypto_data("btcusd")
+    provider.trades = gemini_trades(1, 1 + TRADES_PAGE * (MAX_TRADE_PAGES + 2))
+    provider.calls.clear()
+    collector.get_crypto_data("btcusd")
+    assert len(provider.calls) == MAX_TRADE_PAGES + 1  # The ticker and the pages
+    assert collector.trade_store.last_tid("btcusd") == 1 + TRADES_PAGE * MAX_TRADE_PAGES
+
+
+def test_async_polls_page_the_same_way(collector):
+    provider = TradesProvider(gemini_trades(1, 10))
+    collector.provider = provider
+    async_collector = AsyncFinancialDataCollector(collector)
+    asyncio.run(async_collector.get_crypto_data("btcusd"))
+    provider.trades = gemini_trades(1, 1010)
+    asyncio.run(async_collector.get_crypto_data("btcusd"))
+    assert collector.trade_store.stats("btcusd")["total_trades"] == 1010
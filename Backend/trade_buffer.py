@@ -0,0 +1,99 @@
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Fixed-width record for one trade; side is +1 for taker buys, -1 for taker sells
+TRADE_DTYPE = np.dtype(
+    [
+        ("tid", np.int64),
+        ("timestampms", np.int64),
+        ("price", np.float64),
+        ("amount", np.float64),
+        ("side", np.int8),
+    ]
+)
+
+
+class TradeRingBuffer:
+    """
+    Fixed-size ring buffer of trades backed by a structured NumPy array.
+
+    Appends overwrite the oldest trades once the buffer is full, so memory
+    stays constant no matter how long the stream runs.
+    """
+
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=TRADE_DTYPE)
+        self._next = 0
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, tid: int, timestampms: int, price: float, amount: float, side: int) -> None:
+        """Append one trade"""
+        with self._lock:
+            self._data[self._next] = (tid, timestampms, price, amount, side)
+            self._next = (self._next + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+
+    def extend(self, trades: np.ndarray) -> None:
+        """Append a TRADE_DTYPE array of trades, oldest first"""
+        trades = trades[-self.capacity:]
+        count = len(trades)
+        if count == 0:
+            return
+        with self._lock:
+            end = self._next + count
+            if end <= self.capacity:
+                self._data[self._next:end] = trades
+            else:
+                split = self.capacity - self._next
+                self._data[self._next:] = trades[:split]
+                self._data[: count - split] = trades[split:]
+            self._next = end % self.capacity
+            self._size = min(self._size + count, self.capacity)
+
+    def latest(self, n: Optional[int] = None) -> np.ndarray:
+        """Copy of the most recent n trades (all by default), newest first"""
+        with self._lock:
+            n = self._size if n is None else min(n, self._size)
+            indices = (self._next - 1 - np.arange(n)) % self.capacity
+            return self._data[indices]
+
+    def last_tid(self) -> int:
+        """Trade id of the most recent trade, or 0 if the buffer is empty"""
+        with self._lock:
+            if self._size == 0:
+                return 0
+            return int(self._data[(self._next - 1) % self.capacity]["tid"])
+
+
+# Trades the reported VWAP covers, the same for streamed and polled data
+VWAP_TRADES = 1000
+
+
+def trades_vwap(trades: np.ndarray) -> Optional[float]:
+    """Volume-weighted average price of TRADE_DTYPE rows, None without volume"""
+    amount = float(trades["amount"].sum())
+    if amount == 0:
+        return None
+    return float(np.dot(trades["price"], trades["amount"]) / amount)
+
+
+def trades_to_records(trades: np.ndarray) -> List[Dict[str, Any]]:
+    """Convert TRADE_DTYPE rows to dictionaries shaped like Gemini REST trades"""
+    return [
+        {
+            "timestamp": int(trade["timestampms"] // 1000),
+            "timestampms": int(trade["timestampms"]),
+            "tid": int(trade["tid"]),
+            "price": repr(float(trade["price"])),
+            "amount": repr(float(trade["amount"])),
+            "type": "buy" if trade["side"] > 0 else "sell",
+        }
+        for trade in trades
+    ]
@@ -0,0 +1,136 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from trade_buffer import TRADE_DTYPE, VWAP_TRADES, TradeRingBuffer, trades_to_records, trades_vwap
+
+
+class _SymbolTrades:
+    def __init__(self, capacity: int):
+        self.trades = TradeRingBuffer(capacity)
+        self.last_tid = 0
+        self.total_notional = 0.0
+        self.total_amount = 0.0
+        self.total_trades = 0
+
+
+class TradeStore:
+    """
+    Per-symbol trade history fed incrementally from the Gemini trades endpoint.
+
+    Only trades newer than the last seen trade id are appended, so each poll
+    moves just the new trades. Notional and amount are accumulated as trades
+    arrive, which keeps the cumulative VWAP up to date without rescanning
+    the history.
+
+    A symbol's buffer is only allocated once trades for it have been
+    ingested, and the least recently polled symbols are dropped beyond
+    max_symbols, so lookups of arbitrary symbols cannot grow memory.
+    """
+
+    def __init__(self, capacity: int = 100_000, max_symbols: int = 32):
+        """
+        Args:
+            capacity: Number of trades kept per symbol
+            max_symbols: Symbols kept before the least recently ingested is dropped
+        """
+        self.capacity = capacity
+        self.max_symbols = max_symbols
+        self._symbols: "OrderedDict[str, _SymbolTrades]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, symbol: str) -> Optional[_SymbolTrades]:
+        return self._symbols.get(symbol.lower())
+
+    def last_tid(self, symbol: str) -> int:
+        """Id of the newest stored trade, 0 if none have been seen"""
+        with self._lock:
+            state = self._get(symbol)
+            return state.last_tid if state is not None else 0
+
+    def ingest(self, symbol: str, trades: List[Dict[str, Any]]) -> int:
+        """
+        Append trades from a Gemini trades response
+
+        Args:
+            symbol: Cryptocurrency symbol
+            trades: Trades as returned by /v1/trades, newest first
+
+        Returns:
+            Number of trades that were new
+        """
+        with self._lock:
+            state = self._get(symbol)
+            last_tid = state.last_tid if state is not None else 0
+            new_trades = [trade for trade in trades if int(trade["tid"]) > last_tid]
+            if not new_trades:
+                return 0
+
+            records = np.array(
+                [
+                    (
+                        int(trade["tid"]),
+                        int(trade["timestampms"]),
+                        float(trade["price"]),
+                        float(trade["amount"]),
+                        1 if trade.get("type") == "buy" else -1,
+                    )
+                    for trade in new_trades
+                ],
+                dtype=TRADE_DTYPE,
+            )
+            records.sort(order="tid")
+
+            if state is None:
+                state = self._symbols[symbol.lower()] = _SymbolTrades(self.capacity)
+                while len(self._symbols) > self.max_symbols:
+                    self._symbols.popitem(last=False)
+            self._symbols.move_to_end(symbol.lower())
+
+            state.trades.extend(records)
+            state.last_tid = int(records["tid"][-1])
+            state.total_notional += float(np.dot(records["price"], records["amount"]))
+            state.total_amount += float(records["amount"].sum())
+            state.total_trades += len(records)
+            return len(records)
+
+    def recent(self, symbol: str, n: int = 10) -> np.ndarray:
+        """The newest n trades, newest first"""
+        with self._lock:
+            state = self._get(symbol)
+            return state.trades.latest(n) if state is not None else np.empty(0, dtype=TRADE_DTYPE)
+
+    def recent_records(self, symbol: str, n: int = 10) -> List[Dict[str, Any]]:
+        """The newest n trades as Gemini-shaped dictionaries"""
+        return trades_to_records(self.recent(symbol, n))
+
+    def average_price(self, symbol: str, n: int = 100) -> Optional[float]:
+        """Mean price of the newest n trades"""
+        prices = self.recent(symbol, n)["price"]
+        return float(prices.mean()) if len(prices) else None
+
+    def vwap(self, symbol: str, n: int = VWAP_TRADES) -> Optional[float]:
+        """Volume-weighted average price of the newest n trades, as the stream reports it"""
+        return trades_vwap(self.recent(symbol, n))
+
+    def cumulative_vwap(self, symbol: str) -> Optional[float]:
+        """Volume-weighted average price of every trade ingested for the symbol"""
+        with self._lock:
+            state = self._get(symbol)
+            if state is None or state.total_amount == 0:
+                return None
+            return state.total_notional / state.total_amount
+
+    def stats(self, symbol: str) -> Dict[str, Any]:
+        """Stored and total ingested trade counts for a symbol"""
+        with self._lock:
+            state = self._get(symbol)
+            if state is None:
+                return {"stored_trades": 0, "total_trades": 0, "last_tid": 0}
+            return {
+                "stored_trades": len(state.trades),
+                "total_trades": state.total_trades,
+                "last_tid": state.last_tid,
+            }
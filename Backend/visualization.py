@@ -29,8 +29,7 @@ class FinancialDashboard:
         # Fetch and analyze data
         data = self.collector.get_stock_data(symbol, period)
         if data is not None:
-            data = self.analyzer.calculate_technical_indicators(data)
-            insights = self.analyzer.generate_insights(symbol, period)
+            data, insights = self.analyzer.analyze(data)
             
             # Display main price chart
             self._plot_price_chart(data, symbol)
@@ -48,7 +47,7 @@ class FinancialDashboard:
                     options=["btcusd", "ethusd"],
                     index=0
                 )
-                self._plot_crypto_comparison(symbol, crypto_symbol)
+                self._plot_crypto_comparison(symbol, crypto_symbol, period)
         else:
             st.error(f"No data found for symbol {symbol}")
 
@@ -278,19 +277,40 @@ class FinancialDashboard:
             cols[1].metric("Medium-term Trend", trend['medium_term'])
             cols[2].metric("Trend Strength", trend['strength'])
 
-    def _plot_crypto_comparison(self, stock_symbol: str, crypto_symbol: str):
+    def _plot_crypto_comparison(self, stock_symbol: str, crypto_symbol: str, period: str = "6mo"):
         """Plot comparison between stock and cryptocurrency"""
         st.subheader(f"Comparison: {stock_symbol} vs {crypto_symbol}")
         
-        # Get crypto data
-        crypto_data = self.collector.get_crypto_data(crypto_symbol)
+        combined = self.collector.get_combined_data(stock_symbol, crypto_symbol, period)
+        crypto_data = combined["crypto_data"]
         if crypto_data:
+            volume = crypto_data['volume']
             st.metric(
                 f"{crypto_symbol.upper()} Price",
                 f"${crypto_data['last_price']:.2f}",
-                f"Volume: ${crypto_data['volume']:,.0f}"
+                f"Volume: ${volume:,.0f}" if volume is not None else None
             )
 
+        aligned = combined["aligned"]
+        crypto_close = f"{crypto_symbol.upper()}_Close"
+        if aligned is None or aligned[crypto_close].isna().all():
+            st.warning(f"No historical data available for {crypto_symbol}")
+            return
+
+        # Rebase both closes to 100 at the first bar where both are known
+        closes = aligned[['Close', crypto_close]].dropna()
+        rebased = closes / closes.iloc[0] * 100
+
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(x=rebased.index, y=rebased['Close'], name=stock_symbol))
+        fig.add_trace(go.Scatter(x=rebased.index, y=rebased[crypto_close], name=crypto_symbol.upper()))
+        fig.update_layout(height=400, yaxis_title='Rebased to 100')
+        st.plotly_chart(fig, use_container_width=True)
+
+        returns = closes.pct_change().dropna()
+        if len(returns) > 1:
+            st.metric("Return Correlation", f"{returns['Close'].corr(returns[crypto_close]):.2f}")
+
 # Run the dashboard
 if __name__ == "__main__":
     dashboard = FinancialDashboard()